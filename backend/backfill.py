@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Backfill a directory tree of procedures straight into MongoDB and the FAISS index.
+
+Sub-directories map to document groups (created when missing). Extraction and chunking run in a
+process pool while the main process embeds and stores finished documents in batches. Files whose
+name is already stored are skipped, so an interrupted run can simply be started again.
+
+Run from the backend directory with the API stopped; the API loads the new index when it starts:
+    python backfill.py /srv/legacy-procedures --workers 8 --batch-size 64 --persist-every 10
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import server
+
+
+def init_extraction_worker(tokenizer_path: str, max_seq_length: int):
+    """Pool initializer: chunking only needs the model tokenizer; PDFs are read sequentially inside each worker"""
+    from transformers import AutoTokenizer
+
+    server.lower_process_priority()
+    server.chunk_tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
+    server.chunk_max_seq_length = max_seq_length
+    server.PDF_PAGES_PER_TASK = sys.maxsize
+
+
+def prepare_file(path: str, file_extension: str) -> dict:
+    """Hash, extract and chunk one file; runs in a pool worker"""
+    content_hash = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for piece in iter(lambda: source.read(server.UPLOAD_READ_CHUNK_BYTES), b''):
+            content_hash.update(piece)
+
+    prepared = server.build_hierarchical_chunks(list(server.iter_document_blocks(path, file_extension)))
+    if not prepared['chunks']:
+        raise ValueError("Doküman içeriği okunamadı")
+    prepared['content_hash'] = content_hash.hexdigest()
+    prepared['file_size'] = os.path.getsize(path)
+    return prepared
+
+
+def group_name_for(path: Path, root: Path, depth: int, root_group: Optional[str]) -> Optional[str]:
+    parts = path.relative_to(root).parent.parts[:depth]
+    return "/".join(parts) if parts else root_group
+
+
+class BackfillStats:
+    def __init__(self, total: int):
+        self.total = total
+        self.started = time.perf_counter()
+        self.ingested = 0
+        self.skipped = 0
+        self.failed = 0
+        self.chunks = 0
+        self.bytes = 0
+
+    def report(self, final: bool = False):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        done = self.ingested + self.skipped + self.failed
+        print(
+            f"{'Done' if final else 'Progress'}: {done}/{self.total} files "
+            f"({self.ingested} ingested, {self.skipped} skipped, {self.failed} failed) | "
+            f"{self.ingested / elapsed:.1f} docs/s, {self.chunks / elapsed:.0f} chunks/s, "
+            f"{self.bytes / elapsed / 1024 / 1024:.2f} MB/s, {elapsed:.0f}s elapsed",
+            flush=True
+        )
+
+
+async def ensure_groups(names: List[str]) -> Dict[str, str]:
+    """Group id per group name, creating missing groups"""
+    group_ids = {}
+    for name in names:
+        group = await server.db.groups.find_one({"name": name})
+        if not group:
+            group = server.GroupInfo(name=name, description="Toplu aktarım").dict()
+            await server.db.groups.insert_one(group)
+            await server.apply_document_stats({"total_groups": 1})
+            print(f"Created group '{name}'")
+        group_ids[name] = group["id"]
+    return group_ids
+
+
+async def ensure_index_consistency():
+    """Rebuild the index if an earlier run stopped between storing documents and persisting the index"""
+    stored_ids = set(await server.db.documents.distinct("id"))
+    # Chunks of a document whose insert never happened
+    orphaned = await server.db.chunks.delete_many({"document_id": {"$nin": list(stored_ids)}})
+    if orphaned.deleted_count:
+        print(f"Removed {orphaned.deleted_count} chunks of unfinished documents")
+    indexed_ids = {
+        document_id
+        for chunk in server.document_chunks
+        for document_id in chunk.get('document_ids', [chunk['document_id']])
+    }
+    if stored_ids != indexed_ids:
+        print(f"Index covers {len(indexed_ids)} documents but {len(stored_ids)} are stored; rebuilding index")
+        await server.update_faiss_index_optimized()
+
+
+async def flush_batch(batch: List[tuple], stats: BackfillStats):
+    """Index a batch of prepared documents with one add and store them with insert_many; the caller persists the index"""
+    records = []
+    chunk_counts = []
+    texts = []
+    metadata = []
+    for path, document_info, file_extension, prepared in batch:
+        server.store_blob(str(path), prepared['content_hash'])
+        records.append(server.build_document_record(
+            document_info, file_extension, prepared['file_size'], prepared['content_hash'], prepared
+        ))
+        texts.extend(prepared['chunks'])
+        chunk_counts.append(len(prepared['chunks']))
+        metadata.extend(
+            {**document_info, 'chunk_index': i, **meta} for i, meta in enumerate(prepared['chunk_metadata'])
+        )
+        stats.bytes += prepared['file_size']
+
+    # Embedding runs off the loop so pool results keep being collected meanwhile
+    embeddings = await asyncio.to_thread(server.add_chunks_to_index, texts, metadata)
+
+    chunk_records = []
+    offset = 0
+    for (_, document_info, _, prepared), chunk_count in zip(batch, chunk_counts):
+        prepared['embeddings'] = embeddings[offset:offset + chunk_count]
+        offset += chunk_count
+        chunk_records.extend(server.build_chunk_records(document_info['document_id'], prepared))
+
+    # Records before the index file: a crash in between is repaired by the consistency check on the next run
+    await server.db.chunks.insert_many(chunk_records, ordered=False)
+    await server.db.documents.insert_many(records, ordered=False)
+    await server.apply_document_stats(server.document_stats_delta(records))
+
+    stats.ingested += len(batch)
+    stats.chunks += len(texts)
+    stats.report()
+
+
+async def run_backfill(args) -> int:
+    root = Path(args.root).resolve()
+    if not root.is_dir():
+        print(f"{root} is not a directory", file=sys.stderr)
+        return 1
+
+    server.load_models()
+    if server.sentence_model is None:
+        print("Embedding model could not be loaded", file=sys.stderr)
+        return 1
+    await server.ensure_indexes()
+    await server.migrate_legacy_document_records()
+    await server.reconcile_document_stats()
+    await ensure_index_consistency()
+
+    # Resume: filenames are unique in the application, so stored names are already done
+    stored_filenames = set(await server.db.documents.distinct("filename"))
+    candidates = []
+    seen = set()
+    skipped = 0
+    for path in sorted(root.rglob('*')):
+        if not path.is_file():
+            continue
+        file_extension = server.resolve_file_extension(path.name)
+        if file_extension is None:
+            continue
+        if path.name in stored_filenames or path.name in seen:
+            skipped += 1
+            continue
+        seen.add(path.name)
+        candidates.append((path, file_extension, group_name_for(path, root, args.group_depth, args.root_group)))
+
+    stats = BackfillStats(len(candidates) + skipped)
+    stats.skipped = skipped
+    print(f"{len(candidates)} files to ingest, {skipped} already stored or duplicate names")
+    if args.dry_run or not candidates:
+        stats.report(final=True)
+        return 0
+
+    group_ids = await ensure_groups(sorted({group for _, _, group in candidates if group}))
+
+    loop = asyncio.get_running_loop()
+    pending = {}
+    batch = []
+    unpersisted_batches = 0
+    queue = iter(candidates)
+    max_in_flight = args.workers * 4
+
+    # Workers load the same tokenizer the parent's model uses, so chunks match the server's
+    worker_args = (server.sentence_model.tokenizer.name_or_path, server.sentence_model.max_seq_length)
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_extraction_worker, initargs=worker_args) as pool:
+        def submit_next() -> bool:
+            item = next(queue, None)
+            if item is None:
+                return False
+            future = loop.run_in_executor(pool, prepare_file, str(item[0]), item[1])
+            pending[future] = item
+            return True
+
+        while len(pending) < max_in_flight and submit_next():
+            pass
+
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                path, file_extension, group_name = pending.pop(future)
+                submit_next()
+                try:
+                    prepared = future.result()
+                except Exception as e:
+                    stats.failed += 1
+                    print(f"Failed {path}: {e}", file=sys.stderr)
+                    continue
+
+                document_info = {
+                    "document_id": str(uuid.uuid4()),
+                    "filename": path.name,
+                    "group_id": group_ids.get(group_name),
+                    "group_name": group_name
+                }
+                batch.append((path, document_info, file_extension, prepared))
+
+            # Embedding runs here while the pool keeps extracting the next files
+            if len(batch) >= args.batch_size or (not pending and batch):
+                await flush_batch(batch, stats)
+                batch = []
+                unpersisted_batches += 1
+                # Writing the whole index after every batch would make the run quadratic in I/O
+                if unpersisted_batches >= args.persist_every:
+                    await asyncio.to_thread(server.persist_faiss_index)
+                    unpersisted_batches = 0
+
+    if unpersisted_batches:
+        await asyncio.to_thread(server.persist_faiss_index)
+    stats.report(final=True)
+    return 0 if stats.failed == 0 else 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill a directory tree of procedures into KPA")
+    parser.add_argument("root", help="Directory whose sub-directories map to groups")
+    parser.add_argument("--workers", type=int, default=server.EXTRACTION_WORKERS, help="Extraction processes")
+    parser.add_argument("--batch-size", type=int, default=64, help="Documents per insert_many and index update")
+    parser.add_argument("--persist-every", type=int, default=10, help="Batches between index writes (always written at the end)")
+    parser.add_argument("--group-depth", type=int, default=1, help="Leading directory levels used as the group name")
+    parser.add_argument("--root-group", default=None, help="Group for files directly under root (default: none)")
+    parser.add_argument("--dry-run", action="store_true", help="Only list what would be ingested")
+    args = parser.parse_args()
+    return asyncio.run(run_backfill(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
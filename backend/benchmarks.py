@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the Kurumsal Prosedür Asistanı (KPA) backend.
+
+Run from the backend directory, for example:
+    python benchmarks.py chunking /path/to/procedures
+    python benchmarks.py ingestion /path/to/procedures
+    python benchmarks.py listing --documents 10000
+    python benchmarks.py groups --groups 1000 --documents 50000
+    python benchmarks.py storage /path/to/procedures
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import bson
+import faiss
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import server
+
+
+def iter_document_paths(paths: List[str]):
+    """Yield every file with a registered extractor under the given files/directories"""
+    for raw_path in paths:
+        path = Path(raw_path)
+        candidates = sorted(path.rglob('*')) if path.is_dir() else [path]
+        for candidate in candidates:
+            if candidate.is_file() and server.resolve_file_extension(candidate.name):
+                yield candidate
+
+
+def print_table(headers: List[str], rows: List[List]):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    print("  ".join(str(header).ljust(width) for header, width in zip(headers, widths)))
+    print("  ".join("-" * width for width in widths))
+    for row in rows:
+        print("  ".join(str(value).ljust(width) for value, width in zip(row, widths)))
+
+
+def bench_chunking(args):
+    """Compare the legacy character chunker with the tokenizer-aware chunker"""
+    server.load_models()
+    if server.sentence_model is None:
+        print("Embedding model could not be loaded", file=sys.stderr)
+        return 1
+
+    window = server.sentence_model.max_seq_length
+    chunkers: Dict[str, Callable[[str], List[str]]] = {
+        "chars 500/100": server.create_chunks,
+        f"tokens {args.max_tokens or server.get_chunk_token_budget()}/{args.overlap_tokens}": (
+            lambda text: server.create_token_chunks(text, args.max_tokens, args.overlap_tokens)
+        ),
+    }
+    totals = {name: {"chunks": 0, "truncated": 0, "encode_seconds": 0.0, "index_bytes": 0} for name in chunkers}
+
+    document_count = 0
+    for path in iter_document_paths(args.paths):
+        try:
+            text = server.extract_text_from_document(str(path), server.resolve_file_extension(path.name))
+        except Exception as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+            continue
+        document_count += 1
+
+        for name, chunker in chunkers.items():
+            chunks = chunker(text)
+            if not chunks:
+                continue
+
+            start = time.perf_counter()
+            embeddings = server.sentence_model.encode(chunks, batch_size=args.batch_size)
+            elapsed = time.perf_counter() - start
+
+            index = faiss.IndexFlatL2(embeddings.shape[1])
+            index.add(embeddings.astype('float32'))
+
+            stats = totals[name]
+            stats["chunks"] += len(chunks)
+            stats["truncated"] += sum(1 for chunk in chunks if server.count_tokens(chunk) > window - 2)
+            stats["encode_seconds"] += elapsed
+            stats["index_bytes"] += len(faiss.serialize_index(index))
+
+    if document_count == 0:
+        print("No supported documents found", file=sys.stderr)
+        return 1
+
+    rows = []
+    for name, stats in totals.items():
+        rows.append([
+            name,
+            stats["chunks"],
+            f"{stats['chunks'] / document_count:.1f}",
+            stats["truncated"],
+            f"{stats['encode_seconds']:.2f}",
+            f"{stats['index_bytes'] / 1024:.1f}",
+        ])
+
+    print(f"{document_count} documents, model window {window} tokens\n")
+    print_table(["chunker", "chunks", "chunks/doc", "truncated", "encode s", "index KB"], rows)
+    return 0
+
+
+class DisabledIngestionCache:
+    """Keeps cache hits and cache writes out of ingestion measurements"""
+
+    def get(self, content_hash):
+        return None
+
+    def put(self, content_hash, entry):
+        pass
+
+
+def legacy_ingest(path: Path, file_extension: str) -> int:
+    """
+    The original pipeline: bytes, base64 copy, full extracted text, 500/100 character chunks,
+    then all embeddings at once
+    """
+    content = path.read_bytes()
+    encoded = base64.b64encode(content).decode('utf-8')
+    text = server.extract_text_from_document(str(path), file_extension)
+    chunks = server.create_chunks(text, 500, 100)
+    embeddings = server.sentence_model.encode(chunks)
+    del encoded, text, embeddings
+    return len(chunks)
+
+
+def streaming_ingest(path: Path, file_extension: str) -> int:
+    """Streaming pipeline: blocks -> lazy chunker -> bounded embedding batches appended to the index"""
+    document_info = {"document_id": "benchmark", "filename": path.name, "group_id": None, "group_name": None}
+    prepared = server.ingest_document_file(str(path), file_extension, "benchmark", document_info)
+    return len(prepared['chunks'])
+
+
+def measure(func, *args) -> tuple:
+    """Run func and return (result, seconds, Python heap peak in bytes)"""
+    server.faiss_index = None
+    server.document_chunks = []
+    server.near_duplicate_index = server.create_near_duplicate_index()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def bench_ingestion(args):
+    """
+    Compare peak memory and time of the original whole-document ingestion (character chunks) and the
+    streaming pipeline (hierarchical token chunks); chunk counts differ because the chunkers do
+    """
+    server.load_models()
+    if server.sentence_model is None:
+        print("Embedding model could not be loaded", file=sys.stderr)
+        return 1
+
+    # Benchmark runs must not touch the real index files or ingestion cache
+    server.ingestion_cache = DisabledIngestionCache()
+    server.persist_faiss_index = lambda: None
+    server.EMBED_BATCH_SIZE = args.batch_size
+
+    rows = []
+    for path in iter_document_paths(args.paths):
+        file_extension = server.resolve_file_extension(path.name)
+        try:
+            legacy_chunks, legacy_seconds, legacy_peak = measure(legacy_ingest, path, file_extension)
+            streaming_chunks, streaming_seconds, streaming_peak = measure(streaming_ingest, path, file_extension)
+        except Exception as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+            continue
+
+        rows.append([
+            path.name,
+            f"{path.stat().st_size / 1024:.0f}",
+            legacy_chunks,
+            f"{legacy_seconds:.2f}",
+            f"{legacy_peak / 1024 / 1024:.1f}",
+            streaming_chunks,
+            f"{streaming_seconds:.2f}",
+            f"{streaming_peak / 1024 / 1024:.1f}",
+        ])
+
+    if not rows:
+        print("No supported documents found", file=sys.stderr)
+        return 1
+
+    print(f"Python heap peak measured with tracemalloc, embedding batch size {args.batch_size}\n")
+    print_table(["document", "KB", "whole chunks", "whole s", "whole MB", "stream chunks", "stream s", "stream MB"], rows)
+    return 0
+
+
+def synthetic_document(index: int, args) -> dict:
+    """Document record shaped like a real upload; inline content reproduces records written before the blob store"""
+    text = (f"Prosedür {index} madde metni. " * 64)[:args.text_kb * 1024]
+    chunks = [text[start:start + 1000] for start in range(0, len(text), 1000)]
+    document = {
+        "id": str(uuid.uuid4()),
+        "filename": f"prosedur_{index:06d}.docx",
+        "file_type": ".docx",
+        "file_size": args.content_kb * 1024,
+        "content_hash": uuid.uuid4().hex,
+        "text": text,
+        "sections": [],
+        "chunks": chunks,
+        "chunk_sections": [None] * len(chunks),
+        "chunk_count": len(chunks),
+        "upload_date": datetime.utcnow(),
+        "group_id": None,
+        "group_name": None
+    }
+    if args.inline_content:
+        document["content"] = base64.b64encode(os.urandom(args.content_kb * 1024)).decode('utf-8')
+    return document
+
+
+async def legacy_status_chunks() -> int:
+    """Previous /api/status: every full document fetched to sum len(chunks)"""
+    total_chunks = 0
+    async for doc in server.db.documents.find():
+        total_chunks += len(doc.get('chunks', []))
+    return total_chunks
+
+
+async def legacy_list_documents(limit: int = 0) -> int:
+    """Previous /api/documents: full documents fetched to build DocumentInfo (limit=0 fetches them all)"""
+    documents_list = []
+    async for doc in server.db.documents.find({}).sort([("upload_date", -1), ("id", -1)]).limit(limit):
+        documents_list.append(server.DocumentInfo(
+            id=doc["id"],
+            filename=doc["filename"],
+            file_type=doc.get("file_type", ""),
+            file_size=doc.get("file_size", 0),
+            chunk_count=len(doc.get("chunks", [])),
+            upload_date=doc.get("upload_date", datetime.utcnow()),
+            group_id=doc.get("group_id"),
+            group_name=doc.get("group_name")
+        ))
+    return len(documents_list)
+
+
+async def paged_list_documents(current_user: dict, page_size: int) -> int:
+    """Current /api/documents followed page by page through next_cursor, as a client listing everything would"""
+    total = 0
+    cursor = None
+    while True:
+        page = await server.list_documents(cursor=cursor, limit=page_size, current_user=current_user)
+        total += len(page.documents)
+        cursor = page.next_cursor
+        if cursor is None:
+            return total
+
+
+async def timed(func, repeat: int) -> float:
+    """Median wall time of an async callable in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def run_listing_benchmark(args) -> int:
+    if args.db_name == os.environ.get('DB_NAME'):
+        print("Refusing to seed the application database; pass a scratch --db-name", file=sys.stderr)
+        return 1
+
+    server.db = AsyncIOMotorClient(server.mongo_url)[args.db_name]
+    await server.db.documents.drop()
+    await server.db.stats.drop()
+    await server.db.documents.create_index([("upload_date", -1), ("id", -1)])
+    for start in range(0, args.documents, 500):
+        await server.db.documents.insert_many(
+            [synthetic_document(index, args) for index in range(start, min(start + 500, args.documents))]
+        )
+    # The listing reads its totals from the statistics document; build it now so no timed run pays for it
+    await server.reconcile_document_stats()
+
+    admin = {"id": "benchmark", "role": "admin"}
+    listed = await paged_list_documents(admin, args.page_size)
+    if listed != args.documents:
+        print(f"Paged listing returned {listed} of {args.documents} documents", file=sys.stderr)
+        return 1
+
+    rows = [
+        ["status", f"{await timed(legacy_status_chunks, args.repeat):.0f}", f"{await timed(server.get_system_status, args.repeat):.0f}"],
+        ["documents, all", f"{await timed(legacy_list_documents, args.repeat):.0f}", f"{await timed(lambda: paged_list_documents(admin, args.page_size), args.repeat):.0f}"],
+        ["documents, first page", f"{await timed(lambda: legacy_list_documents(args.page_size), args.repeat):.0f}", f"{await timed(lambda: server.list_documents(limit=args.page_size, current_user=admin), args.repeat):.0f}"],
+    ]
+
+    if not args.keep:
+        for collection in ("documents", "stats"):
+            await server.db[collection].drop()
+
+    print(f"{args.documents} documents, {args.text_kb} KB text, {args.content_kb} KB file"
+          f"{' inline as base64' if args.inline_content else ''}, {args.page_size} per page, median of {args.repeat} runs\n")
+    print_table(["endpoint", "full docs ms", "projected ms"], rows)
+    return 0
+
+
+async def legacy_group_counts() -> int:
+    """Previous /api/groups: one count_documents round trip per group"""
+    counts = {}
+    async for group in server.db.groups.find():
+        counts[group["id"]] = await server.db.documents.count_documents({"group_id": group["id"]})
+    return len(counts)
+
+
+async def aggregated_group_counts() -> int:
+    """One $group over documents joined in memory with the group list"""
+    counts = {
+        row["_id"]: row["count"]
+        async for row in server.db.documents.aggregate([{"$group": {"_id": "$group_id", "count": {"$sum": 1}}}])
+    }
+    groups = [{**group, "document_count": counts.get(group["id"], 0)} async for group in server.db.groups.find({}, {"_id": 0})]
+    return len(groups)
+
+
+async def uncached_group_list():
+    server.invalidate_group_list()
+    await server.get_groups(current_user={"id": "benchmark"})
+
+
+async def run_groups_benchmark(args) -> int:
+    if args.db_name == os.environ.get('DB_NAME'):
+        print("Refusing to seed the application database; pass a scratch --db-name", file=sys.stderr)
+        return 1
+
+    server.db = AsyncIOMotorClient(server.mongo_url)[args.db_name]
+    await server.db.groups.drop()
+    await server.db.documents.drop()
+    await server.db.stats.drop()
+
+    groups = [server.GroupInfo(name=f"Grup {index}").dict() for index in range(args.groups)]
+    await server.db.groups.insert_many(groups)
+    await server.db.documents.create_index("group_id")
+    for start in range(0, args.documents, 1000):
+        batch = []
+        for index in range(start, min(start + 1000, args.documents)):
+            group = groups[index % len(groups)]
+            batch.append({
+                "id": str(uuid.uuid4()),
+                "filename": f"prosedur_{index:06d}.docx",
+                "file_type": ".docx",
+                "file_size": 50 * 1024,
+                "chunk_count": 12,
+                "upload_date": datetime.utcnow(),
+                "group_id": group["id"],
+                "group_name": group["name"]
+            })
+        await server.db.documents.insert_many(batch)
+    await server.reconcile_document_stats()
+
+    await server.get_groups(current_user={"id": "benchmark"})
+    rows = [
+        ["count_documents per group", f"{await timed(legacy_group_counts, args.repeat):.1f}", 1 + args.groups],
+        ["$group joined in memory", f"{await timed(aggregated_group_counts, args.repeat):.1f}", 2],
+        ["statistics counters", f"{await timed(uncached_group_list, args.repeat):.1f}", 2],
+        ["counters, cached", f"{await timed(lambda: server.get_groups(current_user={'id': 'benchmark'}), args.repeat):.1f}", 0],
+    ]
+
+    if not args.keep:
+        for collection in ("groups", "documents", "stats"):
+            await server.db[collection].drop()
+
+    print(f"{args.groups} groups, {args.documents} documents, median of {args.repeat} runs\n")
+    print_table(["group listing", "ms", "queries"], rows)
+    return 0
+
+
+def bench_groups(args):
+    """Compare per-group counting, one aggregation and the statistics counters for the group listing"""
+    return asyncio.run(run_groups_benchmark(args))
+
+
+def bench_listing(args):
+    """Compare full-document and projected/aggregated listing and status queries on a scratch database"""
+    return asyncio.run(run_listing_benchmark(args))
+
+
+def bench_storage(args):
+    """BSON size of extracted text and chunk text: plain text with chunk strings against compressed text with offsets"""
+    server.load_models()
+    if server.sentence_model is None:
+        print("Embedding model could not be loaded", file=sys.stderr)
+        return 1
+
+    rows = []
+    totals = [0, 0]
+    for path in iter_document_paths(args.paths):
+        try:
+            prepared = server.build_hierarchical_chunks(
+                list(server.iter_document_blocks(str(path), server.resolve_file_extension(path.name)))
+            )
+        except Exception as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+            continue
+
+        # Embeddings are left out of both layouts; they are the same size either way
+        plain_chunks = server.build_chunk_records("benchmark", {**prepared, 'text': None})
+        offset_chunks = server.build_chunk_records("benchmark", prepared)
+        plain = len(bson.encode({"text": prepared['text'], "sections": prepared['sections']}))
+        plain += sum(len(bson.encode(record)) for record in plain_chunks)
+        compressed = len(bson.encode({
+            "text_compressed": server.compress_text(prepared['text']),
+            "text_length": len(prepared['text']),
+            "sections": prepared['sections']
+        }))
+        compressed += sum(len(bson.encode(record)) for record in offset_chunks)
+
+        totals[0] += plain
+        totals[1] += compressed
+        rows.append([
+            path.name,
+            len(prepared['chunks']),
+            f"{len(prepared['text'].encode('utf-8')) / 1024:.1f}",
+            f"{plain / 1024:.1f}",
+            f"{compressed / 1024:.1f}",
+            f"{plain / max(compressed, 1):.1f}x",
+        ])
+
+    if not rows:
+        print("No supported documents found", file=sys.stderr)
+        return 1
+
+    rows.append(["total", "", "", f"{totals[0] / 1024:.1f}", f"{totals[1] / 1024:.1f}", f"{totals[0] / max(totals[1], 1):.1f}x"])
+    print("Document text, sections and chunk records as stored in Mongo (BSON bytes)\n")
+    print_table(["document", "chunks", "text KB", "plain KB", "compressed KB", "ratio"], rows)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KPA backend benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    chunking = subparsers.add_parser("chunking", help="Compare character and token chunkers")
+    chunking.add_argument("paths", nargs="+", help="Documents or directories of documents")
+    chunking.add_argument("--max-tokens", type=int, default=None)
+    chunking.add_argument("--overlap-tokens", type=int, default=server.CHUNK_OVERLAP_TOKENS)
+    chunking.add_argument("--batch-size", type=int, default=32)
+    chunking.set_defaults(func=bench_chunking)
+
+    ingestion = subparsers.add_parser("ingestion", help="Compare whole-document and streaming ingestion")
+    ingestion.add_argument("paths", nargs="+", help="Documents or directories of documents")
+    ingestion.add_argument("--batch-size", type=int, default=server.EMBED_BATCH_SIZE)
+    ingestion.set_defaults(func=bench_ingestion)
+
+    listing = subparsers.add_parser("listing", help="Compare full-document and projected listing/status queries")
+    listing.add_argument("--documents", type=int, default=10000)
+    listing.add_argument("--text-kb", type=int, default=20)
+    listing.add_argument("--content-kb", type=int, default=100)
+    listing.add_argument("--inline-content", action="store_true", help="Store base64 file content in the records")
+    listing.add_argument("--page-size", type=int, default=server.DOCUMENT_PAGE_MAX, help="Page size of the keyset listing")
+    listing.add_argument("--repeat", type=int, default=5)
+    listing.add_argument("--db-name", default="kpa_benchmark", help="Scratch database, dropped afterwards")
+    listing.add_argument("--keep", action="store_true", help="Keep the seeded documents")
+    listing.set_defaults(func=bench_listing)
+
+    storage = subparsers.add_parser("storage", help="Compare plain and compressed text/chunk storage")
+    storage.add_argument("paths", nargs="+", help="Documents or directories of documents")
+    storage.set_defaults(func=bench_storage)
+
+    groups = subparsers.add_parser("groups", help="Compare group listing strategies")
+    groups.add_argument("--groups", type=int, default=1000)
+    groups.add_argument("--documents", type=int, default=50000)
+    groups.add_argument("--repeat", type=int, default=5)
+    groups.add_argument("--db-name", default="kpa_benchmark", help="Scratch database, dropped afterwards")
+    groups.add_argument("--keep", action="store_true", help="Keep the seeded groups and documents")
+    groups.set_defaults(func=bench_groups)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
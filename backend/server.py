@@ -1,5 +1,5 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Depends
-from fastapi.responses import JSONResponse, Response
+from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Depends, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse, FileResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
@@ -7,15 +7,26 @@ from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import timedelta
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure
 import os
+import sys
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable
 import uuid
 from datetime import datetime
 import asyncio
 import json
+import re
+import math
+import hashlib
+import zlib
+from collections import OrderedDict, deque
+import threading
+import time
+from contextlib import asynccontextmanager
 import aiofiles
 from docx import Document
 import docx2txt
@@ -26,8 +37,13 @@ import faiss
 import pickle
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 import tempfile
+import shutil
+import zipfile
+from multipart.multipart import MultipartParser, parse_options_header
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import io
 import mimetypes
+from urllib.parse import quote
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.utils import ImageReader
@@ -68,6 +84,28 @@ app = FastAPI(
     version="2.0"
 )
 
+class UploadSizeLimitMiddleware:
+    """
+    Reject single-file uploads by Content-Length before the multipart body is read.
+    Plain ASGI so streaming endpoints keep exclusive use of receive().
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == "/api/upload-document":
+            content_length = dict(scope["headers"]).get(b"content-length", b"")
+            # Allow some room for multipart boundaries and part headers
+            if content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + 64 * 1024:
+                response = JSONResponse(status_code=400, content={"detail": upload_size_message()})
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+# Added before CORS so CORSMiddleware wraps it and its early 400 still carries CORS headers
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -80,8 +118,89 @@ app.add_middleware(
 # API router with prefix
 api_router = APIRouter(prefix="/api")
 
+# Embedding model and chunking configuration
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+CHUNK_MAX_TOKENS = int(os.environ.get('CHUNK_MAX_TOKENS', '254'))  # MiniLM window is 256 incl. [CLS]/[SEP]
+CHUNK_OVERLAP_TOKENS = int(os.environ.get('CHUNK_OVERLAP_TOKENS', '32'))
+CHUNKER_SIGNATURE = f"sections:{EMBEDDING_MODEL_NAME}:{CHUNK_MAX_TOKENS}:{CHUNK_OVERLAP_TOKENS}"
+SECTION_CONTEXT_MAX_CHARS = int(os.environ.get('SECTION_CONTEXT_MAX_CHARS', '4000'))  # Max parent section size used as answer context
+EMBED_BATCH_SIZE = int(os.environ.get('EMBED_BATCH_SIZE', '64'))  # Chunks encoded and indexed per ingestion batch
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', '0.9'))  # Estimated Jaccard similarity
+NEAR_DUPLICATE_MIN_WORDS = int(os.environ.get('NEAR_DUPLICATE_MIN_WORDS', '12'))
+DOCUMENT_PAGE_SIZE = int(os.environ.get('DOCUMENT_PAGE_SIZE', '50'))
+DOCUMENT_PAGE_MAX = int(os.environ.get('DOCUMENT_PAGE_MAX', '200'))
+DOCUMENT_STATS_CACHE_SECONDS = float(os.environ.get('DOCUMENT_STATS_CACHE_SECONDS', '30'))
+GROUP_LIST_CACHE_SECONDS = float(os.environ.get('GROUP_LIST_CACHE_SECONDS', '10'))
+STATS_RECONCILE_SECONDS = int(os.environ.get('STATS_RECONCILE_MINUTES', '60')) * 60
+DOCUMENT_TEXT_CACHE_BYTES = int(os.environ.get('DOCUMENT_TEXT_CACHE_MB', '64')) * 1024 * 1024  # Decompressed texts kept in memory, counted in characters
+CHUNK_STORE_EMBEDDINGS = os.environ.get('CHUNK_STORE_EMBEDDINGS', 'true').lower() == 'true'  # Keep vectors in db.chunks for rebuilds
+INDEX_REBUILD_TEXT_PAGE = int(os.environ.get('INDEX_REBUILD_TEXT_PAGE', '100'))  # Documents whose texts a rebuild reads per query
+
+# Content-addressed ingestion cache configuration
+INGEST_CACHE_DIR = Path(os.environ.get('INGEST_CACHE_DIR', ROOT_DIR / 'ingest_cache'))
+INGEST_CACHE_MAX_BYTES = int(os.environ.get('INGEST_CACHE_MAX_MB', '512')) * 1024 * 1024
+
+# Upload spooling configuration
+MAX_UPLOAD_MB = int(os.environ.get('MAX_UPLOAD_MB', '10'))
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+UPLOAD_READ_CHUNK_BYTES = int(os.environ.get('UPLOAD_READ_CHUNK_KB', '1024')) * 1024
+UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR') or tempfile.gettempdir()
+MAX_BULK_ARCHIVE_BYTES = int(os.environ.get('MAX_BULK_ARCHIVE_MB', '512')) * 1024 * 1024
+BULK_UPLOAD_MAX_FILES = int(os.environ.get('BULK_UPLOAD_MAX_FILES', '500'))
+BULK_UPLOAD_CONCURRENCY = int(os.environ.get('BULK_UPLOAD_CONCURRENCY', '5'))
+# Form field values and part header lines are held in memory, unlike file parts
+MAX_MULTIPART_FIELD_BYTES = int(os.environ.get('MAX_MULTIPART_FIELD_KB', '64')) * 1024
+
+# Ingestion job queue configuration
+INGEST_JOB_DIR = Path(os.environ.get('INGEST_JOB_DIR', ROOT_DIR / 'ingest_jobs'))  # Must survive restarts
+INGEST_JOB_WORKERS = int(os.environ.get('INGEST_JOB_WORKERS', '2'))
+INGEST_JOB_MAX_ATTEMPTS = int(os.environ.get('INGEST_JOB_MAX_ATTEMPTS', '3'))
+INGEST_JOB_RETRY_SECONDS = float(os.environ.get('INGEST_JOB_RETRY_SECONDS', '10'))  # Doubled per failed attempt
+INGEST_JOB_LEASE_SECONDS = int(os.environ.get('INGEST_JOB_LEASE_SECONDS', '300'))
+INGEST_JOB_POLL_SECONDS = float(os.environ.get('INGEST_JOB_POLL_SECONDS', '5'))
+INGEST_COALESCE_WINDOW_SECONDS = float(os.environ.get('INGEST_COALESCE_WINDOW_SECONDS', '2'))  # Wait for more jobs to share one index update
+INGEST_COALESCE_MAX_JOBS = int(os.environ.get('INGEST_COALESCE_MAX_JOBS', '50'))
+INGEST_COALESCE_MAX_BYTES = int(os.environ.get('INGEST_COALESCE_MAX_MB', '32')) * 1024 * 1024  # Bounds the chunk text a batch holds in memory
+INGEST_QUEUE_MAX_JOBS = int(os.environ.get('INGEST_QUEUE_MAX_JOBS', '200'))  # Queued + running jobs before uploads get 429
+INGEST_NICE = int(os.environ.get('INGEST_NICE', '10'))  # CPU niceness of ingestion threads and extraction processes
+INGEST_YIELD_MAX_SECONDS = float(os.environ.get('INGEST_YIELD_MAX_SECONDS', '5'))  # Longest pause for interactive requests
+
+# Original file blob store configuration
+BLOB_STORE_DIR = Path(os.environ.get('BLOB_STORE_DIR', ROOT_DIR / 'document_blobs'))  # Files named by SHA-256, shared by identical uploads
+
+# Resumable upload configuration
+RESUMABLE_UPLOAD_DIR = Path(os.environ.get('RESUMABLE_UPLOAD_DIR', ROOT_DIR / 'resumable_uploads'))
+RESUMABLE_UPLOAD_TTL_SECONDS = int(os.environ.get('RESUMABLE_UPLOAD_TTL_HOURS', '24')) * 3600  # Renewed by every received range
+RESUMABLE_UPLOAD_CHUNK_BYTES = int(os.environ.get('RESUMABLE_UPLOAD_CHUNK_KB', '1024')) * 1024  # Suggested range size
+RESUMABLE_UPLOAD_CLEANUP_SECONDS = int(os.environ.get('RESUMABLE_UPLOAD_CLEANUP_MINUTES', '30')) * 60
+
+# Retention configuration (0 keeps records forever); records are rolled up into daily aggregates before they expire
+ACTIVITY_RETENTION_DAYS = int(os.environ.get('ACTIVITY_RETENTION_DAYS', '90'))
+CHAT_SESSION_RETENTION_DAYS = int(os.environ.get('CHAT_SESSION_RETENTION_DAYS', '180'))
+ACTIVITY_TIMESERIES = os.environ.get('ACTIVITY_TIMESERIES', 'false').lower() == 'true'  # MongoDB 5.0+, only for a new collection
+ROLLUP_INTERVAL_SECONDS = int(os.environ.get('ROLLUP_INTERVAL_MINUTES', '60')) * 60
+MIN_RETENTION_DAYS = 2  # A day is rolled up after it ends, so records must outlive it by at least one rollup run
+
+# Activity log writer configuration
+ACTIVITY_QUEUE_MAX = int(os.environ.get('ACTIVITY_QUEUE_MAX', '10000'))
+ACTIVITY_BATCH_SIZE = int(os.environ.get('ACTIVITY_BATCH_SIZE', '200'))
+ACTIVITY_FLUSH_SECONDS = float(os.environ.get('ACTIVITY_FLUSH_SECONDS', '1'))
+ACTIVITY_OVERFLOW = os.environ.get('ACTIVITY_OVERFLOW', 'drop_oldest')  # drop_oldest or drop_newest
+
+# Answer cache configuration (0 entries disables the cache)
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get('ANSWER_CACHE_MAX_ENTRIES', '1000'))
+ANSWER_CACHE_TTL_SECONDS = int(os.environ.get('ANSWER_CACHE_TTL_MINUTES', '60')) * 60
+ANSWER_CACHE_SIMILARITY = float(os.environ.get('ANSWER_CACHE_SIMILARITY', '0.92'))  # Cosine similarity of questions
+
+# LLM configuration; "stub" answers offline from the retrieved context with an artificial per-token delay
+LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'gemini')
+LLM_STUB_TOKEN_DELAY_MS = int(os.environ.get('LLM_STUB_TOKEN_DELAY_MS', '50'))
+
 # Global variables for AI models
 sentence_model = None
+# Chunking can run on the tokenizer alone (backfill extraction workers do not load the embedding model)
+chunk_tokenizer = None
+chunk_max_seq_length = None
 faiss_index = None
 documents = []
 document_chunks = []
@@ -150,6 +269,7 @@ class ChatResponse(BaseModel):
     answer: str
     sources: List[str] = []
     session_id: str
+    cached: bool = False
 
 class ChatSession(BaseModel):
     session_id: str
@@ -164,8 +284,11 @@ class SystemStatus(BaseModel):
     total_groups: int = 0
     embedding_model_loaded: bool
     faiss_index_ready: bool
-    supported_formats: List[str] = ['.doc', '.docx']
+    supported_formats: List[str] = Field(default_factory=lambda: get_supported_formats())
     processing_queue: int = 0
+    file_type_counts: Dict[str, int] = Field(default_factory=dict)
+    activity_log: Dict[str, int] = Field(default_factory=dict)
+    answer_cache: Dict[str, Any] = Field(default_factory=dict)
 
 class DocumentInfo(BaseModel):
     id: str
@@ -180,6 +303,16 @@ class DocumentInfo(BaseModel):
 class DocumentListResponse(BaseModel):
     documents: List[DocumentInfo]
     statistics: Dict[str, Any]
+    next_cursor: Optional[str] = None
+
+class DocumentChunkInfo(BaseModel):
+    document_id: str
+    chunk_index: int
+    text: str
+    start: Optional[int] = None
+    end: Optional[int] = None
+    section_index: Optional[int] = None
+    section_path: Optional[str] = None
 
 class DocumentDeleteResponse(BaseModel):
     message: str
@@ -352,6 +485,11 @@ class UserActivityLog(BaseModel):
     user_agent: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
+class DailyAnalyticsResponse(BaseModel):
+    days: int
+    activity: List[Dict[str, Any]]  # date, user_id, action, count
+    chat: List[Dict[str, Any]]  # date, questions, sessions, answered_with_sources, sources
+
 class UserBulkUpdateRequest(BaseModel):
     user_ids: List[str]
     updates: UserUpdate
@@ -368,9 +506,40 @@ class BulkUploadRequest(BaseModel):
 
 class BulkUploadStatus(BaseModel):
     filename: str
-    status: str  # "success", "error", "processing"
+    status: str  # "queued", "success", "error", "processing"
     message: str = ""
     document_id: Optional[str] = None
+    job_id: Optional[str] = None
+
+class IngestionJobInfo(BaseModel):
+    id: str
+    status: str  # "queued", "running", "completed", "dead_letter"
+    stage: str  # "extract", "chunk", "embed", "index", "done"
+    filename: str
+    file_size: int
+    document_id: str
+    group_id: Optional[str] = None
+    group_name: Optional[str] = None
+    chunk_count: int = 0
+    attempts: int = 0
+    max_attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+class UploadSessionCreateRequest(BaseModel):
+    filename: str
+    size: int
+    group_id: Optional[str] = None
+
+class UploadSessionInfo(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    offset: int
+    expires_at: datetime
+    chunk_size: int
 
 class BulkUploadResponse(BaseModel):
     total_files: int
@@ -379,147 +548,405 @@ class BulkUploadResponse(BaseModel):
     results: List[BulkUploadStatus]
     processing_time: float
 
+class ActivityLogWriter:
+    """
+    Bounded in-process queue of activity records drained by a single task with insert_many.
+    A batch is written once it reaches ACTIVITY_BATCH_SIZE or ACTIVITY_FLUSH_SECONDS after its first record.
+    When the queue is full the oldest (or, with drop_newest, the incoming) record is dropped.
+    """
+
+    def __init__(self, max_queued: int, batch_size: int, flush_seconds: float, overflow: str):
+        self.max_queued = max(max_queued, 1)
+        self.batch_size = max(batch_size, 1)
+        self.flush_seconds = flush_seconds
+        self.drop_newest = overflow == "drop_newest"
+        self.queue: deque = deque()
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.stopping = False
+        self.counters = {"queued": 0, "written": 0, "dropped": 0, "failed": 0}
+
+    def enqueue(self, record: dict):
+        if len(self.queue) >= self.max_queued:
+            self.counters["dropped"] += 1
+            if self.drop_newest:
+                return
+            self.queue.popleft()
+        self.queue.append(record)
+        self.counters["queued"] += 1
+        # Wake the writer to start a batch window, or to write a full batch right away
+        if len(self.queue) == 1 or len(self.queue) >= self.batch_size:
+            self.wakeup.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "pending": len(self.queue)}
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Let the writer drain the queue and exit; it is never cancelled in the middle of an insert"""
+        if self.task is not None:
+            self.stopping = True
+            self.wakeup.set()
+            await self.task
+            self.task = None
+        # Records queued while the writer never ran
+        while self.queue:
+            await self._write_batch()
+
+    async def _run(self):
+        while self.queue or not self.stopping:
+            if not self.queue:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            # Give the batch time to fill unless it is already full or the writer is stopping
+            if len(self.queue) < self.batch_size and not self.stopping:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            await self._write_batch()
+
+    async def _write_batch(self):
+        batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+        if not batch:
+            return
+        try:
+            await db.user_activities.insert_many(batch, ordered=False)
+            self.counters["written"] += len(batch)
+        except Exception as e:
+            self.counters["failed"] += len(batch)
+            logger.error(f"Failed to write {len(batch)} activity records: {str(e)}")
+
+activity_log_writer = ActivityLogWriter(ACTIVITY_QUEUE_MAX, ACTIVITY_BATCH_SIZE, ACTIVITY_FLUSH_SECONDS, ACTIVITY_OVERFLOW)
+
 # Helper function to log user activity
-async def log_user_activity(user_id: str, action: str, details: str = "", ip_address: str = None, user_agent: str = None):
-    """Log user activity to database"""
-    try:
-        activity = UserActivityLog(
-            user_id=user_id,
-            action=action,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        await db.user_activities.insert_one(activity.dict())
-    except Exception as e:
-        logger.error(f"Failed to log user activity: {str(e)}")
+def log_user_activity(user_id: str, action: str, details: str = "", ip_address: str = None, user_agent: str = None):
+    """Queue a user activity record for the batch writer"""
+    activity = UserActivityLog(
+        user_id=user_id,
+        action=action,
+        details=details,
+        ip_address=ip_address,
+        user_agent=user_agent
+    )
+    activity_log_writer.enqueue(activity.dict())
 
 # Load AI models
 def load_models():
-    global sentence_model, faiss_index, documents, document_chunks
+    global sentence_model, faiss_index, documents, document_chunks, near_duplicate_index
     
     try:
         # Load sentence transformer model
         logger.info("Loading sentence transformer model...")
-        sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
+        sentence_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
         logger.info("Sentence transformer model loaded successfully")
         
-        # Try to load existing FAISS index and documents
+        # Try to load existing FAISS index and chunks
         try:
             with open('faiss_index.pkl', 'rb') as f:
                 faiss_index = pickle.load(f)
-            with open('documents.pkl', 'rb') as f:
-                documents = pickle.load(f)
             with open('document_chunks.pkl', 'rb') as f:
                 document_chunks = pickle.load(f)
-            logger.info(f"Loaded existing index with {len(documents)} documents and {len(document_chunks)} chunks")
-        except FileNotFoundError:
-            logger.info("No existing index found, starting fresh")
-            documents = []
+            if faiss_index is not None and faiss_index.ntotal != len(document_chunks):
+                raise ValueError(f"index has {faiss_index.ntotal} vectors but {len(document_chunks)} chunks")
+            logger.info(f"Loaded existing index with {len(document_chunks)} chunks")
+        except (FileNotFoundError, ValueError) as index_error:
+            logger.info(f"No usable existing index ({str(index_error)}), starting fresh")
+            faiss_index = None
             document_chunks = []
+        
+        # Near-duplicate signatures must describe the same index positions as the loaded chunks
+        try:
+            with open('near_duplicates.pkl', 'rb') as f:
+                near_duplicate_index = pickle.load(f)
+            if any(position >= len(document_chunks) for position in near_duplicate_index.signatures):
+                raise ValueError("near-duplicate signatures do not match the index")
+        except (FileNotFoundError, ValueError):
+            near_duplicate_index = create_near_duplicate_index()
             
     except Exception as e:
         logger.error(f"Error loading models: {str(e)}")
 
-# Extract text from different document formats
-def extract_text_from_document(file_path: str, file_extension: str) -> str:
+# Document extractor registry
+# Each supported extension maps to an extraction function and the MIME types it accepts.
+DOCUMENT_EXTRACTORS: Dict[str, dict] = {}
+
+def register_extractor(extension: str, mime_types: List[str], blocks: Optional[Callable[[str], Any]] = None):
     """
-    3-tier document processing approach:
-    1. Primary: textract (handles most formats)
-    2. Fallback: antiword (for .doc files) or python-docx (for .docx)
-    3. Last resort: binary content analysis (as fallback)
+    Register a text extraction function for a file extension.
+    Formats that can stream paragraph blocks also register a blocks generator for the ingestion pipeline.
     """
-    text = ""
-    
+    def decorator(func):
+        DOCUMENT_EXTRACTORS[extension] = {
+            "extract": func,
+            "blocks": blocks,
+            "mime_types": mime_types
+        }
+        return func
+    return decorator
+
+def get_supported_formats() -> List[str]:
+    return sorted(DOCUMENT_EXTRACTORS)
+
+def resolve_file_extension(filename: str, content_type: Optional[str] = None) -> Optional[str]:
+    """Return the registered extension for a file, falling back to its MIME type"""
+    file_extension = Path(filename).suffix.lower()
+    if file_extension in DOCUMENT_EXTRACTORS:
+        return file_extension
+
+    if content_type:
+        for extension, extractor in DOCUMENT_EXTRACTORS.items():
+            if content_type in extractor["mime_types"]:
+                return extension
+
+    return None
+
+def unsupported_format_message() -> str:
+    return f"Sadece {', '.join(get_supported_formats())} formatındaki dosyalar desteklenir"
+
+# Section headings: Word heading styles ("Heading 2", "Başlık 2") or numbered titles ("4.2.1 Onay Süreci")
+HEADING_STYLE_RE = re.compile(r'^(?:heading|başlık)\s*(\d+)$', re.IGNORECASE)
+SECTION_NUMBER_RE = re.compile(r'^(\d{1,3}(?:\.\d{1,3}){0,5})\.?\s+(\S.*)$')
+
+def detect_heading(text: str, style_name: Optional[str] = None) -> Optional[tuple]:
+    """Return (level, section_number) if a paragraph is a section heading"""
+    stripped = text.strip()
+    if not stripped:
+        return None
+
+    numbered = SECTION_NUMBER_RE.match(stripped)
+    number = numbered.group(1) if numbered else None
+
+    if style_name:
+        style_match = HEADING_STYLE_RE.match(style_name.strip())
+        if style_match:
+            return int(style_match.group(1)), number
+
+    # Numbered short lines without sentence punctuation are headings; numbered list items are not
+    if numbered and len(stripped) <= 120 and numbered.group(2)[0].isupper() and not stripped.endswith(('.', ',', ';', ':')):
+        return number.count('.') + 1, number
+
+    return None
+
+def text_to_blocks(text: str) -> List[dict]:
+    """Split plain extracted text into line blocks, detecting numbered headings"""
+    blocks = []
+    for line in text.split('\n'):
+        heading = detect_heading(line)
+        blocks.append({
+            'text': line,
+            'level': heading[0] if heading else None,
+            'number': heading[1] if heading else None
+        })
+    return blocks
+
+def iter_docx_blocks(file_path: str):
+    """DOCX paragraphs with heading levels taken from Word styles and section numbering"""
+    doc = Document(file_path)
+    for paragraph in doc.paragraphs:
+        style_name = paragraph.style.name if paragraph.style is not None else None
+        heading = detect_heading(paragraph.text, style_name)
+        yield {
+            'text': paragraph.text,
+            'level': heading[0] if heading else None,
+            'number': heading[1] if heading else None
+        }
+
+@register_extractor(
+    '.docx',
+    ['application/vnd.openxmlformats-officedocument.wordprocessingml.document'],
+    blocks=iter_docx_blocks
+)
+def extract_docx_text(file_path: str) -> str:
+    """DOCX: python-docx first, then textract"""
     try:
-        if file_extension.lower() == '.docx':
-            # For DOCX: try python-docx first, then textract
-            try:
-                doc = Document(file_path)
-                text = '\n'.join([paragraph.text for paragraph in doc.paragraphs])
-                if text.strip():  # Check if we got meaningful content
-                    logger.info(f"Successfully extracted text using python-docx: {len(text)} characters")
-                    return text
-            except Exception as docx_error:
-                logger.warning(f"python-docx failed: {str(docx_error)}, trying textract...")
-            
-            # Fallback to textract for DOCX
-            try:
-                text = textract.process(file_path).decode('utf-8', errors='ignore')
-                if text.strip():
-                    logger.info(f"Successfully extracted text using textract: {len(text)} characters")
-                    return text
-            except Exception as textract_error:
-                logger.warning(f"textract failed for DOCX: {str(textract_error)}")
-        
-        elif file_extension.lower() == '.doc':
-            # For DOC: try textract first, then antiword
-            try:
-                text = textract.process(file_path).decode('utf-8', errors='ignore')
-                if text.strip():
-                    logger.info(f"Successfully extracted text using textract: {len(text)} characters")
-                    return text
-            except Exception as textract_error:
-                logger.warning(f"textract failed for DOC: {str(textract_error)}, trying antiword...")
-            
-            # Fallback to antiword for DOC
-            try:
-                import subprocess
-                result = subprocess.run(['antiword', file_path], capture_output=True, text=True)
-                if result.returncode == 0 and result.stdout.strip():
-                    text = result.stdout
-                    logger.info(f"Successfully extracted text using antiword: {len(text)} characters")
-                    return text
-            except Exception as antiword_error:
-                logger.warning(f"antiword failed: {str(antiword_error)}")
-    
-    except Exception as e:
-        logger.error(f"Primary extraction methods failed: {str(e)}")
-    
+        doc = Document(file_path)
+        text = '\n'.join([paragraph.text for paragraph in doc.paragraphs])
+        if text.strip():  # Check if we got meaningful content
+            logger.info(f"Successfully extracted text using python-docx: {len(text)} characters")
+            return text
+    except Exception as docx_error:
+        logger.warning(f"python-docx failed: {str(docx_error)}, trying textract...")
+
+    try:
+        text = textract.process(file_path).decode('utf-8', errors='ignore')
+        if text.strip():
+            logger.info(f"Successfully extracted text using textract: {len(text)} characters")
+            return text
+    except Exception as textract_error:
+        logger.warning(f"textract failed for DOCX: {str(textract_error)}")
+
+    return ""
+
+@register_extractor('.doc', ['application/msword'])
+def extract_doc_text(file_path: str) -> str:
+    """DOC: textract first, then antiword, then binary content analysis as last resort"""
+    try:
+        text = textract.process(file_path).decode('utf-8', errors='ignore')
+        if text.strip():
+            logger.info(f"Successfully extracted text using textract: {len(text)} characters")
+            return text
+    except Exception as textract_error:
+        logger.warning(f"textract failed for DOC: {str(textract_error)}, trying antiword...")
+
+    try:
+        import subprocess
+        result = subprocess.run(['antiword', file_path], capture_output=True, text=True)
+        if result.returncode == 0 and result.stdout.strip():
+            text = result.stdout
+            logger.info(f"Successfully extracted text using antiword: {len(text)} characters")
+            return text
+    except Exception as antiword_error:
+        logger.warning(f"antiword failed: {str(antiword_error)}")
+
     # Last resort: binary content analysis
     try:
         with open(file_path, 'rb') as f:
             binary_content = f.read()
-        
-        # Try to extract readable text from binary content
-        try:
-            # For DOC files, try to find text sections
-            if file_extension.lower() == '.doc':
-                # Simple binary text extraction for DOC files
-                text_parts = []
-                current_text = ""
-                
-                for byte in binary_content:
-                    if 32 <= byte <= 126:  # Printable ASCII characters
-                        current_text += chr(byte)
-                    else:
-                        if len(current_text) > 10:  # Only keep strings longer than 10 chars
-                            text_parts.append(current_text)
-                        current_text = ""
-                
-                # Add any remaining text
-                if len(current_text) > 10:
+
+        # Simple binary text extraction for DOC files
+        text_parts = []
+        current_text = ""
+
+        for byte in binary_content:
+            if 32 <= byte <= 126:  # Printable ASCII characters
+                current_text += chr(byte)
+            else:
+                if len(current_text) > 10:  # Only keep strings longer than 10 chars
                     text_parts.append(current_text)
-                
-                text = ' '.join(text_parts)
-                
-                if text.strip():
-                    logger.info(f"Successfully extracted text using binary analysis: {len(text)} characters")
-                    return text
-        
-        except Exception as binary_error:
-            logger.error(f"Binary analysis failed: {str(binary_error)}")
-    
+                current_text = ""
+
+        # Add any remaining text
+        if len(current_text) > 10:
+            text_parts.append(current_text)
+
+        text = ' '.join(text_parts)
+
+        if text.strip():
+            logger.info(f"Successfully extracted text using binary analysis: {len(text)} characters")
+            return text
+
+    except Exception as binary_error:
+        logger.error(f"Binary analysis failed: {str(binary_error)}")
+
+    return ""
+
+# PDF pages are extracted in parallel across a shared process pool
+EXTRACTION_WORKERS = int(os.environ.get('EXTRACTION_WORKERS', str(os.cpu_count() or 2)))
+PDF_PAGES_PER_TASK = int(os.environ.get('PDF_PAGES_PER_TASK', '8'))
+extraction_pool = None
+
+def lower_process_priority():
+    """Extraction pool initializer: extraction processes yield CPU to the API process"""
+    try:
+        os.nice(INGEST_NICE)
+    except (AttributeError, OSError):
+        pass
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    global extraction_pool
+    if extraction_pool is None:
+        extraction_pool = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS, initializer=lower_process_priority)
+    return extraction_pool
+
+def extract_pdf_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract text of pages [start, stop); runs inside an extraction pool worker"""
+    reader = PdfReader(file_path)
+    pages = []
+    for page_number in range(start, stop):
+        try:
+            pages.append(reader.pages[page_number].extract_text() or "")
+        except Exception as page_error:
+            logger.warning(f"PDF page {page_number + 1} could not be read: {str(page_error)}")
+            pages.append("")
+    return pages
+
+def iter_pdf_pages(file_path: str):
+    """Yield PDF page texts in page order while later pages are still being extracted"""
+    page_count = len(PdfReader(file_path).pages)
+
+    if page_count <= PDF_PAGES_PER_TASK:
+        yield from extract_pdf_page_range(file_path, 0, page_count)
+        return
+
+    pool = get_extraction_pool()
+    futures = [
+        pool.submit(extract_pdf_page_range, file_path, start, min(start + PDF_PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PDF_PAGES_PER_TASK)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+def iter_pdf_blocks(file_path: str):
+    """PDF lines page by page, as soon as each page range has been extracted"""
+    for page_text in iter_pdf_pages(file_path):
+        if page_text.strip():
+            yield from text_to_blocks(page_text)
+
+@register_extractor('.pdf', ['application/pdf'], blocks=iter_pdf_blocks)
+def extract_pdf_text(file_path: str) -> str:
+    """PDF: page-parallel extraction with pypdf"""
+    try:
+        text = '\n'.join(page_text for page_text in iter_pdf_pages(file_path) if page_text.strip())
+        if text.strip():
+            logger.info(f"Successfully extracted text using pypdf: {len(text)} characters")
+        return text
+    except Exception as pdf_error:
+        logger.warning(f"pypdf failed: {str(pdf_error)}")
+        return ""
+
+# Extract text from different document formats
+def extract_text_from_document(file_path: str, file_extension: str) -> str:
+    """Dispatch to the extractor registered for the file extension"""
+    extractor = DOCUMENT_EXTRACTORS.get(file_extension.lower())
+    if extractor is None:
+        raise Exception(unsupported_format_message())
+
+    try:
+        text = extractor["extract"](file_path)
     except Exception as e:
         logger.error(f"All extraction methods failed: {str(e)}")
-    
+        text = ""
+
     if not text.strip():
         raise Exception("Doküman içeriği okunamadı. Dosya bozuk veya desteklenmeyen formatta olabilir.")
-    
+
     return text
 
+def iter_document_blocks(file_path: str, file_extension: str):
+    """
+    Stream paragraph blocks with heading levels from a document.
+    Formats without a blocks generator (or whose generator yields no text) fall back to line-split text.
+    """
+    extractor = DOCUMENT_EXTRACTORS.get(file_extension.lower())
+    if extractor and extractor.get("blocks"):
+        has_text = False
+        try:
+            for block in extractor["blocks"](file_path):
+                has_text = has_text or bool(block['text'].strip())
+                yield block
+        except Exception as e:
+            if has_text:
+                raise
+            logger.warning(f"Structured extraction failed, falling back to plain text: {str(e)}")
+        if has_text:
+            return
+
+    yield from text_to_blocks(extract_text_from_document(file_path, file_extension))
+
 # Generate answer using Gemini AI
 async def generate_answer_with_gemini(question: str, context: str) -> str:
+    if LLM_PROVIDER == 'stub':
+        return "".join([text async for text in stub_answer_stream(question, context)])
     try:
         # Configure the chat client
         llm_client = LlmChat(model_name="gemini-2.0-flash-exp")
@@ -552,8 +979,29 @@ Lütfen sadece doküman içeriğine dayalı bir cevap ver. Eğer cevap doküman
     except Exception as e:
         logger.error(f"Gemini AI error: {str(e)}")
         if "overloaded" in str(e).lower() or "503" in str(e):
-            return "Üzgünüm, şu anda sorunuzu cevaplayamıyorum. Lütfen daha sonra tekrar deneyin."
-        return f"AI yanıt hatası: {str(e)}"
+            return GEMINI_UNAVAILABLE_ANSWER
+        return f"{GEMINI_ERROR_PREFIX}: {str(e)}"
+
+GEMINI_UNAVAILABLE_ANSWER = "Üzgünüm, şu anda sorunuzu cevaplayamıyorum. Lütfen daha sonra tekrar deneyin."
+GEMINI_ERROR_PREFIX = "AI yanıt hatası"
+
+def is_llm_error_answer(answer: str) -> bool:
+    return answer == GEMINI_UNAVAILABLE_ANSWER or answer.startswith(GEMINI_ERROR_PREFIX)
+
+async def stub_answer_stream(question: str, context: str):
+    """Offline stand-in for the LLM (LLM_PROVIDER=stub): echoes the start of the context word by word"""
+    words = re.findall(r'\S+\s*', f"**Test yanıtı:** {context[:400]}")
+    for word in words:
+        await asyncio.sleep(LLM_STUB_TOKEN_DELAY_MS / 1000)
+        yield word
+
+async def stream_answer_with_gemini(question: str, context: str):
+    """Yield the answer as it arrives; the Gemini client returns a complete response, so it arrives in one piece"""
+    if LLM_PROVIDER == 'stub':
+        async for text in stub_answer_stream(question, context):
+            yield text
+        return
+    yield await generate_answer_with_gemini(question, context)
 
 def format_answer_with_sources(answer: str, source_documents: List[dict]) -> str:
     """Format answer with source document information"""
@@ -579,7 +1027,7 @@ def format_answer_with_sources(answer: str, source_documents: List[dict]) -> str
 
 # Create chunks from text
 def create_chunks(text: str, chunk_size: int = 500, chunk_overlap: int = 100) -> List[str]:
-    """Create overlapping chunks from text"""
+    """Create overlapping character-based chunks (legacy chunker, kept for benchmarks)"""
     if len(text) <= chunk_size:
         return [text]
     
@@ -605,216 +1053,1478 @@ def create_chunks(text: str, chunk_size: int = 500, chunk_overlap: int = 100) ->
     
     return chunks
 
-# Update FAISS index with new document
-def update_faiss_index(new_chunks: List[str], document_id: str, filename: str, group_id: Optional[str] = None, group_name: Optional[str] = None):
-    global faiss_index, document_chunks
-    
-    if not sentence_model:
-        logger.error("Sentence model not loaded")
-        return
-    
-    # Create embeddings for new chunks
-    embeddings = sentence_model.encode(new_chunks)
-    
-    # Add to document_chunks with metadata
-    for i, chunk in enumerate(new_chunks):
-        document_chunks.append({
-            'text': chunk,
-            'document_id': document_id,
-            'filename': filename,
-            'chunk_index': i,
-            'group_id': group_id,
-            'group_name': group_name
-        })
-    
-    # Update FAISS index
-    if faiss_index is None:
-        # Create new index
-        dimension = embeddings.shape[1]
-        faiss_index = faiss.IndexFlatL2(dimension)
-    
-    faiss_index.add(embeddings.astype('float32'))
-    
-    # Save updated index and chunks
-    try:
-        with open('faiss_index.pkl', 'wb') as f:
-            pickle.dump(faiss_index, f)
-        with open('document_chunks.pkl', 'wb') as f:
-            pickle.dump(document_chunks, f)
-        logger.info(f"Updated FAISS index with {len(new_chunks)} new chunks")
-    except Exception as e:
-        logger.error(f"Error saving FAISS index: {str(e)}")
+# Tokenizer-aware chunking
+# Abbreviations that end with a period but do not end a sentence (lowercase, without the final period)
+TURKISH_ABBREVIATIONS = {
+    'dr', 'prof', 'doç', 'yrd', 'öğr', 'gör', 'av', 'müh', 'uzm', 'arş', 'sn', 'bay', 'bn',
+    'vb', 'vs', 'bkz', 'örn', 'krş', 'no', 'nr', 'md', 'mad', 'fık', 'bent', 'sy', 'say', 's', 'sf',
+    'böl', 'müd', 'gn', 'gnl', 'genl', 'şti', 'ltd', 'a.ş', 't.c', 'tel', 'faks', 'cad', 'sok', 'mah',
+    'apt', 'blv', 'bulv', 'kat', 'ort', 'yy', 'vd', 'hz', 'alm', 'ing', 'fr', 'lat', 'c', 'bl',
+    'ek', 'rev', 'tar', 'st', 'vek', 'yard', 'başk', 'kurm', 'org', 'tic', 'san', 'koop'
+}
 
-# Search similar chunks
-def search_similar_chunks(query: str, top_k: int = 5) -> List[dict]:
-    if not sentence_model or faiss_index is None or len(document_chunks) == 0:
-        return []
-    
-    try:
-        # Create embedding for query
-        query_embedding = sentence_model.encode([query])
-        
-        # Search in FAISS index
-        distances, indices = faiss_index.search(query_embedding.astype('float32'), min(top_k, len(document_chunks)))
-        
-        results = []
-        for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx < len(document_chunks):
-                chunk_info = document_chunks[idx].copy()
-                chunk_info['similarity_score'] = 1.0 / (1.0 + distance)  # Convert distance to similarity
-                results.append(chunk_info)
-        
-        return results
-    except Exception as e:
-        logger.error(f"Error in similarity search: {str(e)}")
-        return []
+_SENTENCE_BREAK_RE = re.compile(r'[.!?…]+["\'”’)\]]*[ \t]+|\n+')
+_WORD_TOKEN_RE = re.compile(r'\w+|[^\w\s]')
 
-async def update_faiss_index_optimized():
-    """Optimized FAISS update - rebuilds entire index from database"""
-    global faiss_index, document_chunks
-    
-    try:
-        logger.info("Starting optimized FAISS index update...")
-        
-        # Get all documents from database
-        all_documents = []
-        async for doc in db.documents.find():
-            all_documents.append(doc)
-        
-        # Reset index and chunks
-        document_chunks = []
-        faiss_index = None
-        
-        if not all_documents:
-            logger.info("No documents found, clearing index")
-            return
-        
-        # Rebuild chunks from all documents
-        all_embeddings = []
-        
-        for doc in all_documents:
-            chunks = doc.get('chunks', [])
-            document_id = doc.get('id')
-            filename = doc.get('filename', 'Bilinmeyen')
-            group_id = doc.get('group_id')
-            group_name = doc.get('group_name')
-            
-            # Add chunks to document_chunks
-            for i, chunk in enumerate(chunks):
-                document_chunks.append({
-                    'text': chunk,
-                    'document_id': document_id,
-                    'filename': filename,
-                    'chunk_index': i,
-                    'group_id': group_id,
-                    'group_name': group_name
-                })
-            
-            # Create embeddings for chunks
-            if chunks:
-                chunk_embeddings = sentence_model.encode(chunks)
-                if len(chunk_embeddings.shape) == 1:
-                    chunk_embeddings = chunk_embeddings.reshape(1, -1)
-                all_embeddings.append(chunk_embeddings)
-        
-        # Create new FAISS index
-        if all_embeddings:
-            all_embeddings_matrix = np.vstack(all_embeddings)
-            dimension = all_embeddings_matrix.shape[1]
-            faiss_index = faiss.IndexFlatL2(dimension)
-            faiss_index.add(all_embeddings_matrix.astype('float32'))
-            
-            # Save updated index and chunks
-            with open('faiss_index.pkl', 'wb') as f:
-                pickle.dump(faiss_index, f)
-            with open('document_chunks.pkl', 'wb') as f:
-                pickle.dump(document_chunks, f)
-            
-            logger.info(f"FAISS index optimized: {len(document_chunks)} chunks from {len(all_documents)} documents")
-        else:
-            logger.info("No chunks found, index remains empty")
-        
-    except Exception as e:
-        logger.error(f"FAISS update error: {str(e)}")
+def _turkish_lower(word: str) -> str:
+    return word.replace('İ', 'i').replace('I', 'ı').lower()
 
-# Debounced FAISS update to prevent sequential rebuilds
-_faiss_update_pending = False
+def _is_sentence_break(text: str, sentence_start: int, match) -> bool:
+    """Decide whether a period/question mark followed by whitespace really ends a sentence"""
+    if '\n' in match.group():
+        return True
 
-async def debounced_faiss_update():
-    """Debounced FAISS update - prevents multiple sequential updates"""
-    global _faiss_update_pending
-    
-    if _faiss_update_pending:
-        logging.info("FAISS update already pending, skipping duplicate request")
-        return
-    
-    _faiss_update_pending = True
-    
-    try:
-        # Small delay to allow for batching multiple deletes
-        await asyncio.sleep(2)
-        
-        # Call the optimized update function
-        await update_faiss_index_optimized()
-        
-    except Exception as e:
-        logging.error(f"Debounced FAISS update error: {str(e)}")
-    finally:
-        _faiss_update_pending = False
+    next_char = text[match.end():match.end() + 1]
+    if not next_char or not (next_char.isupper() or next_char.isdigit() or next_char in '"\'“‘(•-–'):
+        return False
 
-@api_router.delete("/documents")
-async def delete_all_documents(background_tasks: BackgroundTasks, confirm: bool = False, current_user: dict = Depends(require_admin)):
-    """Tüm dokümanları sil (tehlikeli işlem)"""
-    if not confirm:
-        raise HTTPException(status_code=400, detail="Bu tehlikeli işlem için confirm=true parametresi gerekli")
-    
-    try:
-        # Count existing documents
-        doc_count = await db.documents.count_documents({})
-        
-        if doc_count == 0:
-            return {"message": "Silinecek doküman bulunamadı", "deleted_count": 0}
-        
-        # Delete all documents
-        delete_result = await db.documents.delete_many({})
-        
-        # Background tasks for cleanup
-        background_tasks.add_task(cleanup_all_chat_sessions)
-        background_tasks.add_task(clear_faiss_index)
-        
-        # Log activity
-        asyncio.create_task(log_user_activity(
-            current_user["id"], 
-            "documents_delete_all", 
-            f"Deleted all {delete_result.deleted_count} documents"
-        ))
-        
-        return {
-            "message": f"Tüm dokümanlar başarıyla silindi",
-            "deleted_count": delete_result.deleted_count
-        }
-        
-    except Exception as e:
-        logger.error(f"Error deleting all documents: {str(e)}")
-        raise HTTPException(status_code=500, detail="Dokümanlar silinirken hata oluştu")
+    preceding = re.search(r'(\S+)$', text[sentence_start:match.start()])
+    if not preceding:
+        return True
+    word = preceding.group(1).lstrip('("\'“‘')
 
-async def cleanup_all_chat_sessions():
-    """Clean up all chat sessions"""
-    try:
-        await db.chat_sessions.delete_many({})
-        logger.info("All chat sessions cleaned up")
-    except Exception as e:
-        logger.error(f"Error cleaning up all chat sessions: {str(e)}")
+    if match.group().startswith('.'):
+        # Abbreviations ("Dr.", "vb.", "A.Ş."), initials ("M.") and ordinals / section numbers ("3.", "4.2.")
+        if _turkish_lower(word) in TURKISH_ABBREVIATIONS:
+            return False
+        if len(word) == 1 and word.isalpha():
+            return False
+        if re.fullmatch(r'\d+(\.\d+)*', word):
+            return False
 
-async def clear_faiss_index():
-    """Clear FAISS index completely"""
-    global faiss_index, document_chunks
-    try:
-        faiss_index = None
-        document_chunks = []
-        
+    return True
+
+def _strip_span(text: str, start: int, end: int) -> Optional[tuple]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if end > start else None
+
+def split_sentence_spans(text: str) -> List[tuple]:
+    """Split text into (start, end) sentence spans, treating line breaks as hard boundaries"""
+    spans = []
+    sentence_start = 0
+
+    for match in _SENTENCE_BREAK_RE.finditer(text):
+        if not _is_sentence_break(text, sentence_start, match):
+            continue
+        span = _strip_span(text, sentence_start, match.end())
+        if span:
+            spans.append(span)
+        sentence_start = match.end()
+
+    span = _strip_span(text, sentence_start, len(text))
+    if span:
+        spans.append(span)
+
+    return spans
+
+def get_chunk_tokenizer():
+    """Tokenizer used for chunking: the standalone one when set, else the embedding model's"""
+    if chunk_tokenizer is not None:
+        return chunk_tokenizer
+    return getattr(sentence_model, 'tokenizer', None)
+
+def count_tokens(text: str) -> int:
+    """Number of embedding model tokens in text (word/punctuation estimate until the model is loaded)"""
+    tokenizer = get_chunk_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.tokenize(text))
+    return len(_WORD_TOKEN_RE.findall(text))
+
+def get_chunk_token_budget() -> int:
+    """Tokens available per chunk: the configured size, capped by the model window minus special tokens"""
+    budget = CHUNK_MAX_TOKENS
+    max_seq_length = chunk_max_seq_length or getattr(sentence_model, 'max_seq_length', None)
+    if max_seq_length:
+        budget = min(budget, max_seq_length - 2)
+    return max(budget, 16)
+
+def _split_long_span(text: str, start: int, end: int, max_tokens: int) -> List[tuple]:
+    """Split a single sentence that exceeds the token budget on token boundaries"""
+    tokenizer = get_chunk_tokenizer()
+    segment = text[start:end]
+
+    if tokenizer is not None and getattr(tokenizer, 'is_fast', False):
+        offsets = tokenizer(segment, add_special_tokens=False, return_offsets_mapping=True)['offset_mapping']
+    else:
+        offsets = [(m.start(), m.end()) for m in _WORD_TOKEN_RE.finditer(segment)]
+
+    pieces = []
+    for i in range(0, len(offsets), max_tokens):
+        window = offsets[i:i + max_tokens]
+        piece_end = offsets[i + max_tokens][0] if i + max_tokens < len(offsets) else len(segment)
+        pieces.append((start + window[0][0], start + piece_end, len(window)))
+    return pieces
+
+def sentence_units(text: str, offset: int = 0, max_tokens: Optional[int] = None) -> List[tuple]:
+    """(start, end, token_count) units for every sentence in text, shifted by offset"""
+    max_tokens = max_tokens or get_chunk_token_budget()
+    units = []
+    for start, end in split_sentence_spans(text):
+        token_count = count_tokens(text[start:end])
+        if token_count > max_tokens:
+            units.extend(
+                (offset + piece_start, offset + piece_end, piece_tokens)
+                for piece_start, piece_end, piece_tokens in _split_long_span(text, start, end, max_tokens)
+            )
+        else:
+            units.append((offset + start, offset + end, token_count))
+    return units
+
+class TokenChunkPacker:
+    """
+    Greedily packs sentence units into chunk spans of at most max_tokens.
+    Consecutive chunks share trailing sentences worth up to overlap_tokens.
+    """
+
+    def __init__(self, max_tokens: int, overlap_tokens: int):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = min(overlap_tokens, max_tokens // 2)
+        self.current = []
+        self.current_tokens = 0
+
+    def add(self, unit: tuple) -> Optional[tuple]:
+        """Add a unit; returns the finished (start, end) span if the unit did not fit"""
+        span = None
+        if self.current and self.current_tokens + unit[2] > self.max_tokens:
+            span = (self.current[0][0], self.current[-1][1])
+
+            # Carry trailing sentences into the next chunk as overlap
+            carried = []
+            carried_tokens = 0
+            for previous in reversed(self.current):
+                if carried_tokens + previous[2] > self.overlap_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous[2]
+
+            while carried and carried_tokens + unit[2] > self.max_tokens:
+                carried_tokens -= carried.pop(0)[2]
+            self.current, self.current_tokens = carried, carried_tokens
+
+        self.current.append(unit)
+        self.current_tokens += unit[2]
+        return span
+
+    def flush(self) -> Optional[tuple]:
+        span = (self.current[0][0], self.current[-1][1]) if self.current else None
+        self.current = []
+        self.current_tokens = 0
+        return span
+
+def chunk_text_spans(text: str, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> List[tuple]:
+    """Pack whole sentences of text into (start, end) chunk spans of at most max_tokens model tokens"""
+    max_tokens = max_tokens or get_chunk_token_budget()
+    packer = TokenChunkPacker(max_tokens, CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens)
+
+    spans = []
+    for unit in sentence_units(text, max_tokens=max_tokens):
+        span = packer.add(unit)
+        if span:
+            spans.append(span)
+
+    span = packer.flush()
+    if span:
+        spans.append(span)
+
+    return spans
+
+def create_token_chunks(text: str, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> List[str]:
+    """Create sentence-aligned chunks sized to the embedding model's token window"""
+    chunks = [text[start:end] for start, end in chunk_text_spans(text, max_tokens, overlap_tokens)]
+    return chunks or ([text] if text.strip() else [])
+
+# Structure-aware hierarchical chunking
+# Sections are parent nodes addressed by character offsets; only their paragraph-level leaves are embedded.
+class StreamingSectionChunker:
+    """
+    Incremental hierarchical chunker: paragraph blocks go in, token-sized leaf chunks come out as soon as
+    they are full. Leaves never cross a section boundary. Between blocks only the unfinished chunk tail
+    is buffered, plus the document text and section table that end up in the document record.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None):
+        self.max_tokens = max_tokens or get_chunk_token_budget()
+        self.overlap_tokens = CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        self.text_parts = []
+        self.sections = []
+        self._open_sections = []
+        self._offset = 0
+        self._section_index = None
+        self._body_has_text = False
+        self._packer = TokenChunkPacker(self.max_tokens, self.overlap_tokens)
+        self._buffer = ""
+        self._buffer_start = 0
+
+    @property
+    def text(self) -> str:
+        return '\n'.join(self.text_parts)
+
+    def _emit(self, span: tuple) -> tuple:
+        start, end = span
+        chunk = self._buffer[start - self._buffer_start:end - self._buffer_start]
+        metadata = {
+            'section_index': self._section_index,
+            'section_title': self.sections[self._section_index]['title'] if self._section_index is not None else None,
+            'start': start,
+            'end': end
+        }
+        return chunk, metadata
+
+    def _flush_section(self) -> List[tuple]:
+        span = self._packer.flush()
+        emitted = []
+        # A heading without body text of its own is kept only as a parent node
+        if span and (self._section_index is None or self._body_has_text):
+            emitted.append(self._emit(span))
+        self._buffer = ""
+        self._buffer_start = self._offset
+        return emitted
+
+    def feed(self, block: dict) -> List[tuple]:
+        """Add a paragraph block; returns the (chunk_text, metadata) leaves completed by it"""
+        start = self._offset
+        block_text = block['text']
+        emitted = []
+
+        level = block.get('level')
+        if level:
+            emitted.extend(self._flush_section())
+
+            # A heading closes every open section at the same or a deeper level
+            while self._open_sections and self.sections[self._open_sections[-1]]['level'] >= level:
+                self.sections[self._open_sections.pop()]['end'] = start - 1
+            if self.sections and self.sections[-1]['body_end'] is None:
+                self.sections[-1]['body_end'] = start - 1
+
+            self.sections.append({
+                'title': block_text.strip(),
+                'number': block.get('number'),
+                'level': level,
+                'parent': self._open_sections[-1] if self._open_sections else None,
+                'start': start,
+                'end': None,
+                'body_end': None
+            })
+            self._open_sections.append(len(self.sections) - 1)
+            self._section_index = len(self.sections) - 1
+            self._body_has_text = False
+        elif block_text.strip():
+            self._body_has_text = True
+
+        self.text_parts.append(block_text)
+        self._offset += len(block_text) + 1
+        self._buffer += block_text + '\n'
+
+        for unit in sentence_units(block_text, offset=start, max_tokens=self.max_tokens):
+            span = self._packer.add(unit)
+            if span:
+                emitted.append(self._emit(span))
+                # Drop buffered text that no pending chunk can reach any more
+                keep_from = self._packer.current[0][0]
+                self._buffer = self._buffer[keep_from - self._buffer_start:]
+                self._buffer_start = keep_from
+
+        return emitted
+
+    def finish(self) -> List[tuple]:
+        """Flush the last leaf and close all open sections"""
+        emitted = self._flush_section()
+        text_length = max(self._offset - 1, 0)
+        for section in self.sections:
+            if section['end'] is None:
+                section['end'] = text_length
+            if section['body_end'] is None:
+                section['body_end'] = section['end']
+        return emitted
+
+    def iter_chunks(self, blocks):
+        """Lazily chunk a stream of blocks"""
+        for block in blocks:
+            yield from self.feed(block)
+        yield from self.finish()
+
+def build_hierarchical_chunks(blocks: List[dict]) -> dict:
+    """
+    Build section nodes and leaf chunks for a complete list of blocks.
+    Returns text, sections, chunks and per-chunk metadata (section index and character offsets).
+    """
+    chunker = StreamingSectionChunker()
+    chunks = []
+    chunk_metadata = []
+    for chunk, metadata in chunker.iter_chunks(blocks):
+        chunks.append(chunk)
+        chunk_metadata.append(metadata)
+
+    return {
+        'text': chunker.text,
+        'sections': chunker.sections,
+        'chunks': chunks,
+        'chunk_metadata': chunk_metadata
+    }
+
+def get_section_path(sections: List[dict], section_index: int) -> str:
+    """Heading trail from the top-level section down to section_index"""
+    titles = []
+    while section_index is not None:
+        titles.insert(0, sections[section_index]['title'])
+        section_index = sections[section_index]['parent']
+    return ' > '.join(titles)
+
+def is_nested_section(sections: List[dict], section_index: int, ancestor_index: int) -> bool:
+    """Whether section_index lies inside ancestor_index"""
+    parent = sections[section_index]['parent']
+    while parent is not None:
+        if parent == ancestor_index:
+            return True
+        parent = sections[parent]['parent']
+    return False
+
+# Content-addressed ingestion cache
+class IngestionCache:
+    """Disk-backed LRU cache of extracted text, chunks and embeddings keyed by the SHA-256 of the file bytes"""
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, content_hash: str) -> Path:
+        return self.directory / f"{content_hash}.pkl"
+
+    def get(self, content_hash: str) -> Optional[dict]:
+        path = self._path(content_hash)
+        with self._lock:
+            try:
+                with open(path, 'rb') as f:
+                    entry = pickle.load(f)
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            except Exception as e:
+                logger.warning(f"Discarding unreadable ingestion cache entry {content_hash}: {str(e)}")
+                path.unlink(missing_ok=True)
+                self.misses += 1
+                return None
+
+            # Touch the entry so eviction treats it as recently used
+            os.utime(path)
+            self.hits += 1
+            return entry
+
+    def put(self, content_hash: str, entry: dict):
+        with self._lock:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                temp_path = self._path(content_hash).with_suffix('.tmp')
+                with open(temp_path, 'wb') as f:
+                    pickle.dump(entry, f)
+                os.replace(temp_path, self._path(content_hash))
+                self._evict()
+            except Exception as e:
+                logger.error(f"Error writing ingestion cache entry {content_hash}: {str(e)}")
+
+    def update(self, content_hash: str, **fields):
+        entry = self.get(content_hash)
+        if entry is not None:
+            entry.update(fields)
+            self.put(content_hash, entry)
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for path in self.directory.glob('*.pkl'):
+            try:
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+            except FileNotFoundError:
+                continue
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+
+ingestion_cache = IngestionCache(INGEST_CACHE_DIR, INGEST_CACHE_MAX_BYTES)
+
+# Cross-document near-duplicate chunk detection
+# Boilerplate (disclaimers, revision tables, approval blocks) is embedded once and linked to every owner.
+class NearDuplicateIndex:
+    """MinHash signatures over word shingles with LSH banding, keyed by FAISS index position"""
+
+    MERSENNE_PRIME = (1 << 31) - 1
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.9,
+                 shingle_size: int = 5, min_words: int = 12):
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+        rng = np.random.RandomState(20240601)
+        self._a = rng.randint(1, self.MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, self.MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self.signatures: Dict[int, np.ndarray] = {}
+        self.buckets: Dict[tuple, List[int]] = {}
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of the chunk's word shingles; None for chunks too short to deduplicate"""
+        words = re.findall(r'\w+', _turkish_lower(text))
+        if len(words) < self.min_words:
+            return None
+
+        shingles = {' '.join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'little') for shingle in shingles],
+            dtype=np.uint64
+        )
+        signature = ((np.outer(hashes, self._a) + self._b) % self.MERSENNE_PRIME).min(axis=0)
+        return signature.astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def find(self, signature: Optional[np.ndarray]) -> Optional[int]:
+        """Position of the most similar indexed chunk above the threshold, if any"""
+        if signature is None:
+            return None
+
+        best_position = None
+        best_similarity = self.threshold
+        checked = set()
+        for key in self._band_keys(signature):
+            for position in self.buckets.get(key, ()):
+                if position in checked:
+                    continue
+                checked.add(position)
+                similarity = np.count_nonzero(self.signatures[position] == signature) / self.num_perm
+                if similarity >= best_similarity:
+                    best_position, best_similarity = position, similarity
+        return best_position
+
+    def add(self, position: int, signature: Optional[np.ndarray]):
+        if signature is None:
+            return
+        self.signatures[position] = signature
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(position)
+
+    def renumber(self, positions: Dict[int, int]):
+        """Apply an index compaction: positions maps old to new, positions not in it are dropped"""
+        signatures = self.signatures
+        self.signatures = {}
+        self.buckets = {}
+        for position, signature in signatures.items():
+            if position in positions:
+                self.add(positions[position], signature)
+
+def create_near_duplicate_index() -> NearDuplicateIndex:
+    return NearDuplicateIndex(threshold=NEAR_DUPLICATE_THRESHOLD, min_words=NEAR_DUPLICATE_MIN_WORDS)
+
+near_duplicate_index = create_near_duplicate_index()
+
+def encode_unique_chunks(duplicates: NearDuplicateIndex, texts: List[str], signatures: List[Optional[np.ndarray]]) -> List:
+    """
+    Encode only chunks without an indexed near-duplicate; the others get None and reuse the canonical vector.
+    Inputs are ordered by length and encoded in EMBED_BATCH_SIZE slices, pausing between slices while
+    interactive requests are running.
+    """
+    embeddings = [None] * len(texts)
+    to_encode = [i for i, signature in enumerate(signatures) if duplicates.find(signature) is None]
+    to_encode.sort(key=lambda i: len(texts[i]))
+    for start in range(0, len(to_encode), EMBED_BATCH_SIZE):
+        ingestion_admission.yield_to_interactive()
+        batch = to_encode[start:start + EMBED_BATCH_SIZE]
+        encoded = sentence_model.encode([texts[i] for i in batch], batch_size=EMBED_BATCH_SIZE)
+        for i, vector in zip(batch, encoded):
+            embeddings[i] = vector
+    return embeddings
+
+def append_deduplicated_chunks(index, chunk_list: List[dict], duplicates: NearDuplicateIndex, texts: List[str],
+                               metadata: List[dict], signatures: List[Optional[np.ndarray]], embeddings: List) -> tuple:
+    """
+    Append chunks to a FAISS index and its chunk list. A near-duplicate of an indexed chunk is not added;
+    its document is linked to the canonical entry's document_ids instead.
+    embeddings[i] may be None for chunks expected to be duplicates. Returns (index, embeddings of all chunks).
+    """
+    base_position = len(chunk_list)
+    new_vectors = []
+    new_entries = []
+    all_vectors = []
+
+    for text, meta, signature, embedding in zip(texts, metadata, signatures, embeddings):
+        target = duplicates.find(signature)
+        if target is not None:
+            if target < base_position:
+                entry = chunk_list[target]
+                vector = index.reconstruct(int(target))
+            else:
+                entry = new_entries[target - base_position]
+                vector = new_vectors[target - base_position]
+            owners = entry.setdefault('document_ids', [entry['document_id']])
+            if meta['document_id'] not in owners:
+                owners.append(meta['document_id'])
+        else:
+            vector = embedding if embedding is not None else sentence_model.encode([text])[0]
+            duplicates.add(base_position + len(new_vectors), signature)
+            new_vectors.append(np.asarray(vector, dtype='float32'))
+            new_entries.append({'text': text, **meta, 'document_ids': [meta['document_id']]})
+        all_vectors.append(np.asarray(vector, dtype='float32'))
+
+    if new_vectors:
+        if index is None:
+            index = faiss.IndexFlatL2(len(new_vectors[0]))
+        index.add(np.vstack(new_vectors))
+        chunk_list.extend(new_entries)
+
+    return index, np.vstack(all_vectors)
+
+# FAISS index mutations come from ingestion threads, rebuilds and deletes; they are serialised here
+index_lock = threading.RLock()
+# Serialises index file writes so an older snapshot never overwrites a newer one; taken before index_lock
+persist_lock = threading.Lock()
+index_rebuild_requested = False  # Set when entries could not be removed in place; the ingestion worker rebuilds
+
+class IndexRebuildGate:
+    """
+    Keeps index rebuilds apart from ingestion batches and in-place removals. A rebuild reads db.chunks and
+    swaps in a new index, so entries added or removed meanwhile would be lost at the swap (a job's chunk
+    records are only written when it completes). Batches and removals hold the gate shared, a rebuild
+    exclusively; once a rebuild is waiting, new batches wait for it and then work on the rebuilt index.
+    """
+
+    def __init__(self):
+        self.active = 0
+        self.rebuilding = False
+        self.condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def shared(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: not self.rebuilding)
+            self.active += 1
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.active -= 1
+                self.condition.notify_all()
+
+    @asynccontextmanager
+    async def exclusive(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: not self.rebuilding)
+            self.rebuilding = True
+            await self.condition.wait_for(lambda: self.active == 0)
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.rebuilding = False
+                self.condition.notify_all()
+
+index_rebuild_gate = IndexRebuildGate()
+
+def add_chunks_to_index(texts: List[str], metadata: List[dict], embeddings: Optional[List] = None,
+                        signatures: Optional[List[Optional[np.ndarray]]] = None) -> np.ndarray:
+    """
+    Append chunks to the FAISS index with a single add. Chunks without a precomputed embedding are
+    encoded in one call unless they are near-duplicates of already indexed content.
+    Returns the embeddings of every chunk.
+    """
+    global faiss_index
+
+    if signatures is None:
+        signatures = [near_duplicate_index.signature(text) for text in texts]
+    batch_embeddings = list(embeddings) if embeddings is not None else [None] * len(texts)
+
+    # Encoding runs outside the lock; a duplicate indexed meanwhile is still linked below
+    missing = [i for i, vector in enumerate(batch_embeddings) if vector is None]
+    if missing:
+        encoded = encode_unique_chunks(near_duplicate_index, [texts[i] for i in missing], [signatures[i] for i in missing])
+        for i, vector in zip(missing, encoded):
+            batch_embeddings[i] = vector
+
+    with index_lock:
+        # A retried or re-claimed job replaces whatever an earlier attempt indexed for its document
+        document_ids = {meta['document_id'] for meta in metadata}
+        indexed = {owner for entry in document_chunks for owner in entry.get('document_ids', [entry['document_id']])}
+        # Callers persist once the batch is added
+        remove_documents_from_index(document_ids & indexed, persist=False)
+        faiss_index, all_embeddings = append_deduplicated_chunks(
+            faiss_index, document_chunks, near_duplicate_index, texts, metadata, signatures, batch_embeddings
+        )
+
+    return all_embeddings
+
+def remove_documents_from_index(document_ids, persist: bool = True) -> bool:
+    """
+    Drop the index entries of the given documents without a rebuild. Entries they share as near-duplicates
+    only lose them as owners. Returns False if an entry they own is shared with other documents; its
+    metadata describes the removed document, so only a rebuild can fix it.
+    """
+    global index_rebuild_requested
+    document_ids = set(document_ids)
+    complete = True
+    changed = False
+    with index_lock:
+        if faiss_index is None or not document_ids:
+            return True
+        kept = []
+        removed = []
+        unlinked = False
+        for position, entry in enumerate(document_chunks):
+            owners = entry.get('document_ids', [entry['document_id']])
+            remaining = [owner for owner in owners if owner not in document_ids]
+            if not remaining:
+                removed.append(position)
+                continue
+            if entry['document_id'] in document_ids:
+                complete = False
+            elif len(remaining) < len(owners):
+                entry['document_ids'] = remaining
+                unlinked = True
+            kept.append(position)
+        if removed:
+            faiss_index.remove_ids(np.array(removed, dtype='int64'))
+            near_duplicate_index.renumber({old: new for new, old in enumerate(kept)})
+            document_chunks[:] = [document_chunks[position] for position in kept]
+        changed = bool(removed) or unlinked
+        if not complete:
+            index_rebuild_requested = True
+    if changed and persist:
+        persist_faiss_index()
+    return complete
+
+async def drop_documents_from_index(document_ids: List[str]):
+    """Remove documents from the live index, falling back to a rebuild when entries are shared"""
+    async with index_rebuild_gate.shared():
+        await asyncio.to_thread(remove_documents_from_index, document_ids)
+    # Answers cached between the delete and the removal may still cite these documents
+    answer_cache.invalidate_documents(document_ids)
+    await rebuild_index_if_requested()
+
+async def rebuild_index_if_requested():
+    global index_rebuild_requested
+    if index_rebuild_requested:
+        index_rebuild_requested = False
+        await debounced_faiss_update()
+
+def persist_faiss_index():
+    """
+    Save the FAISS index and chunk metadata to disk. The index is only locked while it is serialised in
+    memory; files are written outside the lock and swapped in with os.replace, so searches never wait on disk.
+    Must not be called with index_lock held.
+    """
+    with persist_lock:
+        try:
+            with index_lock:
+                snapshot = {
+                    'faiss_index.pkl': pickle.dumps(faiss_index),
+                    'document_chunks.pkl': pickle.dumps(document_chunks),
+                    'near_duplicates.pkl': pickle.dumps(near_duplicate_index)
+                }
+            for filename, data in snapshot.items():
+                temp_path = f"{filename}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, filename)
+        except Exception as e:
+            logger.error(f"Error saving FAISS index: {str(e)}")
+
+def open_chunk_source(file_path: str, file_extension: str, content_hash: str) -> dict:
+    """
+    Chunk source for a document: chunks (and embeddings, if the model matches) replayed from the ingestion
+    cache, or the lazy section chunker over the extractor's block stream.
+    """
+    cached = ingestion_cache.get(content_hash)
+
+    if cached and cached.get('chunker') == CHUNKER_SIGNATURE:
+        logger.info(f"Ingestion cache hit for {content_hash[:12]} ({len(cached['chunks'])} chunks)")
+        embeddings = cached.get('embeddings') if cached.get('embedding_model') == EMBEDDING_MODEL_NAME else None
+        return {'chunks': zip(cached['chunks'], cached['chunk_metadata']), 'chunker': None, 'cached': cached, 'embeddings': embeddings}
+
+    # A changed chunker can still reuse previously extracted text
+    if cached and cached.get('text'):
+        blocks = text_to_blocks(cached['text'])
+    else:
+        blocks = iter_document_blocks(file_path, file_extension)
+    chunker = StreamingSectionChunker()
+    return {'chunks': chunker.iter_chunks(blocks), 'chunker': chunker, 'cached': cached, 'embeddings': None}
+
+def finish_ingestion(content_hash: str, source: dict, chunks: List[str], chunk_metadata: List[dict], embeddings: np.ndarray) -> dict:
+    """Write the ingestion cache entry if anything was computed and return the prepared document"""
+    if source['chunker'] is not None:
+        text, sections = source['chunker'].text, source['chunker'].sections
+    else:
+        text, sections = source['cached']['text'], source['cached']['sections']
+
+    if source['chunker'] is not None or source['embeddings'] is None:
+        ingestion_cache.put(content_hash, {
+            'text': text,
+            'sections': sections,
+            'chunks': chunks,
+            'chunk_metadata': chunk_metadata,
+            'chunker': CHUNKER_SIGNATURE,
+            'embeddings': embeddings,
+            'embedding_model': EMBEDDING_MODEL_NAME
+        })
+
+    return {
+        'text': text,
+        'sections': sections,
+        'chunks': chunks,
+        'chunk_metadata': chunk_metadata,
+        'embeddings': embeddings
+    }
+
+def ingest_document_file(file_path: str, file_extension: str, content_hash: str, document_info: dict,
+                         progress: Optional[Callable[[str, int], None]] = None) -> dict:
+    """
+    Streaming ingestion pipeline: paragraph blocks stream out of the extractor into the lazy section
+    chunker, and leaves are embedded in EMBED_BATCH_SIZE batches as they are produced. The vectors are
+    added to the index in one step once the whole document is chunked, so a failure leaves nothing searchable.
+    document_info (document_id, filename, group_id, group_name) is attached to every chunk.
+    Identical content is replayed from the ingestion cache without extraction or encoding.
+    progress(stage, chunk_count) is called as the pipeline moves through chunk, embed and index.
+    Returns text, sections, chunks, chunk_metadata and embeddings for the document and chunk records.
+    """
+    progress = progress or (lambda stage, chunk_count: None)
+    if not sentence_model:
+        raise Exception("Embedding modeli yüklenemedi")
+
+    source = open_chunk_source(file_path, file_extension, content_hash)
+    cached_embeddings = source['embeddings']
+
+    chunks = []
+    chunk_metadata = []
+    signatures = []
+    embeddings = []
+    batch_texts = []
+
+    def flush_batch():
+        first_index = len(chunks) - len(batch_texts)
+        batch_signatures = [near_duplicate_index.signature(text) for text in batch_texts]
+        progress("embed", len(chunks))
+        if cached_embeddings is not None:
+            batch_embeddings = list(cached_embeddings[first_index:first_index + len(batch_texts)])
+        else:
+            ingestion_admission.yield_to_interactive()
+            batch_embeddings = encode_unique_chunks(near_duplicate_index, batch_texts, batch_signatures)
+        signatures.extend(batch_signatures)
+        embeddings.extend(batch_embeddings)
+        batch_texts.clear()
+
+    for chunk, metadata in source['chunks']:
+        if not chunks:
+            progress("chunk", 0)
+        chunks.append(chunk)
+        chunk_metadata.append(metadata)
+        batch_texts.append(chunk)
+        if len(batch_texts) >= EMBED_BATCH_SIZE:
+            flush_batch()
+
+    if batch_texts:
+        flush_batch()
+
+    if not chunks:
+        raise Exception("Doküman içeriği okunamadı. Dosya bozuk veya desteklenmeyen formatta olabilir.")
+
+    progress("index", len(chunks))
+    index_metadata = [{**document_info, 'chunk_index': i, **metadata} for i, metadata in enumerate(chunk_metadata)]
+    all_embeddings = add_chunks_to_index(chunks, index_metadata, embeddings, signatures)
+    persist_faiss_index()
+    logger.info(f"Indexed {len(chunks)} chunks for {document_info.get('filename')}")
+
+    return finish_ingestion(content_hash, source, chunks, chunk_metadata, all_embeddings)
+
+def ingest_document_batch(items: List[dict]) -> List:
+    """
+    Coalesced ingestion of several documents. Each one is extracted and chunked, then all chunks
+    without a cached embedding are encoded in one call (SentenceTransformer orders the inputs by
+    length into padding-efficient batches), appended with a single index add and persisted once.
+    items hold file_path, file_extension, content_hash, document_info and an optional progress callback.
+    Returns the prepared document or the exception for each item, in order.
+    """
+    if not sentence_model:
+        raise Exception("Embedding modeli yüklenemedi")
+
+    results = []
+    prepared_items = []
+    for item in items:
+        progress = item.get('progress') or (lambda stage, chunk_count: None)
+        try:
+            source = open_chunk_source(item['file_path'], item['file_extension'], item['content_hash'])
+            chunks = []
+            chunk_metadata = []
+            for chunk, metadata in source['chunks']:
+                if not chunks:
+                    progress("chunk", 0)
+                chunks.append(chunk)
+                chunk_metadata.append(metadata)
+            if not chunks:
+                raise Exception("Doküman içeriği okunamadı. Dosya bozuk veya desteklenmeyen formatta olabilir.")
+            prepared_items.append((len(results), item, source, chunks, chunk_metadata))
+            results.append(None)
+        except Exception as e:
+            logger.error(f"Chunking failed for {item['document_info'].get('filename')}: {str(e)}")
+            results.append(e)
+
+    if not prepared_items:
+        return results
+
+    texts = []
+    metadata = []
+    embeddings = []
+    for _, item, source, chunks, chunk_metadata in prepared_items:
+        if item.get('progress'):
+            item['progress']("embed", len(chunks))
+        texts.extend(chunks)
+        metadata.extend({**item['document_info'], 'chunk_index': i, **meta} for i, meta in enumerate(chunk_metadata))
+        cached_embeddings = source['embeddings']
+        embeddings.extend(list(cached_embeddings) if cached_embeddings is not None else [None] * len(chunks))
+
+    all_embeddings = add_chunks_to_index(texts, metadata, embeddings)
+
+    for _, item, _, chunks, _ in prepared_items:
+        if item.get('progress'):
+            item['progress']("index", len(chunks))
+    persist_faiss_index()
+    logger.info(f"Indexed {len(texts)} chunks for {len(prepared_items)} documents in one update")
+
+    offset = 0
+    for position, item, source, chunks, chunk_metadata in prepared_items:
+        document_embeddings = all_embeddings[offset:offset + len(chunks)]
+        offset += len(chunks)
+        results[position] = finish_ingestion(item['content_hash'], source, chunks, chunk_metadata, document_embeddings)
+
+    return results
+
+# Search similar chunks
+def search_similar_chunks(query: str, top_k: int = 5, query_embedding: Optional[np.ndarray] = None) -> List[dict]:
+    if not sentence_model or faiss_index is None or len(document_chunks) == 0:
+        return []
+    
+    try:
+        # Create embedding for query
+        if query_embedding is None:
+            query_embedding = sentence_model.encode([query])[0]
+        query_embedding = np.asarray(query_embedding).reshape(1, -1)
+        
+        # Search in FAISS index
+        with index_lock:
+            distances, indices = faiss_index.search(query_embedding.astype('float32'), min(top_k, len(document_chunks)))
+            
+            results = []
+            for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
+                if 0 <= idx < len(document_chunks):
+                    chunk_info = document_chunks[idx].copy()
+                    chunk_info['similarity_score'] = 1.0 / (1.0 + distance)  # Convert distance to similarity
+                    results.append(chunk_info)
+        
+        return results
+    except Exception as e:
+        logger.error(f"Error in similarity search: {str(e)}")
+        return []
+
+async def expand_chunks_to_sections(chunks: List[dict], max_chars: int = SECTION_CONTEXT_MAX_CHARS) -> List[dict]:
+    """
+    Replace retrieved leaf chunks with the text of their parent section.
+    Hits from the same or nested sections are merged; sections longer than max_chars keep the leaf text.
+    """
+    document_ids = list({chunk['document_id'] for chunk in chunks if chunk.get('section_index') is not None})
+    documents_by_id = {}
+    if document_ids:
+        texts = await get_document_texts(document_ids)
+        async for doc in db.documents.find({"id": {"$in": document_ids}}, {"id": 1, "sections": 1}):
+            documents_by_id[doc["id"]] = {**doc, "text": texts.get(doc["id"], "")}
+
+    expanded = []
+    seen_sections = set()
+    for chunk in chunks:
+        section_index = chunk.get('section_index')
+        doc = documents_by_id.get(chunk['document_id'])
+        sections = doc.get('sections') if doc else None
+
+        if section_index is None or not sections or section_index >= len(sections):
+            expanded.append(chunk)
+            continue
+
+        # Skip hits whose section (or an enclosing section) is already in the context
+        ancestor = section_index
+        while ancestor is not None and (chunk['document_id'], ancestor) not in seen_sections:
+            ancestor = sections[ancestor]['parent']
+        if ancestor is not None:
+            continue
+        key = (chunk['document_id'], section_index)
+
+        section = sections[section_index]
+        section_text = doc.get('text', '')[section['start']:section['end']].strip()
+        if not section_text or len(section_text) > max_chars:
+            expanded.append(chunk)
+            continue
+
+        section_chunk = chunk.copy()
+        section_chunk['text'] = section_text
+        section_chunk['section_path'] = get_section_path(sections, section_index)
+
+        # Sections already in the context that lie inside this one are replaced by it, at the rank of the first
+        nested = [
+            position for position, entry in enumerate(expanded)
+            if (entry['document_id'], entry.get('section_index')) in seen_sections
+            and entry['document_id'] == chunk['document_id']
+            and is_nested_section(sections, entry['section_index'], section_index)
+        ]
+        for position in nested:
+            seen_sections.discard((chunk['document_id'], expanded[position]['section_index']))
+        if nested:
+            expanded[nested[0]] = section_chunk
+            for position in reversed(nested[1:]):
+                del expanded[position]
+        else:
+            expanded.append(section_chunk)
+        seen_sections.add(key)
+
+    return expanded
+
+# Semantic answer cache
+# A cached answer is reused for a question whose embedding is within ANSWER_CACHE_SIMILARITY (cosine) of the
+# cached question, but only if retrieval returned the same chunks, so the LLM would have been given the same
+# context. Each entry records the documents it was built from, and keys_by_document maps a document back to
+# its entries, so a changed document evicts exactly the answers that depend on it.
+class AnswerCache:
+    """
+    LRU of generated answers with a TTL, keyed by the retrieved chunk set and bounded by the number of answers.
+    Invalidations bump a version; an answer generated from a snapshot taken before its documents were
+    invalidated is not stored.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, similarity: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.entries: "OrderedDict[tuple, List[dict]]" = OrderedDict()
+        self.keys_by_document: Dict[str, set] = {}
+        self.size = 0
+        self.version = 0
+        self.document_versions: Dict[str, int] = {}
+        self.cleared_version = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    @staticmethod
+    def context_key(chunks: List[dict]) -> tuple:
+        """Chunk ids with their owning documents; a near-duplicate chunk gaining an owner changes the key"""
+        return tuple(sorted({
+            (chunk['document_id'], chunk.get('chunk_index', -1), tuple(sorted(chunk.get('document_ids', [chunk['document_id']]))))
+            for chunk in chunks
+        }))
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype='float32').ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, question_embedding, context: tuple) -> Optional[dict]:
+        if self.max_entries <= 0:
+            return None
+        vector = self._unit(question_embedding)
+        now = time.monotonic()
+        with self.lock:
+            best, best_similarity = None, self.similarity
+            for entry in self.entries.get(context, []):
+                similarity = float(np.dot(entry['vector'], vector))
+                if entry['expires_at'] > now and similarity >= best_similarity:
+                    best, best_similarity = entry, similarity
+            if best is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(context)
+            self.hits += 1
+            return best
+
+    def put(self, question_embedding, context: tuple, answer: str, source_documents: List[dict], version: int):
+        """Store an answer; version is the cache version read before retrieval started"""
+        if self.max_entries <= 0:
+            return
+        now = time.monotonic()
+        document_ids = {document_id for _, _, owners in context for document_id in owners}
+        document_ids.update(doc['id'] for doc in source_documents)
+        entry = {
+            'vector': self._unit(question_embedding),
+            'answer': answer,
+            'source_documents': source_documents,
+            'document_ids': document_ids,
+            'expires_at': now + self.ttl_seconds
+        }
+        with self.lock:
+            # A document changed while the answer was being generated
+            if self.cleared_version > version or any(self.document_versions.get(document_id, 0) > version for document_id in document_ids):
+                return
+            previous = self.entries.pop(context, [])
+            kept = [e for e in previous if e['expires_at'] > now]
+            self.entries[context] = kept + [entry]
+            self.size += len(kept) + 1 - len(previous)
+            self._unlink(context, [e for e in previous if e['expires_at'] <= now])
+            for document_id in document_ids:
+                self.keys_by_document.setdefault(document_id, set()).add(context)
+            while self.size > self.max_entries:
+                self._evict_oldest()
+
+    def invalidate_documents(self, document_ids) -> int:
+        """Evict the entries built from any of the given documents"""
+        with self.lock:
+            self.version += 1
+            keys = set()
+            for document_id in document_ids:
+                self.document_versions[document_id] = self.version
+                keys |= self.keys_by_document.get(document_id, set())
+            evicted = sum(self._drop(key) for key in keys)
+            self.invalidated += evicted
+            return evicted
+
+    def clear(self):
+        with self.lock:
+            self.version += 1
+            self.cleared_version = self.version
+            self.document_versions.clear()
+            self.entries.clear()
+            self.keys_by_document.clear()
+            self.size = 0
+
+    def _evict_oldest(self):
+        """Drop the oldest answer of the least recently used context"""
+        context = next(iter(self.entries))
+        answers = self.entries[context]
+        removed = answers.pop(0)
+        self.size -= 1
+        if not answers:
+            del self.entries[context]
+        self._unlink(context, [removed])
+
+    def _drop(self, context: tuple) -> int:
+        answers = self.entries.pop(context, [])
+        self.size -= len(answers)
+        self._unlink(context, answers)
+        return len(answers)
+
+    def _unlink(self, context: tuple, removed: List[dict]):
+        """Remove context from the reverse index of documents no remaining answer under it was built from"""
+        remaining = set()
+        for entry in self.entries.get(context, []):
+            remaining |= entry['document_ids']
+        for entry in removed:
+            for document_id in entry['document_ids'] - remaining:
+                keys = self.keys_by_document.get(document_id)
+                if keys is not None:
+                    keys.discard(context)
+                    if not keys:
+                        del self.keys_by_document[document_id]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.size,
+            "contexts": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+answer_cache = AnswerCache(ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_SIMILARITY)
+
+# Compressed document text
+# Document records hold their extracted text once, zlib-compressed, and chunk records whose text is a slice of
+# it keep only the (start, end) offsets. Decompressed texts are kept in an LRU bounded by DOCUMENT_TEXT_CACHE_BYTES.
+TEXT_COMPRESSION_LEVEL = 6
+
+def compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode('utf-8'), TEXT_COMPRESSION_LEVEL)
+
+def document_record_text(document: dict) -> str:
+    """Extracted text of a document record, compressed or (older records) plain"""
+    if document.get("text_compressed") is not None:
+        return zlib.decompress(document["text_compressed"]).decode('utf-8')
+    return document.get("text") or ""
+
+class DocumentTextCache:
+    """LRU of decompressed document texts bounded by total characters"""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.entries: "OrderedDict[str, str]" = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, document_id: str) -> Optional[str]:
+        with self.lock:
+            text = self.entries.get(document_id)
+            if text is not None:
+                self.entries.move_to_end(document_id)
+            return text
+
+    def put(self, document_id: str, text: str):
+        with self.lock:
+            self._remove(document_id)
+            if len(text) > self.max_chars:
+                return
+            self.entries[document_id] = text
+            self.size += len(text)
+            while self.size > self.max_chars:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def discard(self, document_id: str):
+        with self.lock:
+            self._remove(document_id)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _remove(self, document_id: str):
+        text = self.entries.pop(document_id, None)
+        if text is not None:
+            self.size -= len(text)
+
+document_text_cache = DocumentTextCache(DOCUMENT_TEXT_CACHE_BYTES)
+
+async def get_document_texts(document_ids: List[str]) -> Dict[str, str]:
+    """Decompressed texts for the given documents, reading only those not in the LRU"""
+    texts = {}
+    missing = []
+    for document_id in document_ids:
+        text = document_text_cache.get(document_id)
+        if text is None:
+            missing.append(document_id)
+        else:
+            texts[document_id] = text
+    if missing:
+        loaded = await load_document_texts(missing)
+        for document_id, text in loaded.items():
+            document_text_cache.put(document_id, text)
+        texts.update(loaded)
+    return texts
+
+async def load_document_texts(document_ids: List[str]) -> Dict[str, str]:
+    """Decompressed texts read in one query without the LRU; bulk passes use this so they do not evict hot texts"""
+    return {
+        doc["id"]: document_record_text(doc)
+        async for doc in db.documents.find({"id": {"$in": document_ids}}, {"id": 1, "text": 1, "text_compressed": 1})
+    }
+
+def chunk_record_text(record: dict, document_text: Optional[str]) -> str:
+    if record.get("text") is not None:
+        return record["text"]
+    return (document_text or "")[record["start"]:record["end"]]
+
+async def migrate_uncompressed_document_text():
+    """Compress plain text of older document records and drop chunk text that is a slice of it"""
+    migrated = 0
+    async for document in db.documents.find({"text": {"$exists": True}}, {"id": 1, "text": 1}):
+        try:
+            text = document.get("text") or ""
+            sliced = [
+                record["_id"]
+                async for record in db.chunks.find(
+                    {"document_id": document["id"], "text": {"$exists": True}, "start": {"$ne": None}},
+                    {"text": 1, "start": 1, "end": 1}
+                )
+                if text[record["start"]:record["end"]] == record["text"]
+            ]
+            await db.documents.update_one(
+                {"id": document["id"]},
+                {"$set": {"text_compressed": compress_text(text), "text_length": len(text)}, "$unset": {"text": ""}}
+            )
+            if sliced:
+                await db.chunks.update_many({"_id": {"$in": sliced}}, {"$unset": {"text": ""}})
+            migrated += 1
+        except Exception as e:
+            logger.error(f"Could not compress text of document {document.get('id')}: {e}")
+    if migrated:
+        logger.info(f"Compressed text of {migrated} documents")
+
+# Chunk records
+# Leaf chunks are stored in db.chunks keyed by (document_id, chunk_index) with their character offsets,
+# section, SHA-256 of the text and (with CHUNK_STORE_EMBEDDINGS) the float32 embedding. The text itself is
+# only stored when it is not a slice of the document text. Document records keep only chunk_count, so
+# rebuilds and citation lookups read chunk data without loading whole documents.
+def build_chunk_records(document_id: str, prepared: dict) -> List[dict]:
+    embeddings = prepared.get('embeddings') if CHUNK_STORE_EMBEDDINGS else None
+    document_text = prepared.get('text')
+    records = []
+    for chunk_index, (text, metadata) in enumerate(zip(prepared['chunks'], prepared['chunk_metadata'])):
+        start, end = metadata.get('start'), metadata.get('end')
+        record = {
+            "document_id": document_id,
+            "chunk_index": chunk_index,
+            "start": start,
+            "end": end,
+            "section_index": metadata.get('section_index'),
+            "content_hash": hashlib.sha256(text.encode('utf-8')).hexdigest()
+        }
+        if document_text is None or start is None or document_text[start:end] != text:
+            record["text"] = text
+        if embeddings is not None:
+            record["embedding"] = np.asarray(embeddings[chunk_index], dtype='float32').tobytes()
+            record["embedding_model"] = EMBEDDING_MODEL_NAME
+        records.append(record)
+    return records
+
+async def replace_chunk_records(document_id: str, records: List[dict]):
+    """Replace all chunk records of a document; a retried ingestion never leaves stale chunks behind"""
+    await db.chunks.delete_many({"document_id": document_id})
+    if records:
+        await db.chunks.insert_many(records, ordered=False)
+
+def decode_chunk_embedding(record: dict) -> Optional[np.ndarray]:
+    if record.get("embedding") is None or record.get("embedding_model") != EMBEDDING_MODEL_NAME:
+        return None
+    return np.frombuffer(record["embedding"], dtype='float32')
+
+async def migrate_inline_document_chunks():
+    """Move chunk arrays still stored inside document records into db.chunks"""
+    migrated = 0
+    async for document in db.documents.find({"chunks": {"$exists": True}}, {"id": 1, "chunks": 1, "chunk_sections": 1}):
+        try:
+            chunks = document.get("chunks") or []
+            chunk_sections = document.get("chunk_sections") or []
+            prepared = {
+                'chunks': chunks,
+                'chunk_metadata': [
+                    {'section_index': chunk_sections[i] if i < len(chunk_sections) else None} for i in range(len(chunks))
+                ]
+            }
+            await replace_chunk_records(document["id"], build_chunk_records(document["id"], prepared))
+            await db.documents.update_one(
+                {"id": document["id"]},
+                {"$set": {"chunk_count": len(chunks)}, "$unset": {"chunks": "", "chunk_sections": ""}}
+            )
+            migrated += 1
+        except Exception as e:
+            logger.error(f"Could not move chunks of document {document.get('id')} to the chunks collection: {e}")
+    if migrated:
+        logger.info(f"Moved chunks of {migrated} documents to the chunks collection")
+
+async def migrate_legacy_document_records():
+    await migrate_inline_document_content()
+    await migrate_inline_document_chunks()
+    await migrate_uncompressed_document_text()
+    # Keyset pagination needs an upload_date on every record
+    await db.documents.update_many({"upload_date": None}, {"$set": {"upload_date": datetime.utcnow()}})
+
+async def update_faiss_index_optimized():
+    """Optimized FAISS update - rebuilds entire index from the chunks collection once running batches finish"""
+    async with index_rebuild_gate.exclusive():
+        await rebuild_faiss_index()
+
+async def rebuild_faiss_index():
+    global faiss_index, document_chunks, near_duplicate_index
+    
+    try:
+        logger.info("Starting optimized FAISS index update...")
+        
+        # Document summaries only; chunk text and vectors are streamed from db.chunks below
+        documents_by_id = {}
+        async for doc in db.documents.find({}, {"_id": 0, "id": 1, "filename": 1, "group_id": 1, "group_name": 1, "sections.title": 1}):
+            documents_by_id[doc["id"]] = doc
+        
+        # Rebuild chunks from all documents; the live index keeps serving searches until the swap
+        rebuilt_index = None
+        rebuilt_chunks = []
+        rebuilt_duplicates = create_near_duplicate_index()
+        
+        def append_document(document_id: str, records: List[dict], document_text: Optional[str]) -> List:
+            """Add one document's chunks to the rebuilt index; returns write-backs for vectors encoded here"""
+            nonlocal rebuilt_index
+            doc = documents_by_id[document_id]
+            sections = doc.get('sections') or []
+            texts = [chunk_record_text(record, document_text) for record in records]
+            metadata = []
+            for record in records:
+                section_index = record.get('section_index')
+                metadata.append({
+                    'document_id': document_id,
+                    'filename': doc.get('filename', 'Bilinmeyen'),
+                    'chunk_index': record['chunk_index'],
+                    'group_id': doc.get('group_id'),
+                    'group_name': doc.get('group_name'),
+                    'section_index': section_index,
+                    'section_title': sections[section_index].get('title') if section_index is not None and section_index < len(sections) else None,
+                    'start': record.get('start'),
+                    'end': record.get('end')
+                })
+            
+            # Stored vectors are reused; near-duplicates of chunks from earlier documents are linked instead of re-embedded
+            signatures = [rebuilt_duplicates.signature(text) for text in texts]
+            embeddings = [decode_chunk_embedding(record) for record in records]
+            missing = [i for i, vector in enumerate(embeddings) if vector is None]
+            write_backs = []
+            if missing:
+                encoded = encode_unique_chunks(rebuilt_duplicates, [texts[i] for i in missing], [signatures[i] for i in missing])
+                for i, vector in zip(missing, encoded):
+                    embeddings[i] = vector
+                    # Linked near-duplicates borrow another chunk's vector, so only real encodings are stored
+                    if vector is not None and CHUNK_STORE_EMBEDDINGS:
+                        write_backs.append(UpdateOne(
+                            {"document_id": document_id, "chunk_index": records[i]['chunk_index']},
+                            {"$set": {"embedding": np.asarray(vector, dtype='float32').tobytes(), "embedding_model": EMBEDDING_MODEL_NAME}}
+                        ))
+            rebuilt_index, _ = append_deduplicated_chunks(
+                rebuilt_index, rebuilt_chunks, rebuilt_duplicates, texts, metadata, signatures, embeddings
+            )
+            return write_backs
+        
+        async def index_documents(page: List[tuple]):
+            """Index a page of (document_id, records); texts for chunks stored as slices are read with one query"""
+            page = [(document_id, records) for document_id, records in page if document_id in documents_by_id]
+            text_ids = [document_id for document_id, records in page if any(record.get('text') is None for record in records)]
+            document_texts = await load_document_texts(text_ids) if text_ids else {}
+            for document_id, records in page:
+                # Encoding and FAISS appends are CPU bound; keep them off the event loop
+                write_backs = await asyncio.to_thread(append_document, document_id, records, document_texts.get(document_id))
+                if write_backs:
+                    # Chunks that had no stored vector (older records, model change) are not encoded again next rebuild
+                    await db.chunks.bulk_write(write_backs, ordered=False)
+        
+        current_id = None
+        current_records = []
+        pending_documents = []
+        indexed_documents = set()
+        chunk_cursor = db.chunks.find(
+            {},
+            {"_id": 0, "document_id": 1, "chunk_index": 1, "text": 1, "start": 1, "end": 1, "section_index": 1, "embedding": 1, "embedding_model": 1}
+        ).sort([("document_id", 1), ("chunk_index", 1)])
+        async for record in chunk_cursor:
+            if record["document_id"] != current_id:
+                if current_records:
+                    pending_documents.append((current_id, current_records))
+                    if len(pending_documents) >= INDEX_REBUILD_TEXT_PAGE:
+                        await index_documents(pending_documents)
+                        pending_documents = []
+                current_id, current_records = record["document_id"], []
+                indexed_documents.add(current_id)
+            current_records.append(record)
+        if current_records:
+            pending_documents.append((current_id, current_records))
+        if pending_documents:
+            await index_documents(pending_documents)
+        
+        with index_lock:
+            faiss_index = rebuilt_index
+            document_chunks = rebuilt_chunks
+            near_duplicate_index = rebuilt_duplicates
+        await asyncio.to_thread(persist_faiss_index)
+        # Answers retrieved from the previous index may cite entries the rebuild dropped
+        answer_cache.clear()
+        
+        if rebuilt_index is not None:
+            logger.info(f"FAISS index optimized: {len(rebuilt_chunks)} chunks from {len(indexed_documents & set(documents_by_id))} documents")
+        else:
+            logger.info("No chunks found, index cleared")
+        
+    except Exception as e:
+        logger.error(f"FAISS update error: {str(e)}")
+
+# Debounced FAISS update to prevent sequential rebuilds
+_faiss_update_pending = False
+
+async def debounced_faiss_update():
+    """Debounced FAISS update - prevents multiple sequential updates"""
+    global _faiss_update_pending
+    
+    if _faiss_update_pending:
+        logging.info("FAISS update already pending, skipping duplicate request")
+        return
+    
+    _faiss_update_pending = True
+    
+    try:
+        # Small delay to allow for batching multiple deletes
+        await asyncio.sleep(2)
+        
+        # Call the optimized update function
+        await update_faiss_index_optimized()
+        
+    except Exception as e:
+        logging.error(f"Debounced FAISS update error: {str(e)}")
+    finally:
+        _faiss_update_pending = False
+
+@api_router.delete("/documents")
+async def delete_all_documents(background_tasks: BackgroundTasks, confirm: bool = False, current_user: dict = Depends(require_admin)):
+    """Tüm dokümanları sil (tehlikeli işlem)"""
+    if not confirm:
+        raise HTTPException(status_code=400, detail="Bu tehlikeli işlem için confirm=true parametresi gerekli")
+    
+    try:
+        # Count existing documents
+        doc_count = await db.documents.count_documents({})
+        
+        if doc_count == 0:
+            return {"message": "Silinecek doküman bulunamadı", "deleted_count": 0}
+        
+        # Delete all documents
+        delete_result = await db.documents.delete_many({})
+        await db.chunks.delete_many({})
+        document_text_cache.clear()
+        answer_cache.clear()
+        await reconcile_document_stats()
+        
+        # Background tasks for cleanup
+        background_tasks.add_task(cleanup_all_chat_sessions)
+        background_tasks.add_task(clear_faiss_index)
+        background_tasks.add_task(release_unreferenced_blobs)
+        
+        # Log activity
+        log_user_activity(
+            current_user["id"], 
+            "documents_delete_all", 
+            f"Deleted all {delete_result.deleted_count} documents"
+        )
+        
+        return {
+            "message": f"Tüm dokümanlar başarıyla silindi",
+            "deleted_count": delete_result.deleted_count
+        }
+        
+    except Exception as e:
+        logger.error(f"Error deleting all documents: {str(e)}")
+        raise HTTPException(status_code=500, detail="Dokümanlar silinirken hata oluştu")
+
+async def cleanup_all_chat_sessions():
+    """Clean up all chat sessions"""
+    try:
+        await db.chat_sessions.delete_many({})
+        logger.info("All chat sessions cleaned up")
+    except Exception as e:
+        logger.error(f"Error cleaning up all chat sessions: {str(e)}")
+
+async def clear_faiss_index():
+    """Clear FAISS index completely"""
+    global faiss_index, document_chunks, near_duplicate_index
+    try:
+        with index_lock:
+            faiss_index = None
+            document_chunks = []
+            near_duplicate_index = create_near_duplicate_index()
+        answer_cache.clear()
+        
         # Remove index files
-        for filename in ['faiss_index.pkl', 'documents.pkl', 'document_chunks.pkl']:
+        for filename in ['faiss_index.pkl', 'documents.pkl', 'document_chunks.pkl', 'near_duplicates.pkl']:
             try:
                 os.remove(filename)
             except FileNotFoundError:
@@ -825,23 +2535,174 @@ async def clear_faiss_index():
         logger.error(f"Error clearing FAISS index: {str(e)}")
 
 # Background task to clean up chat sessions related to deleted documents
-async def cleanup_chat_sessions(deleted_chunks):
+async def cleanup_chat_sessions(document_id: str, deleted_chunk_count: int):
     """Clean up chat sessions that reference deleted document chunks"""
     try:
         # This is a placeholder - implement logic to clean up sessions
         # that reference the deleted chunks if needed
-        logger.info(f"Chat cleanup completed for {len(deleted_chunks)} chunks")
+        logger.info(f"Chat cleanup completed for {deleted_chunk_count} chunks of document {document_id}")
     except Exception as e:
         logger.error(f"Error in chat cleanup: {str(e)}")
 
+# Retention and daily rollups
+# user_activities and chat_sessions expire through TTL (or the time-series collection's expireAfterSeconds).
+# Before that, every finished UTC day is aggregated into activity_daily and chat_daily, so analytics survive
+# expiry. rollup_state keeps the last rolled-up day per source; re-running a day overwrites its aggregates.
+def retention_seconds(days: int) -> Optional[int]:
+    if days <= 0:
+        return None
+    return max(days, MIN_RETENTION_DAYS) * 86400
+
+async def ensure_activity_collection():
+    """Create user_activities as a time-series collection when enabled and it does not exist yet"""
+    if not ACTIVITY_TIMESERIES or "user_activities" in await db.list_collection_names():
+        return
+    options = {"timeseries": {"timeField": "timestamp", "metaField": "user_id", "granularity": "minutes"}}
+    expire_after = retention_seconds(ACTIVITY_RETENTION_DAYS)
+    if expire_after:
+        options["expireAfterSeconds"] = expire_after
+    try:
+        await db.create_collection("user_activities", **options)
+        logger.info("Created user_activities as a time-series collection")
+    except Exception as e:
+        logger.warning(f"Time-series collection not available, using a regular collection: {str(e)}")
+
+async def ensure_ttl(collection_name: str, expire_after: Optional[int]):
+    """Create, retune or drop the TTL index on timestamp"""
+    collection = db[collection_name]
+    collection_info = await (await db.list_collections(filter={"name": collection_name})).to_list(1)
+    if collection_info and collection_info[0].get("type") == "timeseries":
+        await db.command("collMod", collection_name, expireAfterSeconds=expire_after or "off")
+        return
+
+    if expire_after is None:
+        try:
+            await collection.drop_index("timestamp_1")
+        except OperationFailure:
+            pass
+        return
+    try:
+        await collection.create_index("timestamp", expireAfterSeconds=expire_after)
+    except OperationFailure:
+        # Existing TTL index with another retention
+        await db.command("collMod", collection_name, index={"keyPattern": {"timestamp": 1}, "expireAfterSeconds": expire_after})
+
+def utc_day_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, value.day)
+
+async def rollup_days(source: str, collection, rollup_day, settle_seconds: float = 0) -> int:
+    """Roll up every finished day after the last rolled-up one, once settle_seconds have passed since its end"""
+    state = await db.rollup_state.find_one({"_id": source})
+    if state:
+        day = state["rolled_up_through"] + timedelta(days=1)
+    else:
+        first = await collection.find_one({}, {"timestamp": 1}, sort=[("timestamp", 1)])
+        if not first:
+            return 0
+        day = utc_day_start(first["timestamp"])
+
+    # Records of a day may still be written after midnight (batched activity logs); wait for them
+    cutoff = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    rolled = 0
+    while day + timedelta(days=1) <= cutoff:
+        await rollup_day(day, day + timedelta(days=1))
+        await db.rollup_state.replace_one({"_id": source}, {"_id": source, "rolled_up_through": day}, upsert=True)
+        day += timedelta(days=1)
+        rolled += 1
+    return rolled
+
+async def rollup_activity_day(start: datetime, end: datetime):
+    date = start.strftime("%Y-%m-%d")
+    async for row in db.user_activities.aggregate([
+        {"$match": {"timestamp": {"$gte": start, "$lt": end}}},
+        {"$group": {"_id": {"user_id": "$user_id", "action": "$action"}, "count": {"$sum": 1}}}
+    ]):
+        key = row["_id"]
+        await db.activity_daily.replace_one(
+            {"_id": f"{date}|{key.get('user_id')}|{key.get('action')}"},
+            {"date": date, "user_id": key.get("user_id"), "action": key.get("action"), "count": row["count"]},
+            upsert=True
+        )
+
+async def rollup_chat_day(start: datetime, end: datetime):
+    date = start.strftime("%Y-%m-%d")
+    day_filter = {"$match": {"timestamp": {"$gte": start, "$lt": end}}}
+    totals = await db.chat_sessions.aggregate([
+        day_filter,
+        {"$group": {
+            "_id": None,
+            "questions": {"$sum": 1},
+            "sessions": {"$addToSet": "$session_id"},
+            "answered_with_sources": {"$sum": {"$cond": [{"$gt": [{"$size": {"$ifNull": ["$source_documents", []]}}, 0]}, 1, 0]}}
+        }}
+    ]).to_list(1)
+    if not totals:
+        return
+    sources = await db.chat_sessions.aggregate([
+        day_filter,
+        {"$unwind": "$source_documents"},
+        {"$group": {"_id": "$source_documents", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}}
+    ]).to_list(None)
+    await db.chat_daily.replace_one(
+        {"_id": date},
+        {
+            "date": date,
+            "questions": totals[0]["questions"],
+            "sessions": len(totals[0]["sessions"]),
+            "answered_with_sources": totals[0]["answered_with_sources"],
+            "sources": [{"filename": row["_id"], "count": row["count"]} for row in sources]
+        },
+        upsert=True
+    )
+
+async def run_rollups():
+    # A batch can wait ACTIVITY_FLUSH_SECONDS in the writer's queue; allow a minute more for a slow insert
+    activity_days = await rollup_days("user_activities", db.user_activities, rollup_activity_day, ACTIVITY_FLUSH_SECONDS + 60)
+    chat_days = await rollup_days("chat_sessions", db.chat_sessions, rollup_chat_day)
+    if activity_days or chat_days:
+        logger.info(f"Rolled up {activity_days} days of activity and {chat_days} days of chat sessions")
+
+async def rollup_loop():
+    while True:
+        await asyncio.sleep(ROLLUP_INTERVAL_SECONDS)
+        try:
+            await run_rollups()
+        except Exception as e:
+            logger.error(f"Rollup error: {str(e)}")
+
+async def apply_retention():
+    """Roll up pending days, then apply TTL; expiry must never remove records that were not rolled up yet"""
+    try:
+        await run_rollups()
+    except Exception as e:
+        logger.error(f"Rollup error, retention not applied: {str(e)}")
+        return
+    try:
+        await ensure_ttl("user_activities", retention_seconds(ACTIVITY_RETENTION_DAYS))
+        await ensure_ttl("chat_sessions", retention_seconds(CHAT_SESSION_RETENTION_DAYS))
+    except Exception as e:
+        logger.error(f"Error applying retention: {str(e)}")
+
 # Ensure database indexes for performance
 async def ensure_indexes():
     """Create database indexes for better query performance"""
     try:
+        # Must precede any index creation, which would create a regular collection
+        await ensure_activity_collection()
+        
         # Documents indexes
         await db.documents.create_index("id")
         await db.documents.create_index("filename")
         await db.documents.create_index("group_id")
+        await db.documents.create_index("content_hash")
+        await db.documents.create_index([("upload_date", -1), ("id", -1)])
+        await db.documents.create_index([("group_id", 1), ("upload_date", -1), ("id", -1)])
+        await db.documents.create_index([("filename", 1), ("id", 1)])
+        
+        # Chunk indexes
+        await db.chunks.create_index([("document_id", 1), ("chunk_index", 1)], unique=True)
+        await db.chunks.create_index("content_hash")
         
         # Chat sessions indexes
         await db.chat_sessions.create_index("session_id")
@@ -874,6 +2735,20 @@ async def ensure_indexes():
         await db.user_activities.create_index("user_id")
         await db.user_activities.create_index([("timestamp", -1)])
         
+        # Daily rollups
+        await db.activity_daily.create_index([("date", -1), ("action", 1)])
+        await db.chat_daily.create_index([("date", -1)])
+        
+        # Ingestion job indexes
+        await db.ingestion_jobs.create_index("id", unique=True)
+        await db.ingestion_jobs.create_index([("status", 1), ("available_at", 1), ("created_at", 1)])
+        await db.ingestion_jobs.create_index([("status", 1), ("lease_until", 1)])
+        await db.ingestion_jobs.create_index("filename")
+        
+        # Resumable upload session indexes
+        await db.upload_sessions.create_index("id", unique=True)
+        await db.upload_sessions.create_index([("status", 1), ("expires_at", 1)])
+        
         logger.info("Database indexes ensured")
     except Exception as e:
         logger.error(f"Error creating indexes: {str(e)}")
@@ -887,17 +2762,11 @@ async def root():
 @api_router.get("/status", response_model=SystemStatus)
 async def get_system_status():
     try:
-        # Count documents
-        total_documents = await db.documents.count_documents({})
-        
-        # Count groups
-        total_groups = await db.groups.count_documents({})
-        
-        # Count total chunks
-        total_chunks = 0
-        async for doc in db.documents.find():
-            chunks = doc.get('chunks', [])
-            total_chunks += len(chunks)
+        # Counts from the incrementally maintained statistics document
+        stats = await get_document_stats()
+        total_documents = stats["total_documents"]
+        total_groups = stats["total_groups"]
+        total_chunks = stats["total_chunks"]
         
         # Check if models are loaded
         embedding_model_loaded = sentence_model is not None
@@ -909,88 +2778,1007 @@ async def get_system_status():
             total_groups=total_groups,
             embedding_model_loaded=embedding_model_loaded,
             faiss_index_ready=faiss_index_ready,
-            supported_formats=['.doc', '.docx'],
-            processing_queue=0
+            supported_formats=get_supported_formats(),
+            processing_queue=await get_ingestion_queue_depth(),
+            file_type_counts={f".{file_type}": count for file_type, count in stats.get("file_types", {}).items() if count},
+            activity_log=activity_log_writer.stats(),
+            answer_cache=answer_cache.stats()
+        )
+    except Exception as e:
+        logger.error(f"Error getting system status: {str(e)}")
+        return SystemStatus(
+            total_documents=0,
+            total_chunks=0,
+            total_groups=0,
+            embedding_model_loaded=False,
+            faiss_index_ready=False
+        )
+
+# Document listing and statistics read only summary fields; text, chunks and sections stay on the server.
+# Records written before chunk_count was stored fall back to the size of their chunks array, computed by Mongo.
+STORED_CHUNK_COUNT = {"$ifNull": ["$chunk_count", {"$size": {"$ifNull": ["$chunks", []]}}]}
+
+DOCUMENT_SUMMARY_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "filename": 1,
+    "file_type": 1,
+    "file_size": 1,
+    "chunk_count": STORED_CHUNK_COUNT,
+    "upload_date": 1,
+    "group_id": 1,
+    "group_name": 1
+}
+
+def format_file_size(size_bytes: int) -> str:
+    if size_bytes == 0:
+        return "0 B"
+    size_names = ["B", "KB", "MB", "GB"]
+    i = min(int(math.floor(math.log(size_bytes, 1024))), len(size_names) - 1)
+    p = math.pow(1024, i)
+    s = round(size_bytes / p, 2)
+    return f"{s} {size_names[i]}"
+
+async def get_document_statistics(query: Optional[dict] = None) -> dict:
+    """Document count, chunk count and total size in one $group"""
+    pipeline = [
+        {"$match": query or {}},
+        {"$group": {
+            "_id": None,
+            "total_count": {"$sum": 1},
+            "total_chunks": {"$sum": STORED_CHUNK_COUNT},
+            "total_size": {"$sum": {"$ifNull": ["$file_size", 0]}}
+        }}
+    ]
+    results = await db.documents.aggregate(pipeline).to_list(1)
+    if not results:
+        return {"total_count": 0, "total_chunks": 0, "total_size": 0}
+    return {key: results[0][key] for key in ("total_count", "total_chunks", "total_size")}
+
+# Listing statistics per filter, kept for DOCUMENT_STATS_CACHE_SECONDS and dropped whenever documents change
+document_statistics_cache: Dict[str, tuple] = {}
+
+def invalidate_document_statistics():
+    document_statistics_cache.clear()
+
+async def get_cached_document_statistics(query: dict) -> dict:
+    key = json.dumps(query, sort_keys=True, default=str)
+    cached = document_statistics_cache.get(key)
+    if cached and time.monotonic() - cached[0] < DOCUMENT_STATS_CACHE_SECONDS:
+        return cached[1]
+    totals = await get_document_statistics(query)
+    document_statistics_cache[key] = (time.monotonic(), totals)
+    return totals
+
+# Incrementally maintained statistics
+# db.stats holds one document with totals, per-group and per-file-type counters. Every write path applies
+# a $inc delta, so status, listing and group counts are a single read; reconcile_document_stats rebuilds it
+# from the collections at startup and every STATS_RECONCILE_SECONDS to correct any drift.
+DOCUMENT_STATS_ID = "documents"
+UNGROUPED_STATS_KEY = "ungrouped"
+
+def file_type_stats_key(file_type: Optional[str]) -> str:
+    # Field names cannot contain dots
+    return (file_type or "").lstrip('.') or "unknown"
+
+def document_stats_delta(documents: List[dict], sign: int = 1) -> Dict[str, int]:
+    """$inc fields for adding (sign=1) or removing (sign=-1) documents"""
+    delta: Dict[str, int] = {}
+    def add(field: str, value: int):
+        delta[field] = delta.get(field, 0) + value
+    for doc in documents:
+        group_key = f"groups.{doc.get('group_id') or UNGROUPED_STATS_KEY}"
+        chunk_count = doc.get("chunk_count") or 0
+        file_size = doc.get("file_size") or 0
+        add("total_documents", sign)
+        add("total_chunks", sign * chunk_count)
+        add("total_bytes", sign * file_size)
+        add(f"{group_key}.documents", sign)
+        add(f"{group_key}.chunks", sign * chunk_count)
+        add(f"{group_key}.bytes", sign * file_size)
+        add(f"file_types.{file_type_stats_key(doc.get('file_type'))}", sign)
+    return delta
+
+# Group listing with counts, kept for GROUP_LIST_CACHE_SECONDS and dropped on group and document changes
+group_list_cache: Dict[str, Any] = {"expires": 0.0, "groups": None}
+
+def invalidate_group_list():
+    group_list_cache["groups"] = None
+
+async def apply_document_stats(delta: Dict[str, int], unset: Optional[List[str]] = None):
+    """Apply a counter delta; nothing is created before the first reconciliation"""
+    update: Dict[str, Any] = {"$set": {"updated_at": datetime.utcnow()}}
+    if delta:
+        update["$inc"] = delta
+    if unset:
+        update["$unset"] = {field: "" for field in unset}
+    try:
+        await db.stats.update_one({"_id": DOCUMENT_STATS_ID}, update)
+    except Exception as e:
+        logger.error(f"Statistics update failed, waiting for reconciliation: {str(e)}")
+    invalidate_document_statistics()
+    invalidate_group_list()
+
+async def reconcile_document_stats() -> dict:
+    """Recompute the statistics document from the documents and groups collections"""
+    stats = {
+        "_id": DOCUMENT_STATS_ID,
+        "total_documents": 0,
+        "total_chunks": 0,
+        "total_bytes": 0,
+        "total_groups": await db.groups.count_documents({}),
+        "groups": {},
+        "file_types": {},
+        "reconciled_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+    async for row in db.documents.aggregate([
+        {"$group": {
+            "_id": {"group_id": "$group_id", "file_type": "$file_type"},
+            "documents": {"$sum": 1},
+            "chunks": {"$sum": STORED_CHUNK_COUNT},
+            "bytes": {"$sum": {"$ifNull": ["$file_size", 0]}}
+        }}
+    ]):
+        group = stats["groups"].setdefault(row["_id"].get("group_id") or UNGROUPED_STATS_KEY, {"documents": 0, "chunks": 0, "bytes": 0})
+        for field in ("documents", "chunks", "bytes"):
+            group[field] += row[field]
+        file_type = file_type_stats_key(row["_id"].get("file_type"))
+        stats["file_types"][file_type] = stats["file_types"].get(file_type, 0) + row["documents"]
+        stats["total_documents"] += row["documents"]
+        stats["total_chunks"] += row["chunks"]
+        stats["total_bytes"] += row["bytes"]
+
+    await db.stats.replace_one({"_id": DOCUMENT_STATS_ID}, stats, upsert=True)
+    invalidate_document_statistics()
+    invalidate_group_list()
+    return stats
+
+async def get_document_stats() -> dict:
+    stats = await db.stats.find_one({"_id": DOCUMENT_STATS_ID})
+    return stats if stats else await reconcile_document_stats()
+
+async def stats_reconcile_loop():
+    while True:
+        await asyncio.sleep(STATS_RECONCILE_SECONDS)
+        try:
+            await reconcile_document_stats()
+        except Exception as e:
+            logger.error(f"Statistics reconciliation error: {str(e)}")
+
+DOCUMENT_SORT_FIELDS = {"upload_date", "filename"}
+
+def encode_document_cursor(document: dict, sort_by: str) -> str:
+    value = document.get(sort_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([value, document["id"]]).encode('utf-8')).decode('ascii')
+
+def decode_document_cursor(cursor: str, sort_by: str) -> tuple:
+    try:
+        value, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if sort_by == "upload_date":
+            value = datetime.fromisoformat(value)
+        return value, str(document_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Geçersiz sayfa imleci")
+
+def document_keyset_filter(sort_by: str, direction: int, cursor: str) -> dict:
+    """Documents strictly after the cursor in (sort_by, id) order"""
+    value, document_id = decode_document_cursor(cursor, sort_by)
+    operator = "$lt" if direction < 0 else "$gt"
+    return {"$or": [
+        {sort_by: {operator: value}},
+        {sort_by: value, "id": {operator: document_id}}
+    ]}
+
+@api_router.get("/documents", response_model=DocumentListResponse)
+async def list_documents(
+    group_id: Optional[str] = None,
+    filename_prefix: Optional[str] = None,
+    sort_by: str = "upload_date",
+    order: str = "desc",
+    cursor: Optional[str] = None,
+    limit: int = DOCUMENT_PAGE_SIZE,
+    current_user: dict = Depends(require_authenticated)
+):
+    """
+    Keyset-paginated document listing ordered by (sort_by, id). next_cursor is set while more pages remain;
+    filename_prefix is a case-sensitive prefix so the filename index can serve it.
+    """
+    if sort_by not in DOCUMENT_SORT_FIELDS or order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Geçersiz sıralama parametresi")
+    
+    try:
+        # Build query filter
+        query = {}
+        if group_id == "ungrouped":
+            query["group_id"] = None
+        elif group_id:
+            query["group_id"] = group_id
+        if filename_prefix:
+            query["filename"] = {"$regex": f"^{re.escape(filename_prefix)}"}
+        
+        direction = -1 if order == "desc" else 1
+        page_size = min(max(limit, 1), DOCUMENT_PAGE_MAX)
+        page_query = {"$and": [query, document_keyset_filter(sort_by, direction, cursor)]} if cursor else query
+        
+        page = await db.documents.aggregate([
+            {"$match": page_query},
+            {"$sort": {sort_by: direction, "id": direction}},
+            {"$limit": page_size + 1},
+            {"$project": DOCUMENT_SUMMARY_PROJECTION}
+        ]).to_list(page_size + 1)
+        
+        next_cursor = encode_document_cursor(page[page_size - 1], sort_by) if len(page) > page_size else None
+        documents_list = [
+            DocumentInfo(**{**doc, "upload_date": doc.get("upload_date") or datetime.utcnow()})
+            for doc in page[:page_size]
+        ]
+        if filename_prefix:
+            totals = await get_cached_document_statistics(query)
+        else:
+            stats = await get_document_stats()
+            if group_id:
+                group_stats = stats["groups"].get(UNGROUPED_STATS_KEY if group_id == "ungrouped" else group_id, {})
+                totals = {"total_count": group_stats.get("documents", 0), "total_size": group_stats.get("bytes", 0)}
+            else:
+                totals = {"total_count": stats["total_documents"], "total_size": stats["total_bytes"]}
+        
+        # Documents only exist once ingestion has finished; queued and failed uploads live in ingestion_jobs
+        statistics = {
+            "total_count": totals["total_count"],
+            "completed_count": totals["total_count"],
+            "processing_count": 0,
+            "failed_count": 0,
+            "total_size": totals["total_size"],
+            "total_size_human": format_file_size(totals["total_size"])
+        }
+        
+        return DocumentListResponse(
+            documents=documents_list,
+            statistics=statistics,
+            next_cursor=next_cursor
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing documents: {str(e)}")
+        raise HTTPException(status_code=500, detail="Doküman listesi alınamadı")
+
+# Upload spooling: bytes go to disk in fixed-size pieces while size and SHA-256 are computed
+class UploadTooLargeError(Exception):
+    pass
+
+class MultipartLimitError(ValueError):
+    pass
+
+def upload_size_message() -> str:
+    return f"Dosya boyutu {MAX_UPLOAD_MB}MB'dan büyük olamaz"
+
+async def iter_upload_file(file: UploadFile):
+    """Read an UploadFile in UPLOAD_READ_CHUNK_BYTES pieces"""
+    while True:
+        piece = await file.read(UPLOAD_READ_CHUNK_BYTES)
+        if not piece:
+            break
+        yield piece
+
+async def spool_upload_stream(pieces, file_extension: str, max_bytes: Optional[int] = None) -> dict:
+    """
+    Write an async stream of byte pieces to a spool file, hashing as it goes.
+    Raises UploadTooLargeError as soon as max_bytes is exceeded. Returns path, content_hash and size.
+    """
+    max_bytes = max_bytes or MAX_UPLOAD_BYTES
+    sha256 = hashlib.sha256()
+    size = 0
+    fd, spool_path = tempfile.mkstemp(suffix=file_extension, dir=UPLOAD_SPOOL_DIR)
+    os.close(fd)
+
+    try:
+        async with aiofiles.open(spool_path, 'wb') as spool_file:
+            async for piece in pieces:
+                size += len(piece)
+                if size > max_bytes:
+                    raise UploadTooLargeError(upload_size_message())
+                sha256.update(piece)
+                await spool_file.write(piece)
+    except BaseException:
+        remove_spool_file(spool_path)
+        raise
+
+    return {"path": spool_path, "content_hash": sha256.hexdigest(), "size": size}
+
+def remove_spool_file(spool_path: str):
+    try:
+        os.unlink(spool_path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Could not delete spool file: {e}")
+
+# Original file blob store
+# Document records reference their original file by content_hash; the bytes live in BLOB_STORE_DIR under
+# their SHA-256, so identical uploads share one file. Writes and reference-checked deletes are serialized
+# by blob_store_lock so a blob cannot be removed while a document referencing it is being stored.
+blob_store_lock = asyncio.Lock()
+
+def blob_path(content_hash: str) -> Path:
+    return BLOB_STORE_DIR / content_hash[:2] / content_hash
+
+def store_blob(source_path: str, content_hash: str) -> Path:
+    """Copy a file into the blob store unless its content is already there"""
+    target = blob_path(content_hash)
+    if target.exists():
+        return target
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = target.with_name(f"{content_hash}.{uuid.uuid4().hex}.tmp")
+    try:
+        shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, target)
+    finally:
+        remove_spool_file(str(temp_path))
+    return target
+
+def store_blob_bytes(content: bytes, content_hash: str) -> Path:
+    target = blob_path(content_hash)
+    if target.exists():
+        return target
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = target.with_name(f"{content_hash}.{uuid.uuid4().hex}.tmp")
+    try:
+        temp_path.write_bytes(content)
+        os.replace(temp_path, target)
+    finally:
+        remove_spool_file(str(temp_path))
+    return target
+
+async def release_blob(content_hash: Optional[str]):
+    """Delete a blob once no document references it"""
+    if not content_hash:
+        return
+    async with blob_store_lock:
+        if await db.documents.count_documents({"content_hash": content_hash}, limit=1) == 0:
+            remove_spool_file(str(blob_path(content_hash)))
+
+async def release_unreferenced_blobs():
+    """Delete every blob that no document references"""
+    if not BLOB_STORE_DIR.exists():
+        return
+    async with blob_store_lock:
+        referenced = set(await db.documents.distinct("content_hash"))
+        removed = 0
+        for path in BLOB_STORE_DIR.glob('*/*'):
+            if path.name not in referenced and not path.name.endswith('.tmp'):
+                remove_spool_file(str(path))
+                removed += 1
+    if removed:
+        logger.info(f"Removed {removed} unreferenced document blobs")
+
+async def migrate_inline_document_content():
+    """Move base64 file content still stored inline in document records into the blob store"""
+    migrated = 0
+    async for document in db.documents.find({"content": {"$exists": True}}, {"id": 1, "content": 1}):
+        try:
+            content = base64.b64decode(document["content"])
+            content_hash = hashlib.sha256(content).hexdigest()
+            async with blob_store_lock:
+                await asyncio.to_thread(store_blob_bytes, content, content_hash)
+                await db.documents.update_one(
+                    {"id": document["id"]},
+                    {"$set": {"content_hash": content_hash}, "$unset": {"content": ""}}
+                )
+            migrated += 1
+        except Exception as e:
+            logger.error(f"Could not move content of document {document.get('id')} to the blob store: {e}")
+    if migrated:
+        logger.info(f"Moved original content of {migrated} documents to the blob store")
+
+# Streaming bulk upload: multipart parts and ZIP entries are spooled one at a time
+def multipart_limit_message() -> str:
+    return f"Form alanları ve parça başlıkları {MAX_MULTIPART_FIELD_BYTES // 1024}KB'dan büyük olamaz"
+
+class StreamingMultipartReader:
+    """
+    Incremental multipart/form-data reader over the raw request stream.
+    File parts are spooled to disk as their bytes arrive; nothing is buffered beyond one network chunk.
+    Form field values and part header lines over MAX_MULTIPART_FIELD_BYTES raise MultipartLimitError.
+    """
+
+    def __init__(self, content_type: str):
+        _, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise ValueError("Missing boundary in multipart")
+        self.events = []
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self.parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": lambda data, start, end: self.events.append(("data", data[start:end])),
+            "on_part_end": lambda: self.events.append(("end", None)),
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+
+    def _on_part_begin(self):
+        self._disposition = b""
+
+    def _on_header_field(self, data, start, end):
+        self._header_name += data[start:end]
+        if len(self._header_name) > MAX_MULTIPART_FIELD_BYTES:
+            raise MultipartLimitError(multipart_limit_message())
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+        if len(self._header_value) > MAX_MULTIPART_FIELD_BYTES:
+            raise MultipartLimitError(multipart_limit_message())
+
+    def _on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        filename = options.get(b"filename")
+        self.events.append(("begin", (name, filename.decode("utf-8", errors="replace") if filename is not None else None)))
+
+    async def iter_parts(self, stream):
+        """
+        Yield ("field", name, value) for form fields and ("file", filename, spooled) for file parts,
+        where spooled is the spool_upload_stream result or an UploadTooLargeError.
+        """
+        current = None
+        try:
+            async for network_chunk in stream:
+                self.parser.write(network_chunk)
+                events, self.events = self.events, []
+                for kind, payload in events:
+                    if kind == "begin":
+                        name, filename = payload
+                        current = {"name": name, "filename": filename, "data": b"", "writer": None}
+                        if filename is not None:
+                            file_extension = Path(filename).suffix.lower()
+                            max_bytes = MAX_BULK_ARCHIVE_BYTES if file_extension == '.zip' else None
+                            current["writer"] = SpoolWriter(file_extension, max_bytes)
+                            await current["writer"].open()
+                    elif kind == "data":
+                        if current["writer"] is not None:
+                            await current["writer"].write(payload)
+                        else:
+                            current["data"] += payload
+                            if len(current["data"]) > MAX_MULTIPART_FIELD_BYTES:
+                                raise MultipartLimitError(multipart_limit_message())
+                    elif kind == "end":
+                        part, current = current, None
+                        if part["writer"] is not None:
+                            yield "file", part["filename"], await part["writer"].close()
+                        else:
+                            yield "field", part["name"], part["data"].decode("utf-8", errors="replace")
+            self.parser.finalize()
+        finally:
+            # A disconnect mid-part leaves a half-written spool file behind
+            if current is not None and current["writer"] is not None and current["writer"].file is not None:
+                await current["writer"].file.close()
+                remove_spool_file(current["writer"].path)
+
+class SpoolWriter:
+    """Incremental counterpart of spool_upload_stream for producers that push bytes"""
+
+    def __init__(self, file_extension: str, max_bytes: Optional[int] = None):
+        self.file_extension = file_extension
+        self.max_bytes = max_bytes or MAX_UPLOAD_BYTES
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.path = None
+        self.file = None
+        self.error = None
+
+    async def open(self):
+        fd, self.path = tempfile.mkstemp(suffix=self.file_extension, dir=UPLOAD_SPOOL_DIR)
+        os.close(fd)
+        self.file = await aiofiles.open(self.path, 'wb')
+
+    async def write(self, piece: bytes):
+        if self.error is not None:
+            return
+        self.size += len(piece)
+        if self.size > self.max_bytes:
+            # Keep draining the part but stop writing it
+            self.error = UploadTooLargeError(upload_size_message())
+            await self.file.close()
+            remove_spool_file(self.path)
+            return
+        self.sha256.update(piece)
+        await self.file.write(piece)
+
+    async def close(self):
+        if self.error is not None:
+            return self.error
+        await self.file.close()
+        return {"path": self.path, "content_hash": self.sha256.hexdigest(), "size": self.size}
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body generator is still reading the request. Starlette's disconnect listener
+    would consume request body messages, so it is left out; a disconnect surfaces from request.stream().
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def spool_zip_entry(archive: zipfile.ZipFile, entry: zipfile.ZipInfo, file_extension: str) -> dict:
+    """Decompress one archive entry to a spool file in pieces, enforcing the per-file size limit"""
+    if entry.file_size > MAX_UPLOAD_BYTES:
+        raise UploadTooLargeError(upload_size_message())
+
+    sha256 = hashlib.sha256()
+    size = 0
+    fd, spool_path = tempfile.mkstemp(suffix=file_extension, dir=UPLOAD_SPOOL_DIR)
+    try:
+        with os.fdopen(fd, 'wb') as spool_file, archive.open(entry) as source:
+            while True:
+                piece = source.read(UPLOAD_READ_CHUNK_BYTES)
+                if not piece:
+                    break
+                size += len(piece)
+                # The declared size can lie; check what is actually decompressed
+                if size > MAX_UPLOAD_BYTES:
+                    raise UploadTooLargeError(upload_size_message())
+                sha256.update(piece)
+                spool_file.write(piece)
+    except BaseException:
+        remove_spool_file(spool_path)
+        raise
+
+    return {"path": spool_path, "content_hash": sha256.hexdigest(), "size": size}
+
+async def iter_zip_uploads(archive_path: str, skip: int = 0):
+    """Yield (filename, spooled or error) for every document entry of a spooled ZIP archive after the first skip"""
+    loop = asyncio.get_running_loop()
+    try:
+        archive = zipfile.ZipFile(archive_path)
+    except zipfile.BadZipFile:
+        yield Path(archive_path).name, ValueError("ZIP arşivi okunamadı")
+        return
+
+    with archive:
+        for entry in archive.infolist():
+            filename = Path(entry.filename).name
+            if entry.is_dir() or not filename or entry.filename.startswith('__MACOSX/') or filename.startswith('.'):
+                continue
+            if skip > 0:
+                skip -= 1
+                continue
+            file_extension = resolve_file_extension(filename)
+            if file_extension is None:
+                yield filename, ValueError(unsupported_format_message())
+                continue
+            try:
+                yield filename, await loop.run_in_executor(None, spool_zip_entry, archive, entry, file_extension)
+            except Exception as e:
+                yield filename, e
+
+# Durable ingestion job queue
+# Uploads are moved into INGEST_JOB_DIR and recorded in db.ingestion_jobs. Workers claim jobs with a lease,
+# so jobs held by a worker that died are picked up again once the lease expires.
+INGEST_JOB_STAGES = ["extract", "chunk", "embed", "index"]
+ingestion_job_event = asyncio.Event()
+ingestion_workers: List[asyncio.Task] = []
+maintenance_tasks: List[asyncio.Task] = []
+
+class IngestionAdmission:
+    """
+    Process-wide admission control for ingestion. INGEST_JOB_WORKERS workers are the concurrency cap,
+    at most INGEST_QUEUE_MAX_JOBS jobs may be queued or running, and further uploads are refused with 429
+    and a Retry-After estimate. Ingestion runs on niced threads and pauses between embedding slices while
+    interactive requests are in flight.
+    """
+
+    def __init__(self, max_jobs: int, workers: int):
+        self.max_jobs = max_jobs
+        self.workers = max(workers, 1)
+        self.average_job_seconds = 10.0
+        self._interactive = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingestion", initializer=self._lower_thread_priority)
+
+    @staticmethod
+    def _lower_thread_priority():
+        # Per-thread niceness is Linux behaviour; elsewhere PRIO_PROCESS would apply to the whole process
+        if sys.platform.startswith('linux'):
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), INGEST_NICE)
+            except (AttributeError, OSError):
+                pass
+
+    def retry_after(self, queue_depth: int) -> int:
+        return max(1, int(queue_depth * self.average_job_seconds / self.workers))
+
+    async def admit(self, count: int = 1):
+        """Raise 429 if count more jobs would overflow the queue"""
+        queue_depth = await get_ingestion_queue_depth()
+        if queue_depth + count > self.max_jobs:
+            raise HTTPException(
+                status_code=429,
+                detail="İşlem kuyruğu dolu, lütfen daha sonra tekrar deneyin",
+                headers={"Retry-After": str(self.retry_after(queue_depth))}
+            )
+
+    def record_jobs(self, job_count: int, seconds: float):
+        if job_count:
+            self.average_job_seconds = 0.8 * self.average_job_seconds + 0.2 * (seconds / job_count)
+
+    def begin_interactive(self):
+        with self._lock:
+            self._interactive += 1
+            self._idle.clear()
+
+    def end_interactive(self):
+        with self._lock:
+            self._interactive -= 1
+            if self._interactive == 0:
+                self._idle.set()
+
+    async def interactive(self):
+        """Dependency for interactive endpoints: ingestion yields while the request is handled"""
+        self.begin_interactive()
+        try:
+            yield
+        finally:
+            self.end_interactive()
+
+    def yield_to_interactive(self):
+        """Called from ingestion threads between units of work; waits a bounded time so ingestion never starves"""
+        try:
+            asyncio.get_running_loop()
+            return  # Never block the event loop, e.g. during an index rebuild
+        except RuntimeError:
+            pass
+        self._idle.wait(timeout=INGEST_YIELD_MAX_SECONDS)
+
+ingestion_admission = IngestionAdmission(INGEST_QUEUE_MAX_JOBS, INGEST_JOB_WORKERS)
+
+async def get_group_name(group_id: Optional[str]) -> Optional[str]:
+    if not group_id:
+        return None
+    group_doc = await db.groups.find_one({"id": group_id})
+    return group_doc["name"] if group_doc else None
+
+async def find_active_upload(filename: str) -> Optional[str]:
+    """Error message if a document or an unfinished ingestion job already uses the filename"""
+    if await db.documents.find_one({"filename": filename}, {"_id": 1}):
+        return "Bu isimde dosya zaten mevcut"
+    if await db.ingestion_jobs.find_one({"filename": filename, "status": {"$in": ["queued", "running"]}}, {"_id": 1}):
+        return "Bu isimde bir dosya zaten işleniyor"
+    return None
+
+async def enqueue_ingestion_job(spooled: dict, filename: str, file_extension: str,
+                                group_id: Optional[str] = None, user_id: Optional[str] = None) -> dict:
+    """Take ownership of a spooled upload and queue it for ingestion. Returns the job record."""
+    job_id = str(uuid.uuid4())
+    job_path = INGEST_JOB_DIR / f"{job_id}{file_extension}"
+    try:
+        INGEST_JOB_DIR.mkdir(parents=True, exist_ok=True)
+        await asyncio.get_running_loop().run_in_executor(None, shutil.move, spooled["path"], str(job_path))
+    except Exception:
+        remove_spool_file(spooled["path"])
+        raise
+
+    now = datetime.utcnow()
+    job = {
+        "id": job_id,
+        "status": "queued",
+        "stage": INGEST_JOB_STAGES[0],
+        "filename": filename,
+        "file_type": file_extension,
+        "file_size": spooled["size"],
+        "content_hash": spooled["content_hash"],
+        "file_path": str(job_path),
+        "group_id": group_id,
+        "group_name": await get_group_name(group_id),
+        "document_id": str(uuid.uuid4()),
+        "chunk_count": 0,
+        "attempts": 0,
+        "max_attempts": INGEST_JOB_MAX_ATTEMPTS,
+        "error": None,
+        "created_by": user_id,
+        "created_at": now,
+        "updated_at": now,
+        "available_at": now,
+        "lease_until": None,
+        "finished_at": None
+    }
+    try:
+        await db.ingestion_jobs.insert_one(job)
+    except Exception:
+        remove_spool_file(str(job_path))
+        raise
+
+    ingestion_job_event.set()
+    job.pop("_id", None)
+    return job
+
+async def claim_ingestion_job(max_file_size: Optional[int] = None) -> Optional[dict]:
+    """Atomically take the oldest runnable job: queued and due, or running with an expired lease"""
+    now = datetime.utcnow()
+    query = {"$or": [
+        {"status": "queued", "available_at": {"$lte": now}},
+        {"status": "running", "lease_until": {"$lt": now}}
+    ]}
+    if max_file_size is not None:
+        query["file_size"] = {"$lte": max_file_size}
+    return await db.ingestion_jobs.find_one_and_update(
+        query,
+        {
+            "$set": {
+                "status": "running",
+                "stage": INGEST_JOB_STAGES[0],
+                "claim_token": uuid.uuid4().hex,
+                "lease_until": now + timedelta(seconds=INGEST_JOB_LEASE_SECONDS),
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+class IngestionLeaseLost(Exception):
+    """The job's lease expired and another worker claimed it"""
+
+async def update_ingestion_job(job: dict, **fields) -> bool:
+    """Update a claimed job; False if the claim has passed to another worker"""
+    fields["updated_at"] = datetime.utcnow()
+    result = await db.ingestion_jobs.update_one({"id": job["id"], "claim_token": job.get("claim_token")}, {"$set": fields})
+    return result.matched_count == 1
+
+async def ingestion_lease_heartbeat(jobs: List[dict]):
+    """Renew the leases of claimed jobs while they run, however long a single stage takes"""
+    while True:
+        await asyncio.sleep(INGEST_JOB_LEASE_SECONDS / 3)
+        lease_until = datetime.utcnow() + timedelta(seconds=INGEST_JOB_LEASE_SECONDS)
+        for job in jobs:
+            await update_ingestion_job(job, lease_until=lease_until)
+
+def job_progress_reporter(job: dict, loop) -> Callable[[str, int], None]:
+    """Progress callback for the ingestion thread"""
+    def report_progress(stage: str, chunk_count: int):
+        asyncio.run_coroutine_threadsafe(update_ingestion_job(job, stage=stage, chunk_count=chunk_count), loop)
+    return report_progress
+
+def job_document_info(job: dict) -> dict:
+    return {
+        "document_id": job["document_id"],
+        "filename": job["filename"],
+        "group_id": job["group_id"],
+        "group_name": job["group_name"]
+    }
+
+def build_document_record(document_info: dict, file_extension: str, file_size: int, content_hash: str, prepared: dict) -> dict:
+    """Document record for db.documents from ingestion output; the original file is in the blob store under content_hash"""
+    return {
+        "id": document_info["document_id"],
+        "filename": document_info["filename"],
+        "file_type": file_extension,
+        "file_size": file_size,
+        "content_hash": content_hash,
+        "text_compressed": compress_text(prepared['text']),
+        "text_length": len(prepared['text']),
+        "sections": prepared['sections'],
+        "chunk_count": len(prepared['chunks']),
+        "upload_date": datetime.utcnow(),
+        "group_id": document_info["group_id"],
+        "group_name": document_info["group_name"]
+    }
+
+async def complete_ingestion_job(job: dict, prepared: dict):
+    """Store the document record of an indexed job and mark the job completed"""
+    chunks = prepared['chunks']
+    if not await update_ingestion_job(job, lease_until=datetime.utcnow() + timedelta(seconds=INGEST_JOB_LEASE_SECONDS)):
+        raise IngestionLeaseLost()
+    document = build_document_record(job_document_info(job), job["file_type"], job["file_size"], job["content_hash"], prepared)
+
+    # Chunks go first so a visible document always has its chunk records
+    await replace_chunk_records(job["document_id"], build_chunk_records(job["document_id"], prepared))
+
+    async with blob_store_lock:
+        await asyncio.to_thread(store_blob, job["file_path"], job["content_hash"])
+        # Upsert on the job's document id so a retry after a crash cannot store the document twice
+        result = await db.documents.replace_one({"id": job["document_id"]}, document, upsert=True)
+    document_text_cache.discard(job["document_id"])
+    # A retried job replaces the chunks of a document that answers may already cite
+    answer_cache.invalidate_documents([job["document_id"]])
+    if result.upserted_id is not None:
+        await apply_document_stats(document_stats_delta([document]))
+
+    await update_ingestion_job(
+        job,
+        status="completed",
+        stage="done",
+        chunk_count=len(chunks),
+        error=None,
+        lease_until=None,
+        finished_at=datetime.utcnow()
+    )
+    remove_spool_file(job["file_path"])
+
+    if job.get("created_by"):
+        log_user_activity(
+            job["created_by"],
+            "document_upload",
+            f"Uploaded document: {job['filename']} ({len(chunks)} chunks)"
         )
-    except Exception as e:
-        logger.error(f"Error getting system status: {str(e)}")
-        return SystemStatus(
-            total_documents=0,
-            total_chunks=0,
-            total_groups=0,
-            embedding_model_loaded=False,
-            faiss_index_ready=False
+
+async def fail_ingestion_job(job: dict, error: Exception) -> bool:
+    """
+    Schedule a retry with exponential backoff, or dead-letter the job once its attempts are used up.
+    False if the job has meanwhile been claimed by another worker and was left alone.
+    """
+    logger.error(f"Ingestion job {job['id']} ({job['filename']}) attempt {job['attempts']} failed: {str(error)}")
+
+    if job["attempts"] >= job["max_attempts"]:
+        return await update_ingestion_job(job, status="dead_letter", error=str(error), lease_until=None, finished_at=datetime.utcnow())
+    else:
+        retry_delay = INGEST_JOB_RETRY_SECONDS * 2 ** (job["attempts"] - 1)
+        return await update_ingestion_job(
+            job,
+            status="queued",
+            error=str(error),
+            lease_until=None,
+            available_at=datetime.utcnow() + timedelta(seconds=retry_delay)
         )
 
-@api_router.get("/documents", response_model=DocumentListResponse)
-async def list_documents(group_id: Optional[str] = None, current_user: dict = Depends(require_authenticated)):
+async def run_ingestion_jobs(jobs: List[dict]):
+    """
+    Run claimed jobs through extract -> chunk -> embed -> index and record each outcome.
+    A single job streams through ingest_document_file; several jobs share one coalesced index update.
+    """
+    runnable = []
+    for job in jobs:
+        if job["attempts"] > job["max_attempts"]:
+            await fail_ingestion_job(job, Exception("Deneme sayısı aşıldı"))
+        else:
+            runnable.append(job)
+    if not runnable:
+        return
+
+    # Earlier attempts may have indexed the document before failing
+    retried = [job["document_id"] for job in runnable if job["attempts"] > 1]
+    if retried:
+        await drop_documents_from_index(retried)
+
+    # Leases are renewed while the batch waits for a running rebuild, too
+    heartbeat = asyncio.create_task(ingestion_lease_heartbeat(runnable))
     try:
-        # Build query filter
-        query = {}
-        if group_id:
-            query["group_id"] = group_id
-        
-        # Get documents
-        documents_list = []
-        total_size = 0
-        completed_count = 0
-        processing_count = 0
-        failed_count = 0
-        
-        async for doc in db.documents.find(query):
-            doc_info = DocumentInfo(
-                id=doc["id"],
-                filename=doc["filename"],
-                file_type=doc.get("file_type", ""),
-                file_size=doc.get("file_size", 0),
-                chunk_count=len(doc.get("chunks", [])),
-                upload_date=doc.get("upload_date", datetime.utcnow()),
-                group_id=doc.get("group_id"),
-                group_name=doc.get("group_name")
-            )
-            documents_list.append(doc_info)
-            
-            # Statistics
-            file_size = doc.get("file_size", 0)
-            total_size += file_size
-            
-            # Assume all documents are completed for now
-            completed_count += 1
-        
-        # Format total size
-        def format_file_size(size_bytes):
-            if size_bytes == 0:
-                return "0 B"
-            size_names = ["B", "KB", "MB", "GB"]
-            import math
-            i = int(math.floor(math.log(size_bytes, 1024)))
-            p = math.pow(1024, i)
-            s = round(size_bytes / p, 2)
-            return f"{s} {size_names[i]}"
-        
-        total_size_human = format_file_size(total_size)
-        
-        statistics = {
-            "total_count": len(documents_list),
-            "completed_count": completed_count,
-            "processing_count": processing_count,
-            "failed_count": failed_count,
-            "total_size": total_size,
-            "total_size_human": total_size_human
-        }
-        
-        return DocumentListResponse(
-            documents=documents_list,
-            statistics=statistics
-        )
+        # Held until the outcomes are recorded, so a rebuild sees these chunk records or runs before they are indexed
+        async with index_rebuild_gate.shared():
+            failed_documents = await run_claimed_jobs(runnable)
+    finally:
+        heartbeat.cancel()
+
+    if failed_documents:
+        # Chunks indexed for failed jobs have no document record
+        await drop_documents_from_index(failed_documents)
+    await rebuild_index_if_requested()
+
+async def run_claimed_jobs(runnable: List[dict]) -> List[str]:
+    """Index the jobs and record each outcome; returns the documents of jobs marked failed"""
+    loop = asyncio.get_running_loop()
+    failed_documents = []
+    started = loop.time()
+    try:
+        if len(runnable) == 1:
+            job = runnable[0]
+            results = [await loop.run_in_executor(
+                ingestion_admission.executor, ingest_document_file, job["file_path"], job["file_type"], job["content_hash"],
+                job_document_info(job), job_progress_reporter(job, loop)
+            )]
+        else:
+            items = [{
+                "file_path": job["file_path"],
+                "file_extension": job["file_type"],
+                "content_hash": job["content_hash"],
+                "document_info": job_document_info(job),
+                "progress": job_progress_reporter(job, loop)
+            } for job in runnable]
+            results = await loop.run_in_executor(ingestion_admission.executor, ingest_document_batch, items)
     except Exception as e:
-        logger.error(f"Error listing documents: {str(e)}")
-        raise HTTPException(status_code=500, detail="Doküman listesi alınamadı")
+        results = [e] * len(runnable)
+    ingestion_admission.record_jobs(len(runnable), loop.time() - started)
+
+    for job, result in zip(runnable, results):
+        try:
+            if isinstance(result, Exception):
+                raise result
+            await complete_ingestion_job(job, result)
+        except IngestionLeaseLost:
+            # The new owner re-indexes the document, replacing these entries
+            logger.warning(f"Ingestion job {job['id']} ({job['filename']}) was claimed by another worker")
+        except Exception as e:
+            if await fail_ingestion_job(job, e):
+                failed_documents.append(job["document_id"])
+    return failed_documents
+
+async def claim_ingestion_batch() -> List[dict]:
+    """
+    Claim up to INGEST_COALESCE_MAX_JOBS runnable jobs totalling at most INGEST_COALESCE_MAX_BYTES
+    (the first job is always taken). After the first one, keep collecting jobs that arrive within
+    INGEST_COALESCE_WINDOW_SECONDS so bulk uploads and bursts of single uploads share one index update.
+    """
+    job = await claim_ingestion_job()
+    if job is None:
+        return []
+
+    jobs = [job]
+    batch_bytes = job.get("file_size", 0)
+    deadline = asyncio.get_running_loop().time() + INGEST_COALESCE_WINDOW_SECONDS
+    while len(jobs) < INGEST_COALESCE_MAX_JOBS and batch_bytes < INGEST_COALESCE_MAX_BYTES:
+        job = await claim_ingestion_job(max_file_size=INGEST_COALESCE_MAX_BYTES - batch_bytes)
+        if job is not None:
+            jobs.append(job)
+            batch_bytes += job.get("file_size", 0)
+            continue
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            break
+        ingestion_job_event.clear()
+        try:
+            await asyncio.wait_for(ingestion_job_event.wait(), timeout=remaining)
+        except asyncio.TimeoutError:
+            break
+    return jobs
+
+async def ingestion_worker(worker_index: int):
+    """Claim and run batches of ingestion jobs until cancelled"""
+    while True:
+        try:
+            jobs = await claim_ingestion_batch()
+            if not jobs:
+                ingestion_job_event.clear()
+                try:
+                    await asyncio.wait_for(ingestion_job_event.wait(), timeout=INGEST_JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            logger.info(f"Ingestion worker {worker_index} running {len(jobs)} job(s): {', '.join(job['filename'] for job in jobs)}")
+            try:
+                await run_ingestion_jobs(jobs)
+            except asyncio.CancelledError:
+                # Shutting down: hand the jobs back without charging the attempt
+                await db.ingestion_jobs.update_many(
+                    {"$or": [{"id": job["id"], "claim_token": job.get("claim_token")} for job in jobs], "status": "running"},
+                    {"$set": {"status": "queued", "lease_until": None, "available_at": datetime.utcnow()}, "$inc": {"attempts": -1}}
+                )
+                raise
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ingestion worker {worker_index} error: {str(e)}")
+            await asyncio.sleep(INGEST_JOB_POLL_SECONDS)
+
+def start_ingestion_workers():
+    for worker_index in range(INGEST_JOB_WORKERS):
+        ingestion_workers.append(asyncio.create_task(ingestion_worker(worker_index)))
+    logger.info(f"Started {INGEST_JOB_WORKERS} ingestion workers")
+
+async def get_ingestion_queue_depth() -> int:
+    return await db.ingestion_jobs.count_documents({"status": {"$in": ["queued", "running"]}})
 
 @api_router.post("/bulk-upload-documents")
 async def bulk_upload_documents(
     upload_request: BulkUploadRequest,
-    background_tasks: BackgroundTasks,
     current_user: dict = Depends(require_editor_or_admin)
 ):
     """
@@ -1014,18 +3802,20 @@ async def bulk_upload_documents(
         if total_files > 50:  # Limit for performance
             raise HTTPException(status_code=400, detail="Tek seferde maksimum 50 dosya yüklenebilir")
         
+        await ingestion_admission.admit()
+        
         # Process files concurrently
         async def process_single_file(file_data: BulkUploadFile) -> BulkUploadStatus:
             try:
                 # Validate file
                 filename = file_data.filename
-                file_extension = Path(filename).suffix.lower()
+                file_extension = resolve_file_extension(filename)
                 
-                if file_extension not in ['.doc', '.docx']:
+                if file_extension is None:
                     return BulkUploadStatus(
                         filename=filename,
                         status="error",
-                        message="Sadece .doc ve .docx formatındaki dosyalar desteklenir"
+                        message=unsupported_format_message()
                     )
                 
                 # Decode base64 content
@@ -1038,94 +3828,45 @@ async def bulk_upload_documents(
                         message="Dosya içeriği decode edilemedi"
                     )
                 
-                # Check file size (limit to 10MB per file)
-                if len(file_content) > 10 * 1024 * 1024:
+                # Check file size
+                if len(file_content) > MAX_UPLOAD_BYTES:
                     return BulkUploadStatus(
                         filename=filename,
                         status="error",
-                        message="Dosya boyutu 10MB'dan büyük olamaz"
+                        message=upload_size_message()
                     )
                 
-                # Check if file already exists
-                existing_doc = await db.documents.find_one({"filename": filename})
-                if existing_doc:
+                # Check if file already exists or is being processed
+                conflict = await find_active_upload(filename)
+                if conflict:
                     return BulkUploadStatus(
                         filename=filename,
                         status="error",
-                        message="Bu isimde dosya zaten mevcut"
+                        message=conflict
                     )
                 
-                # Create temporary file
-                with tempfile.NamedTemporaryFile(suffix=file_extension, delete=False) as temp_file:
-                    temp_file.write(file_content)
-                    temp_file_path = temp_file.name
+                # Spool the content and queue it for ingestion if the queue has room
+                await ingestion_admission.admit()
+                group_id = file_data.group_id or upload_request.group_id
+                async def single_piece():
+                    yield file_content
+                spooled = await spool_upload_stream(single_piece(), file_extension)
+                job = await enqueue_ingestion_job(spooled, filename, file_extension, group_id, current_user["id"])
                 
-                try:
-                    # Extract text
-                    text = extract_text_from_document(temp_file_path, file_extension)
-                    
-                    if not text.strip():
-                        return BulkUploadStatus(
-                            filename=filename,
-                            status="error",
-                            message="Dosyadan metin çıkarılamadı"
-                        )
-                    
-                    # Create chunks
-                    chunks = create_chunks(text)
-                    
-                    # Get group info
-                    group_id = file_data.group_id or upload_request.group_id
-                    group_name = None
-                    
-                    if group_id:
-                        group_doc = await db.groups.find_one({"id": group_id})
-                        if group_doc:
-                            group_name = group_doc["name"]
-                    
-                    # Create document
-                    document_id = str(uuid.uuid4())
-                    document = {
-                        "id": document_id,
-                        "filename": filename,
-                        "file_type": file_extension,
-                        "file_size": len(file_content),
-                        "content": base64.b64encode(file_content).decode('utf-8'),
-                        "text": text,
-                        "chunks": chunks,
-                        "chunk_count": len(chunks),
-                        "upload_date": datetime.utcnow(),
-                        "group_id": group_id,
-                        "group_name": group_name
-                    }
-                    
-                    # Save to database
-                    await db.documents.insert_one(document)
-                    
-                    # Update FAISS index in background
-                    background_tasks.add_task(
-                        update_faiss_index, 
-                        chunks, 
-                        document_id, 
-                        filename, 
-                        group_id, 
-                        group_name
-                    )
-                    
-                    return BulkUploadStatus(
-                        filename=filename,
-                        status="success",
-                        message=f"Başarıyla yüklendi ({len(chunks)} parça)",
-                        document_id=document_id
-                    )
-                    
-                finally:
-                    # Clean up temp file
-                    try:
-                        os.unlink(temp_file_path)
-                    except:
-                        pass
+                return BulkUploadStatus(
+                    filename=filename,
+                    status="queued",
+                    message="İşlem kuyruğuna alındı",
+                    document_id=job['document_id'],
+                    job_id=job['id']
+                )
                         
+            except HTTPException as e:
+                return BulkUploadStatus(
+                    filename=filename,
+                    status="error",
+                    message=e.detail
+                )
             except Exception as e:
                 logger.error(f"Error processing {filename}: {str(e)}")
                 return BulkUploadStatus(
@@ -1134,8 +3875,8 @@ async def bulk_upload_documents(
                     message=f"İşleme hatası: {str(e)}"
                 )
         
-        # Process all files concurrently (with semaphore to limit concurrency)
-        semaphore = asyncio.Semaphore(5)  # Limit to 5 concurrent processes
+        # Spool and queue files concurrently; extraction itself is capped globally by the ingestion workers
+        semaphore = asyncio.Semaphore(BULK_UPLOAD_CONCURRENCY)
         
         async def process_with_semaphore(file_data):
             async with semaphore:
@@ -1157,7 +3898,7 @@ async def bulk_upload_documents(
                 failed_uploads += 1
             else:
                 final_results.append(result)
-                if result.status == "success":
+                if result.status in ("success", "queued"):
                     successful_uploads += 1
                 else:
                     failed_uploads += 1
@@ -1166,11 +3907,11 @@ async def bulk_upload_documents(
         processing_time = (datetime.utcnow() - start_time).total_seconds()
         
         # Log activity
-        asyncio.create_task(log_user_activity(
+        log_user_activity(
             current_user["id"],
             "bulk_document_upload",
             f"Bulk upload: {successful_uploads}/{total_files} successful"
-        ))
+        )
         
         return BulkUploadResponse(
             total_files=total_files,
@@ -1186,116 +3927,600 @@ async def bulk_upload_documents(
         logger.error(f"Bulk upload error: {str(e)}")
         raise HTTPException(status_code=500, detail="Toplu yükleme sırasında hata oluştu")
 
+@api_router.post("/bulk-upload-files")
+async def bulk_upload_files(
+    request: Request,
+    group_id: Optional[str] = None,
+    current_user: dict = Depends(require_editor_or_admin)
+):
+    """
+    Streaming bulk upload. Accepts multipart/form-data with any number of file parts (ZIP parts are expanded)
+    or a raw application/zip body. Each file is ingested as soon as it is spooled and one NDJSON status
+    line is streamed back per file, followed by a summary line.
+    """
+    content_type = request.headers.get("content-type", "")
+    reader = None
+    if content_type.startswith("multipart/form-data"):
+        try:
+            reader = StreamingMultipartReader(content_type)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Geçersiz multipart isteği")
+    elif content_type.split(";")[0].strip() not in ("application/zip", "application/x-zip-compressed"):
+        raise HTTPException(status_code=400, detail="Multipart form veya ZIP arşivi bekleniyor")
+
+    # Refuse the whole request up front when the ingestion queue is already full
+    await ingestion_admission.admit()
+
+    async def iter_archive(archive, target_group_id):
+        try:
+            async for filename, spooled in iter_zip_uploads(archive["path"]):
+                yield filename, spooled, target_group_id
+        finally:
+            remove_spool_file(archive["path"])
+
+    async def iter_uploads():
+        """Yield (filename, spooled or error, group_id) in arrival order"""
+        if reader is None:
+            try:
+                archive = await spool_upload_stream(request.stream(), '.zip', MAX_BULK_ARCHIVE_BYTES)
+            except UploadTooLargeError:
+                yield "archive.zip", UploadTooLargeError(f"ZIP arşivi {MAX_BULK_ARCHIVE_BYTES // (1024 * 1024)}MB'dan büyük olamaz"), group_id
+                return
+            async for item in iter_archive(archive, group_id):
+                yield item
+            return
+
+        # A group_id form field applies to the file parts that follow it
+        current_group_id = group_id
+        async for kind, name, value in reader.iter_parts(request.stream()):
+            if kind == "field":
+                if name == "group_id":
+                    current_group_id = value or None
+            elif name.lower().endswith('.zip') and isinstance(value, dict):
+                async for item in iter_archive(value, current_group_id):
+                    yield item
+            else:
+                yield name, value, current_group_id
+
+    uploads = iter_uploads()
+    first_upload = None
+    try:
+        # Oversized form fields usually precede the first file, so they are refused before the response starts
+        first_upload = await uploads.__anext__()
+    except StopAsyncIteration:
+        pass
+    except MultipartLimitError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError:
+        # python-multipart parse errors, including its own header size limit
+        raise HTTPException(status_code=400, detail="Geçersiz multipart isteği")
+
+    async def resumed_uploads():
+        if first_upload is not None:
+            yield first_upload
+            async for item in uploads:
+                yield item
+
+    async def process_upload(filename: str, spooled, target_group_id: Optional[str]) -> BulkUploadStatus:
+        if isinstance(spooled, Exception):
+            return BulkUploadStatus(filename=filename, status="error", message=str(spooled))
+        try:
+            file_extension = resolve_file_extension(filename)
+            if file_extension is None:
+                remove_spool_file(spooled["path"])
+                return BulkUploadStatus(filename=filename, status="error", message=unsupported_format_message())
+
+            conflict = await find_active_upload(filename)
+            if conflict:
+                remove_spool_file(spooled["path"])
+                return BulkUploadStatus(filename=filename, status="error", message=conflict)
+
+            await ingestion_admission.admit()
+
+            job = await enqueue_ingestion_job(spooled, filename, file_extension, target_group_id, current_user["id"])
+            return BulkUploadStatus(
+                filename=filename,
+                status="queued",
+                message="İşlem kuyruğuna alındı",
+                document_id=job['document_id'],
+                job_id=job['id']
+            )
+        except HTTPException as e:
+            remove_spool_file(spooled["path"])
+            return BulkUploadStatus(filename=filename, status="error", message=e.detail)
+        except Exception as e:
+            remove_spool_file(spooled["path"])
+            logger.error(f"Error processing {filename}: {str(e)}")
+            return BulkUploadStatus(filename=filename, status="error", message=f"İşleme hatası: {str(e)}")
+
+    async def stream_results():
+        start_time = datetime.utcnow()
+        semaphore = asyncio.Semaphore(BULK_UPLOAD_CONCURRENCY)
+        pending = set()
+        counts = {"total": 0, "success": 0, "error": 0}
+
+        async def run(filename, spooled, target_group_id):
+            try:
+                return await process_upload(filename, spooled, target_group_id)
+            finally:
+                semaphore.release()
+
+        def status_line(result: BulkUploadStatus) -> str:
+            counts["success" if result.status in ("success", "queued") else "error"] += 1
+            return result.model_dump_json() + "\n"
+
+        def finished_lines():
+            for task in [task for task in pending if task.done()]:
+                pending.discard(task)
+                yield status_line(task.result())
+
+        try:
+            async for filename, spooled, target_group_id in resumed_uploads():
+                counts["total"] += 1
+                if counts["total"] > BULK_UPLOAD_MAX_FILES:
+                    if isinstance(spooled, dict):
+                        remove_spool_file(spooled["path"])
+                    yield status_line(BulkUploadStatus(
+                        filename=filename,
+                        status="error",
+                        message=f"Tek seferde maksimum {BULK_UPLOAD_MAX_FILES} dosya yüklenebilir"
+                    ))
+                    continue
+
+                # Stop reading the request while the concurrency limit is reached
+                await semaphore.acquire()
+                pending.add(asyncio.create_task(run(filename, spooled, target_group_id)))
+                for line in finished_lines():
+                    yield line
+        except Exception as e:
+            logger.error(f"Bulk upload stream error: {str(e)}")
+            counts["total"] += 1
+            yield status_line(BulkUploadStatus(filename="unknown", status="error", message=f"İstek okunamadı: {str(e)}"))
+
+        while pending:
+            await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for line in finished_lines():
+                yield line
+
+        processing_time = (datetime.utcnow() - start_time).total_seconds()
+        log_user_activity(
+            current_user["id"],
+            "bulk_document_upload",
+            f"Bulk upload: {counts['success']}/{counts['total']} successful"
+        )
+        yield json.dumps({
+            "total_files": counts["total"],
+            "successful_uploads": counts["success"],
+            "failed_uploads": counts["error"],
+            "processing_time": processing_time
+        }) + "\n"
+
+    return RequestStreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+# Resumable uploads: a session owns a part file that PUT requests append byte ranges to.
+# The part file's size is the authoritative offset, so a request cut off mid-body resumes where it stopped.
+upload_session_locks: Dict[str, asyncio.Lock] = {}
+
+def upload_part_path(upload_id: str) -> Path:
+    return RESUMABLE_UPLOAD_DIR / f"{upload_id}.part"
+
+def upload_part_offset(upload_id: str) -> int:
+    try:
+        return upload_part_path(upload_id).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+async def get_upload_session(upload_id: str, current_user: dict) -> dict:
+    session = await db.upload_sessions.find_one({"id": upload_id, "status": "active"})
+    if not session or session["expires_at"] < datetime.utcnow():
+        raise HTTPException(status_code=404, detail="Yükleme oturumu bulunamadı veya süresi doldu")
+    if session["created_by"] != current_user["id"] and current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Bu yükleme oturumuna erişim yetkiniz yok")
+    return session
+
+def upload_session_info(session: dict) -> UploadSessionInfo:
+    return UploadSessionInfo(
+        upload_id=session["id"],
+        filename=session["filename"],
+        size=session["size"],
+        offset=upload_part_offset(session["id"]),
+        expires_at=session["expires_at"],
+        chunk_size=RESUMABLE_UPLOAD_CHUNK_BYTES
+    )
+
+def parse_content_range(header: Optional[str]) -> Optional[tuple]:
+    """(start, end_inclusive, total) from 'bytes start-end/total'"""
+    match = re.fullmatch(r'bytes (\d+)-(\d+)/(\d+)', (header or '').strip())
+    if not match:
+        return None
+    start, end, total = (int(value) for value in match.groups())
+    return (start, end, total) if start <= end < total else None
+
+def hash_file(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for piece in iter(lambda: f.read(UPLOAD_READ_CHUNK_BYTES), b''):
+            sha256.update(piece)
+    return sha256.hexdigest()
+
+async def cleanup_expired_upload_sessions():
+    """Drop abandoned upload sessions and their part files"""
+    now = datetime.utcnow()
+    async for session in db.upload_sessions.find({"status": {"$in": ["active", "completing"]}, "expires_at": {"$lt": now}}, {"id": 1}):
+        remove_spool_file(str(upload_part_path(session["id"])))
+        upload_session_locks.pop(session["id"], None)
+    result = await db.upload_sessions.update_many(
+        {"status": {"$in": ["active", "completing"]}, "expires_at": {"$lt": now}},
+        {"$set": {"status": "expired", "updated_at": now}}
+    )
+    if result.modified_count:
+        logger.info(f"Expired {result.modified_count} abandoned upload sessions")
+
+async def upload_session_cleanup_loop():
+    while True:
+        try:
+            await cleanup_expired_upload_sessions()
+        except Exception as e:
+            logger.error(f"Upload session cleanup error: {str(e)}")
+        await asyncio.sleep(RESUMABLE_UPLOAD_CLEANUP_SECONDS)
+
+@api_router.post("/uploads", response_model=UploadSessionInfo)
+async def create_upload_session(request: UploadSessionCreateRequest, current_user: dict = Depends(require_editor_or_admin)):
+    """Start a resumable upload of a document or a ZIP procedure pack"""
+    is_archive = request.filename.lower().endswith('.zip')
+    file_extension = '.zip' if is_archive else resolve_file_extension(request.filename)
+    if file_extension is None:
+        raise HTTPException(status_code=400, detail=unsupported_format_message())
+
+    max_bytes = MAX_BULK_ARCHIVE_BYTES if is_archive else MAX_UPLOAD_BYTES
+    if request.size <= 0 or request.size > max_bytes:
+        raise HTTPException(status_code=400, detail=f"Dosya boyutu {max_bytes // (1024 * 1024)}MB'dan büyük olamaz")
+
+    if not is_archive:
+        conflict = await find_active_upload(request.filename)
+        if conflict:
+            raise HTTPException(status_code=400, detail=conflict)
+    await ingestion_admission.admit()
+
+    now = datetime.utcnow()
+    session = {
+        "id": str(uuid.uuid4()),
+        "status": "active",
+        "filename": request.filename,
+        "file_extension": file_extension,
+        "size": request.size,
+        "group_id": request.group_id,
+        "created_by": current_user["id"],
+        "created_at": now,
+        "updated_at": now,
+        "expires_at": now + timedelta(seconds=RESUMABLE_UPLOAD_TTL_SECONDS)
+    }
+    RESUMABLE_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    upload_part_path(session["id"]).touch()
+    await db.upload_sessions.insert_one(session)
+    return upload_session_info(session)
+
+@api_router.get("/uploads/{upload_id}", response_model=UploadSessionInfo)
+async def get_upload_offset(upload_id: str, current_user: dict = Depends(require_editor_or_admin)):
+    """Current offset of a resumable upload; the client continues from here after an interruption"""
+    session = await get_upload_session(upload_id, current_user)
+    info = upload_session_info(session)
+    return JSONResponse(content=json.loads(info.model_dump_json()), headers={"Upload-Offset": str(info.offset)})
+
+@api_router.put("/uploads/{upload_id}", response_model=UploadSessionInfo)
+async def upload_byte_range(upload_id: str, request: Request, current_user: dict = Depends(require_editor_or_admin)):
+    """
+    Append a byte range. Content-Range (bytes start-end/total) must start at the current offset;
+    a mismatch returns 409 with the offset to resume from.
+    """
+    session = await get_upload_session(upload_id, current_user)
+    content_range = parse_content_range(request.headers.get("content-range"))
+    if content_range is None or content_range[2] != session["size"]:
+        raise HTTPException(status_code=400, detail="Geçersiz Content-Range başlığı")
+    start, end, _ = content_range
+
+    lock = upload_session_locks.setdefault(upload_id, asyncio.Lock())
+    async with lock:
+        offset = upload_part_offset(upload_id)
+        if start != offset:
+            raise HTTPException(status_code=409, detail=f"Beklenen başlangıç konumu {offset}", headers={"Upload-Offset": str(offset)})
+
+        expected = end - start + 1
+        received = 0
+        # Bytes are appended as they arrive; whatever reached the disk before a disconnect counts
+        async with aiofiles.open(upload_part_path(upload_id), 'ab') as part_file:
+            async for piece in request.stream():
+                if received + len(piece) > expected:
+                    piece = piece[:expected - received]
+                await part_file.write(piece)
+                received += len(piece)
+                if received >= expected:
+                    break
+
+        await db.upload_sessions.update_one({"id": upload_id}, {"$set": {
+            "updated_at": datetime.utcnow(),
+            "expires_at": datetime.utcnow() + timedelta(seconds=RESUMABLE_UPLOAD_TTL_SECONDS)
+        }})
+        session = await db.upload_sessions.find_one({"id": upload_id})
+
+    if received < expected:
+        raise HTTPException(status_code=400, detail="Parça eksik alındı", headers={"Upload-Offset": str(upload_part_offset(upload_id))})
+    return upload_session_info(session)
+
+@api_router.post("/uploads/{upload_id}/complete")
+async def complete_upload_session(upload_id: str, current_user: dict = Depends(require_editor_or_admin)):
+    """Hand a fully received upload to the ingestion queue; ZIP packs are expanded into one job per document.
+
+    The session is only marked completed once its files are queued, so a refused or failed hand-off
+    leaves it active (or failed, when the received file is gone) instead of silently completed. A ZIP pack
+    refused partway by admission keeps its part file and the position of the next entry, so completing
+    the session again continues from there."""
+    session = await get_upload_session(upload_id, current_user)
+    lock = upload_session_locks.setdefault(upload_id, asyncio.Lock())
+    async with lock:
+        part_path = str(upload_part_path(upload_id))
+        offset = upload_part_offset(upload_id)
+        if offset != session["size"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Yükleme tamamlanmadı ({offset}/{session['size']} bayt)",
+                headers={"Upload-Offset": str(offset)}
+            )
+
+        claimed = await db.upload_sessions.update_one(
+            {"id": upload_id, "status": "active"},
+            {"$set": {"status": "completing", "updated_at": datetime.utcnow()}}
+        )
+        if claimed.modified_count == 0:
+            raise HTTPException(status_code=404, detail="Yükleme oturumu bulunamadı veya süresi doldu")
+
+        async def finish_session(status: str, **fields):
+            await db.upload_sessions.update_one(
+                {"id": upload_id, "status": "completing"},
+                {"$set": {"status": status, "updated_at": datetime.utcnow(), **fields}}
+            )
+
+        if session["file_extension"] != '.zip':
+            try:
+                # Another upload of the same name may have finished while this session was open
+                conflict = await find_active_upload(session["filename"])
+                if conflict:
+                    raise HTTPException(status_code=400, detail=conflict)
+                await ingestion_admission.admit()
+            except HTTPException:
+                # The part file is untouched, so the client can complete the session again later
+                await finish_session("active")
+                raise
+            try:
+                content_hash = await asyncio.get_running_loop().run_in_executor(None, hash_file, part_path)
+                spooled = {"path": part_path, "content_hash": content_hash, "size": offset}
+                job = await enqueue_ingestion_job(spooled, session["filename"], session["file_extension"], session["group_id"], current_user["id"])
+            except Exception as e:
+                await finish_session("failed")
+                upload_session_locks.pop(upload_id, None)
+                logger.error(f"Error queueing upload {upload_id}: {str(e)}")
+                raise HTTPException(status_code=500, detail=f"Yükleme kuyruğa alınamadı: {str(e)}")
+            results = [BulkUploadStatus(
+                filename=session["filename"],
+                status="queued",
+                message="İşlem kuyruğuna alındı",
+                document_id=job["document_id"],
+                job_id=job["id"]
+            )]
+            await finish_session("completed")
+        else:
+            # Outcomes of entries handled by earlier attempts are kept on the session
+            results = [BulkUploadStatus(**result) for result in session.get("results", [])]
+            next_entry = session.get("next_entry", 0)
+            refused = None
+            entries = iter_zip_uploads(part_path, skip=next_entry)
+            try:
+                async for filename, spooled in entries:
+                    if isinstance(spooled, Exception):
+                        results.append(BulkUploadStatus(filename=filename, status="error", message=str(spooled)))
+                        next_entry += 1
+                        continue
+                    try:
+                        conflict = await find_active_upload(filename)
+                        if conflict:
+                            remove_spool_file(spooled["path"])
+                            results.append(BulkUploadStatus(filename=filename, status="error", message=conflict))
+                            next_entry += 1
+                            continue
+                        await ingestion_admission.admit()
+                        job = await enqueue_ingestion_job(spooled, filename, resolve_file_extension(filename), session["group_id"], current_user["id"])
+                    except HTTPException as e:
+                        remove_spool_file(spooled["path"])
+                        if e.status_code == 429:
+                            # Queue is full: stop here and let a later /complete continue with this entry
+                            refused = e
+                            break
+                        results.append(BulkUploadStatus(filename=filename, status="error", message=e.detail))
+                        next_entry += 1
+                        continue
+                    except Exception as e:
+                        remove_spool_file(spooled["path"])
+                        logger.error(f"Error processing {filename}: {str(e)}")
+                        results.append(BulkUploadStatus(filename=filename, status="error", message=f"İşleme hatası: {str(e)}"))
+                        next_entry += 1
+                        continue
+                    results.append(BulkUploadStatus(
+                        filename=filename,
+                        status="queued",
+                        message="İşlem kuyruğuna alındı",
+                        document_id=job["document_id"],
+                        job_id=job["id"]
+                    ))
+                    next_entry += 1
+            except Exception:
+                # Unexpected failure reading the archive: keep the progress so the session can be retried
+                await finish_session("active", next_entry=next_entry, results=[result.model_dump() for result in results])
+                raise
+            finally:
+                await entries.aclose()
+
+            if refused is not None:
+                await finish_session("active", next_entry=next_entry, results=[result.model_dump() for result in results])
+                queued = sum(result.status == "queued" for result in results)
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"İşlem kuyruğu dolu; {queued} dosya kuyruğa alındı, kalanlar için yüklemeyi daha sonra tamamlayın",
+                    headers=refused.headers
+                )
+            remove_spool_file(part_path)
+            queued = any(result.status == "queued" for result in results)
+            await finish_session("completed" if queued else "failed")
+        upload_session_locks.pop(upload_id, None)
+
+    return {"upload_id": upload_id, "results": [result.model_dump() for result in results]}
+
+@api_router.delete("/uploads/{upload_id}")
+async def abort_upload_session(upload_id: str, current_user: dict = Depends(require_editor_or_admin)):
+    session = await get_upload_session(upload_id, current_user)
+    await db.upload_sessions.update_one({"id": session["id"]}, {"$set": {"status": "aborted", "updated_at": datetime.utcnow()}})
+    remove_spool_file(str(upload_part_path(upload_id)))
+    upload_session_locks.pop(upload_id, None)
+    return {"message": "Yükleme iptal edildi"}
+
+@api_router.get("/jobs", response_model=List[IngestionJobInfo])
+async def list_ingestion_jobs(status: Optional[str] = None, limit: int = 50, current_user: dict = Depends(require_editor_or_admin)):
+    query = {"status": status} if status else {}
+    cursor = db.ingestion_jobs.find(query).sort("created_at", -1).limit(min(max(limit, 1), 200))
+    return [IngestionJobInfo(**job) async for job in cursor]
+
+@api_router.get("/jobs/{job_id}", response_model=IngestionJobInfo)
+async def get_ingestion_job(job_id: str, current_user: dict = Depends(require_editor_or_admin)):
+    job = await db.ingestion_jobs.find_one({"id": job_id})
+    if not job:
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    return IngestionJobInfo(**job)
+
+@api_router.post("/jobs/{job_id}/retry", response_model=IngestionJobInfo)
+async def retry_ingestion_job(job_id: str, current_user: dict = Depends(require_admin)):
+    """Put a dead-lettered job back in the queue with a fresh attempt budget"""
+    now = datetime.utcnow()
+    job = await db.ingestion_jobs.find_one_and_update(
+        {"id": job_id, "status": "dead_letter"},
+        {"$set": {"status": "queued", "attempts": 0, "available_at": now, "updated_at": now, "finished_at": None}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Yeniden denenebilecek iş bulunamadı")
+    ingestion_job_event.set()
+    return IngestionJobInfo(**job)
+
 @api_router.post("/upload-document")
 async def upload_document(
     file: UploadFile = File(...), 
     group_id: Optional[str] = None, 
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     current_user: dict = Depends(require_editor_or_admin)
 ):
     if file.filename == '':
         raise HTTPException(status_code=400, detail="Dosya seçilmedi")
     
     # Check file extension
-    file_extension = Path(file.filename).suffix.lower()
-    if file_extension not in ['.doc', '.docx']:
-        raise HTTPException(status_code=400, detail="Sadece .doc ve .docx formatındaki dosyalar desteklenir")
+    file_extension = resolve_file_extension(file.filename, file.content_type)
+    if file_extension is None:
+        raise HTTPException(status_code=400, detail=unsupported_format_message())
+    
+    # Check if file already exists or is being processed
+    conflict = await find_active_upload(file.filename)
+    if conflict:
+        raise HTTPException(status_code=400, detail=conflict)
     
-    # Check if file already exists
-    existing_doc = await db.documents.find_one({"filename": file.filename})
-    if existing_doc:
-        raise HTTPException(status_code=400, detail="Bu isimde dosya zaten mevcut")
+    # Refuse early with 429 when the ingestion queue is full
+    await ingestion_admission.admit()
     
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Check file size (limit to 10MB)
-        if len(content) > 10 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="Dosya boyutu 10MB'dan büyük olamaz")
+        # Spool the upload to disk in pieces, rejecting it as soon as it passes the size limit
+        try:
+            spooled = await spool_upload_stream(iter_upload_file(file), file_extension)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(suffix=file_extension, delete=False) as temp_file:
-            temp_file.write(content)
-            temp_file_path = temp_file.name
+        # Extraction, chunking, embedding and indexing run in the ingestion workers
+        job = await enqueue_ingestion_job(spooled, file.filename, file_extension, group_id, current_user["id"])
         
-        try:
-            # Extract text
-            text = extract_text_from_document(temp_file_path, file_extension)
-            
-            # Create chunks
-            chunks = create_chunks(text)
-            
-            # Get group information
-            group_name = None
-            if group_id:
-                group_doc = await db.groups.find_one({"id": group_id})
-                if group_doc:
-                    group_name = group_doc["name"]
-            
-            # Create document record
-            document_id = str(uuid.uuid4())
-            document = {
-                "id": document_id,
-                "filename": file.filename,
-                "file_type": file_extension,
-                "file_size": len(content),
-                "content": base64.b64encode(content).decode('utf-8'),
-                "text": text,
-                "chunks": chunks,
-                "chunk_count": len(chunks),
-                "upload_date": datetime.utcnow(),
-                "group_id": group_id,
-                "group_name": group_name
-            }
-            
-            # Save to database
-            await db.documents.insert_one(document)
-            
-            # Update FAISS index in background
-            background_tasks.add_task(update_faiss_index, chunks, document_id, file.filename, group_id, group_name)
-            
-            # Log activity
-            asyncio.create_task(log_user_activity(
-                current_user["id"], 
-                "document_upload", 
-                f"Uploaded document: {file.filename} ({len(chunks)} chunks)"
-            ))
-            
-            return {
-                "message": f"'{file.filename}' başarıyla yüklendi ve işlendi", 
-                "document_id": document_id,
-                "chunks": len(chunks),
-                "group_id": group_id,
-                "group_name": group_name
-            }
-            
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_file_path)
-            except Exception as e:
-                logger.warning(f"Could not delete temp file: {e}")
+        return {
+            "message": f"'{file.filename}' yüklendi ve işlem kuyruğuna alındı", 
+            "job_id": job['id'],
+            "status": job['status'],
+            "document_id": job['document_id'],
+            "group_id": job['group_id'],
+            "group_name": job['group_name']
+        }
                 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Document upload error: {str(e)}")
-        if "textract ve antiword başarısız" in str(e):
-            raise HTTPException(status_code=500, detail="DOC dosyası işlenirken hata oluştu. Dosya bozuk olabilir.")
         raise HTTPException(status_code=500, detail="Dosya yüklenirken hata oluştu")
 
+@api_router.get("/documents/{document_id}/download-original")
+async def download_original_document(document_id: str, current_user: dict = Depends(require_authenticated)):
+    """Orijinal dosyayı blob deposundan akış olarak indir"""
+    document = await db.documents.find_one(
+        {"id": document_id},
+        {"filename": 1, "file_type": 1, "content_hash": 1, "content": 1}
+    )
+    if not document:
+        raise HTTPException(status_code=404, detail="Doküman bulunamadı")
+
+    extractor = DOCUMENT_EXTRACTORS.get(document.get("file_type", ""))
+    media_type = extractor["mime_types"][0] if extractor else "application/octet-stream"
+
+    if document.get("content_hash"):
+        path = blob_path(document["content_hash"])
+        if path.exists():
+            return FileResponse(path, media_type=media_type, filename=document["filename"])
+
+    # Records not yet moved to the blob store by the startup migration
+    if document.get("content"):
+        return Response(
+            content=base64.b64decode(document["content"]),
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename*=utf-8''{quote(document['filename'])}"}
+        )
+
+    raise HTTPException(status_code=404, detail="Orijinal dosya bulunamadı")
+
+@api_router.get("/documents/{document_id}/chunks/{chunk_index}", response_model=DocumentChunkInfo)
+async def get_document_chunk(document_id: str, chunk_index: int, current_user: dict = Depends(require_authenticated)):
+    """Kaynak gösterimi için tek bir parçanın metni ve konumu"""
+    chunk = await db.chunks.find_one(
+        {"document_id": document_id, "chunk_index": chunk_index},
+        {"_id": 0, "embedding": 0, "embedding_model": 0, "content_hash": 0}
+    )
+    if not chunk:
+        raise HTTPException(status_code=404, detail="Doküman parçası bulunamadı")
+
+    document_text = None
+    if chunk.get("text") is None:
+        document_text = (await get_document_texts([document_id])).get(document_id)
+    chunk["text"] = chunk_record_text(chunk, document_text)
+
+    section_path = None
+    if chunk.get("section_index") is not None:
+        document = await db.documents.find_one({"id": document_id}, {"sections.title": 1, "sections.parent": 1})
+        sections = (document or {}).get("sections") or []
+        if chunk["section_index"] < len(sections):
+            section_path = get_section_path(sections, chunk["section_index"])
+
+    return DocumentChunkInfo(**chunk, section_path=section_path)
+
 @api_router.delete("/documents/{document_id}", response_model=DocumentDeleteResponse)
 async def delete_document(document_id: str, background_tasks: BackgroundTasks, current_user: dict = Depends(require_editor_or_admin)):
     try:
         # Find document
-        document = await db.documents.find_one({"id": document_id})
+        document = await db.documents.find_one(
+            {"id": document_id},
+            {"filename": 1, "chunk_count": 1, "content_hash": 1, "file_size": 1, "file_type": 1, "group_id": 1}
+        )
         if not document:
             raise HTTPException(status_code=404, detail="Doküman bulunamadı")
         
         filename = document.get("filename", "Bilinmeyen dosya")
-        chunk_count = document.get("chunk_count", len(document.get("chunks", [])))
-        document_chunks = document.get("chunks", [])
+        chunk_count = document.get("chunk_count", 0)
         
         # Dokümanı sil (ana işlem)
         result = await db.documents.delete_one({"id": document_id})
@@ -1303,20 +4528,28 @@ async def delete_document(document_id: str, background_tasks: BackgroundTasks, c
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Doküman silinemedi")
         
+        await db.chunks.delete_many({"document_id": document_id})
+        document_text_cache.discard(document_id)
+        answer_cache.invalidate_documents([document_id])
+        await apply_document_stats(document_stats_delta([document], sign=-1))
+        
+        # Original file goes once no other document has the same content
+        background_tasks.add_task(release_blob, document.get("content_hash"))
+        
         # Background tasks - OPTIMIZED FOR SEQUENTIAL DELETES
-        if document_chunks:
+        if chunk_count:
             # Chat cleanup - immediate (fast query)
-            background_tasks.add_task(cleanup_chat_sessions, document_chunks)
+            background_tasks.add_task(cleanup_chat_sessions, document_id, chunk_count)
             
-            # FAISS update - DEBOUNCED (avoid sequential rebuilds)
-            background_tasks.add_task(debounced_faiss_update)
+            # Remove the document's entries from the live index; shared entries need a debounced rebuild
+            background_tasks.add_task(drop_documents_from_index, [document_id])
         
         # Activity logging - NON-BLOCKING
-        asyncio.create_task(log_user_activity(
+        log_user_activity(
             current_user["id"], 
             "document_delete", 
             f"Deleted document: {filename} ({chunk_count} chunks)"
-        ))
+        )
         
         # IMMEDIATE response (no await on background tasks)
         return DocumentDeleteResponse(
@@ -1361,7 +4594,7 @@ async def login(user_credentials: UserLogin):
         )
         
         # Log activity
-        asyncio.create_task(log_user_activity(user["id"], "login", f"User logged in: {user['username']}"))
+        log_user_activity(user["id"], "login", f"User logged in: {user['username']}")
         
         # Check if password change is required
         must_change_password = user.get("must_change_password", False)
@@ -1395,7 +4628,7 @@ async def login(user_credentials: UserLogin):
 async def logout(current_user: dict = Depends(get_current_active_user)):
     try:
         # Log activity
-        asyncio.create_task(log_user_activity(current_user["id"], "logout", f"User logged out: {current_user['username']}"))
+        log_user_activity(current_user["id"], "logout", f"User logged out: {current_user['username']}")
         return {"message": "Başarıyla çıkış yapıldı"}
     except Exception as e:
         logger.error(f"Logout error: {str(e)}")
@@ -1444,7 +4677,7 @@ async def change_password(
         )
         
         # Log activity
-        asyncio.create_task(log_user_activity(current_user["id"], "password_change", "Password changed successfully"))
+        log_user_activity(current_user["id"], "password_change", "Password changed successfully")
         
         return {"message": "Şifre başarıyla değiştirildi"}
         
@@ -1508,11 +4741,11 @@ async def create_user(
         await db.users.insert_one(user.dict())
         
         # Log activity
-        asyncio.create_task(log_user_activity(
+        log_user_activity(
             current_user["id"], 
             "user_create", 
             f"Created user: {user_data.username} ({user_data.role})"
-        ))
+        )
         
         return {
             "message": f"Kullanıcı '{user_data.username}' başarıyla oluşturuldu",
@@ -1527,31 +4760,31 @@ async def create_user(
         raise HTTPException(status_code=500, detail="Kullanıcı oluşturulurken hata oluştu")
 
 # Group Management Endpoints
+async def load_group_list() -> List[GroupInfo]:
+    """All groups with document counts joined from the statistics counters: two reads regardless of group count"""
+    group_stats = (await get_document_stats())["groups"]
+    return [
+        GroupInfo(
+            id=group_doc["id"],
+            name=group_doc["name"],
+            description=group_doc.get("description", ""),
+            color=group_doc.get("color", "#3b82f6"),
+            document_count=group_stats.get(group_doc["id"], {}).get("documents", 0),
+            created_at=group_doc.get("created_at", datetime.utcnow())
+        )
+        async for group_doc in db.groups.find({}, {"_id": 0})
+    ]
+
 @api_router.get("/groups", response_model=GroupListResponse)
 async def get_groups(current_user: dict = Depends(require_authenticated)):
     """Grupları listele"""
     try:
-        groups = []
-        total_count = 0
-        
-        # Get all groups
-        async for group_doc in db.groups.find():
-            # Count documents in this group
-            doc_count = await db.documents.count_documents({"group_id": group_doc["id"]})
-            
-            group_info = GroupInfo(
-                id=group_doc["id"],
-                name=group_doc["name"],
-                description=group_doc.get("description", ""),
-                color=group_doc.get("color", "#3b82f6"),
-                document_count=doc_count,
-                created_at=group_doc.get("created_at", datetime.utcnow())
-            )
-            groups.append(group_info)
-        
-        total_count = len(groups)
+        groups = group_list_cache["groups"]
+        if groups is None or time.monotonic() >= group_list_cache["expires"]:
+            groups = await load_group_list()
+            group_list_cache.update(groups=groups, expires=time.monotonic() + GROUP_LIST_CACHE_SECONDS)
         
-        return GroupListResponse(groups=groups, total_count=total_count)
+        return GroupListResponse(groups=groups, total_count=len(groups))
         
     except Exception as e:
         logger.error(f"Error getting groups: {str(e)}")
@@ -1579,13 +4812,14 @@ async def create_group(
         
         # Save to database
         await db.groups.insert_one(new_group.dict())
+        await apply_document_stats({"total_groups": 1})
         
         # Log activity
-        asyncio.create_task(log_user_activity(
+        log_user_activity(
             current_user["id"],
             "group_create",
             f"Created group: {group_data.name}"
-        ))
+        )
         
         return {
             "message": f"Grup '{group_data.name}' başarıyla oluşturuldu",
@@ -1625,6 +4859,11 @@ async def update_group(
         }
         
         await db.groups.update_one({"id": group_id}, {"$set": update_data})
+        invalidate_group_list()
+        
+        # Cached answers list the group name next to each source
+        if group_data.name != group["name"]:
+            answer_cache.invalidate_documents(await db.documents.distinct("id", {"group_id": group_id}))
         
         # Update group_name in all documents belonging to this group
         await db.documents.update_many(
@@ -1633,11 +4872,11 @@ async def update_group(
         )
         
         # Log activity
-        asyncio.create_task(log_user_activity(
+        log_user_activity(
             current_user["id"],
             "group_update",
             f"Updated group: {group_data.name}"
-        ))
+        )
         
         return {
             "message": f"Grup '{group_data.name}' başarıyla güncellendi"
@@ -1675,17 +4914,26 @@ async def delete_group(
         
         # Update documents to remove group association
         if doc_count > 0:
+            answer_cache.invalidate_documents(await db.documents.distinct("id", {"group_id": group_id}))
             await db.documents.update_many(
                 {"group_id": group_id},
                 {"$unset": {"group_id": "", "group_name": ""}}
             )
         
+        # The group's counters move to ungrouped
+        group_stats = (await get_document_stats())["groups"].get(group_id, {})
+        delta = {"total_groups": -1}
+        for field in ("documents", "chunks", "bytes"):
+            if group_stats.get(field):
+                delta[f"groups.{UNGROUPED_STATS_KEY}.{field}"] = group_stats[field]
+        await apply_document_stats(delta, unset=[f"groups.{group_id}"])
+        
         # Log activity
-        asyncio.create_task(log_user_activity(
+        log_user_activity(
             current_user["id"],
             "group_delete",
             f"Deleted group: {group_name} ({doc_count} documents moved to ungrouped)"
-        ))
+        )
         
         return {
             "message": f"Grup '{group_name}' silindi",
@@ -1716,6 +4964,13 @@ async def move_documents_to_group(
                 raise HTTPException(status_code=404, detail="Hedef grup bulunamadı")
             group_name = target_group["name"]
         
+        # Documents that actually change group, for the statistics delta
+        move_filter = {"id": {"$in": move_request.document_ids}, "group_id": {"$ne": move_request.target_group_id}}
+        moved_documents = await db.documents.find(
+            move_filter, {"_id": 0, "id": 1, "group_id": 1, "chunk_count": 1, "file_size": 1, "file_type": 1}
+        ).to_list(None)
+        answer_cache.invalidate_documents([doc["id"] for doc in moved_documents])
+        
         # Update documents
         if move_request.target_group_id:
             # Move to specific group
@@ -1733,13 +4988,20 @@ async def move_documents_to_group(
         if update_result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Taşınacak doküman bulunamadı")
         
+        delta = document_stats_delta(moved_documents, sign=-1)
+        for field, value in document_stats_delta(
+            [{**doc, "group_id": move_request.target_group_id} for doc in moved_documents]
+        ).items():
+            delta[field] = delta.get(field, 0) + value
+        await apply_document_stats({field: value for field, value in delta.items() if value})
+        
         # Log activity
         target_desc = group_name if group_name else "Grupsuz"
-        asyncio.create_task(log_user_activity(
+        log_user_activity(
             current_user["id"],
             "documents_move",
             f"Moved {update_result.modified_count} documents to: {target_desc}"
-        ))
+        )
         
         return {
             "message": f"{update_result.modified_count} doküman taşındı",
@@ -1754,8 +5016,60 @@ async def move_documents_to_group(
         raise HTTPException(status_code=500, detail="Dokümanlar taşınırken hata oluştu")
 
 # Q&A Endpoint
+NO_CONTEXT_ANSWER = "Üzgünüm, bu sorunuzla ilgili dokümanlarımızda bilgi bulunamadı. Lütfen sorunuzu farklı şekilde ifade etmeyi deneyin."
+
+async def prepare_answer_context(question: str) -> dict:
+    """Retrieval shared by the plain and streaming Q&A endpoints; context_text is None when no LLM call is needed"""
+    # Read before retrieval, so an answer built from documents invalidated meanwhile is not cached
+    cache_version = answer_cache.version
+    # Encoding and the search run on a thread; the search waits for index_lock, which ingestion threads hold
+    query_embedding = (await asyncio.to_thread(sentence_model.encode, [question]))[0] if sentence_model else None
+    relevant_chunks = await asyncio.to_thread(search_similar_chunks, question, 5, query_embedding)
+    prepared = {
+        "query_embedding": query_embedding,
+        "context_key": AnswerCache.context_key(relevant_chunks),
+        "cache_version": cache_version,
+        "cached_answer": None,
+        "source_documents": [],
+        "context_text": None
+    }
+    if not relevant_chunks:
+        return prepared
+    
+    cached_answer = answer_cache.get(query_embedding, prepared["context_key"])
+    if cached_answer:
+        prepared["cached_answer"] = cached_answer
+        prepared["source_documents"] = cached_answer['source_documents']
+        return prepared
+    
+    # Create context from the parent sections of the relevant chunks
+    context_chunks = await expand_chunks_to_sections(relevant_chunks)
+    prepared["context_text"] = "\n\n".join([chunk['text'] for chunk in context_chunks[:3]])  # Use top 3 sections
+    
+    # Get source documents information
+    source_doc_ids = list(set([
+        doc_id for chunk in relevant_chunks for doc_id in chunk.get('document_ids', [chunk['document_id']])
+    ]))
+    async for doc in db.documents.find({"id": {"$in": source_doc_ids}}, {"id": 1, "filename": 1, "group_name": 1}):
+        prepared["source_documents"].append({
+            'id': doc["id"],
+            'filename': doc.get('filename', 'Bilinmeyen dosya'),
+            'group_name': doc.get('group_name', 'Grupsuz')
+        })
+    return prepared
+
+async def save_chat_session(session_id: str, question: str, answer: str, source_documents: List[dict]):
+    chat_session = ChatSession(
+        session_id=session_id,
+        question=question,
+        answer=answer,
+        source_documents=[doc['filename'] for doc in source_documents],
+        timestamp=datetime.utcnow()
+    )
+    await db.chat_sessions.insert_one(chat_session.dict())
+
 @api_router.post("/ask-question", response_model=ChatResponse)
-async def ask_question(message: ChatMessage):
+async def ask_question(message: ChatMessage, _priority: None = Depends(ingestion_admission.interactive)):
     """AI'ya soru sor"""
     try:
         question = message.question.strip()
@@ -1764,53 +5078,31 @@ async def ask_question(message: ChatMessage):
         if not question:
             raise HTTPException(status_code=400, detail="Soru boş olamaz")
         
-        # Search for relevant chunks
-        relevant_chunks = search_similar_chunks(question, top_k=5)
-        
-        context_found = len(relevant_chunks) > 0
-        context_chunks_count = len(relevant_chunks)
+        prepared = await prepare_answer_context(question)
+        source_documents = prepared["source_documents"]
+        cached_answer = prepared["cached_answer"]
         
-        if not context_found:
-            answer = "Üzgünüm, bu sorunuzla ilgili dokümanlarımızda bilgi bulunamadı. Lütfen sorunuzu farklı şekilde ifade etmeyi deneyin."
-            source_documents = []
+        if cached_answer:
+            answer = cached_answer['answer']
+        elif prepared["context_text"] is None:
+            answer = NO_CONTEXT_ANSWER
         else:
-            # Create context from relevant chunks
-            context_text = "\n\n".join([chunk['text'] for chunk in relevant_chunks[:3]])  # Use top 3 chunks
-            
-            # Get source documents information
-            source_doc_ids = list(set([chunk['document_id'] for chunk in relevant_chunks]))
-            source_documents = []
-            
-            for doc_id in source_doc_ids:
-                doc = await db.documents.find_one({"id": doc_id})
-                if doc:
-                    source_documents.append({
-                        'id': doc_id,
-                        'filename': doc.get('filename', 'Bilinmeyen dosya'),
-                        'group_name': doc.get('group_name', 'Grupsuz')
-                    })
-            
             # Generate answer using AI
-            answer = await generate_answer_with_gemini(question, context_text)
+            answer = await generate_answer_with_gemini(question, prepared["context_text"])
+            cacheable = not is_llm_error_answer(answer)
             
             # Format answer with source information
             answer = format_answer_with_sources(answer, source_documents)
+            if cacheable:
+                answer_cache.put(prepared["query_embedding"], prepared["context_key"], answer, source_documents, prepared["cache_version"])
         
-        # Save chat session
-        chat_session = ChatSession(
-            session_id=session_id,
-            question=question,
-            answer=answer,
-            source_documents=[doc['filename'] for doc in source_documents],
-            timestamp=datetime.utcnow()
-        )
-        
-        await db.chat_sessions.insert_one(chat_session.dict())
+        await save_chat_session(session_id, question, answer, source_documents)
         
         return ChatResponse(
             answer=answer,
             sources=[doc['filename'] for doc in source_documents],
-            session_id=session_id
+            session_id=session_id,
+            cached=cached_answer is not None
         )
         
     except HTTPException:
@@ -1819,6 +5111,79 @@ async def ask_question(message: ChatMessage):
         logger.error(f"Question answering error: {str(e)}")
         raise HTTPException(status_code=500, detail="Soru yanıtlanırken hata oluştu")
 
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@api_router.post("/ask-question/stream")
+async def ask_question_stream(message: ChatMessage):
+    """
+    AI'ya soru sor, cevabı server-sent events olarak akıt: önce "sources", ardından cevap parçalarıyla "token",
+    en sonda tam cevapla "done" (hata durumunda "error"). Sohbet kaydı akış tamamlandığında yazılır.
+    """
+    question = message.question.strip()
+    session_id = message.session_id or str(uuid.uuid4())
+    if not question:
+        raise HTTPException(status_code=400, detail="Soru boş olamaz")
+    
+    async def stream_events():
+        # Ingestion yields for the whole stream; a yield dependency would be torn down before the body is sent
+        ingestion_admission.begin_interactive()
+        try:
+            prepared = await prepare_answer_context(question)
+            source_documents = prepared["source_documents"]
+            cached_answer = prepared["cached_answer"]
+            yield sse_event("sources", {"session_id": session_id, "sources": source_documents})
+            
+            if cached_answer:
+                answer = cached_answer['answer']
+                yield sse_event("token", {"text": answer})
+            elif prepared["context_text"] is None:
+                answer = NO_CONTEXT_ANSWER
+                yield sse_event("token", {"text": answer})
+            else:
+                parts = []
+                async for text in stream_answer_with_gemini(question, prepared["context_text"]):
+                    parts.append(text)
+                    yield sse_event("token", {"text": text})
+                answer = "".join(parts)
+                cacheable = not is_llm_error_answer(answer)
+                
+                # The sources section is appended as the last piece, so the streamed text equals the stored answer
+                sources_section = format_answer_with_sources("", source_documents)
+                if sources_section:
+                    yield sse_event("token", {"text": sources_section})
+                answer += sources_section
+                if cacheable:
+                    answer_cache.put(prepared["query_embedding"], prepared["context_key"], answer, source_documents, prepared["cache_version"])
+            
+            await save_chat_session(session_id, question, answer, source_documents)
+            yield sse_event("done", {
+                "session_id": session_id,
+                "answer": answer,
+                "sources": [doc['filename'] for doc in source_documents],
+                "cached": cached_answer is not None
+            })
+        except Exception as e:
+            logger.error(f"Question streaming error: {str(e)}")
+            yield sse_event("error", {"detail": "Soru yanıtlanırken hata oluştu"})
+        finally:
+            ingestion_admission.end_interactive()
+    
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/analytics/daily", response_model=DailyAnalyticsResponse)
+async def get_daily_analytics(days: int = 30, current_user: dict = Depends(require_admin)):
+    """Günlük aktivite ve soru-cevap özetleri (saklama süresi dolan kayıtlar dahil)"""
+    days = min(max(days, 1), 3650)
+    since = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
+    activity = await db.activity_daily.find({"date": {"$gte": since}}, {"_id": 0}).sort([("date", -1), ("action", 1)]).to_list(None)
+    chat = await db.chat_daily.find({"date": {"$gte": since}}, {"_id": 0}).sort("date", -1).to_list(None)
+    return DailyAnalyticsResponse(days=days, activity=activity, chat=chat)
+
 # Include the router
 app.include_router(api_router)
 
@@ -1831,6 +5196,26 @@ async def startup_event():
     # Ensure database indexes
     await ensure_indexes()
     
+    # Activity records are written in batches by a single task
+    activity_log_writer.start()
+    
+    # Aggregate finished days of activity and chat before retention removes them
+    await apply_retention()
+    maintenance_tasks.append(asyncio.create_task(rollup_loop()))
+    
+    # Counters are rebuilt before any write applies a delta to them
+    await reconcile_document_stats()
+    maintenance_tasks.append(asyncio.create_task(stats_reconcile_loop()))
+    
+    # Resume queued and interrupted ingestion jobs
+    start_ingestion_workers()
+    
+    # Expire abandoned resumable uploads
+    maintenance_tasks.append(asyncio.create_task(upload_session_cleanup_loop()))
+    
+    # Move original files and chunks of older documents out of their records
+    maintenance_tasks.append(asyncio.create_task(migrate_legacy_document_records()))
+    
     # Create initial admin user if no users exist
     user_count = await db.users.count_documents({})
     if user_count == 0:
@@ -1847,6 +5232,16 @@ async def startup_event():
         await db.users.insert_one(admin_user.dict())
         logger.info("Initial admin user created - Username: admin, Password: admin123")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Running jobs are handed back to the queue by their workers
+    for task in ingestion_workers + maintenance_tasks:
+        task.cancel()
+    await asyncio.gather(*ingestion_workers, *maintenance_tasks, return_exceptions=True)
+    
+    # Write activity still queued, including records from the tasks stopped above
+    await activity_log_writer.close()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
@@ -11,6 +11,9 @@ function App() {
   const [sessionId, setSessionId] = useState('');
   const [systemStatus, setSystemStatus] = useState(null);
   const [documents, setDocuments] = useState([]);
+  const [documentsCursor, setDocumentsCursor] = useState(null);
+  const [documentStats, setDocumentStats] = useState(null);
+  const [documentFilter, setDocumentFilter] = useState('');
   const [groups, setGroups] = useState([]);
   const [selectedFile, setSelectedFile] = useState(null);
   const [uploadProgress, setUploadProgress] = useState('');
@@ -217,9 +220,10 @@ function App() {
   }, [showProfileDropdown]);
 
   useEffect(() => {
-    // selectedGroup değiştiğinde dokümanları yeniden fetch et
-    fetchDocuments();
-  }, [selectedGroup]);
+    // selectedGroup veya dosya adı filtresi değiştiğinde dokümanları yeniden fetch et
+    const timer = setTimeout(() => fetchDocuments(), 300);
+    return () => clearTimeout(timer);
+  }, [selectedGroup, documentFilter]);
 
   useEffect(() => {
     // Chat'in sonuna scroll yap
@@ -727,18 +731,25 @@ function App() {
     }
   };
 
-  const fetchDocuments = async () => {
+  // cursor verilirse sonraki sayfa mevcut listeye eklenir
+  const fetchDocuments = async (cursor = null) => {
     if (!isAuthenticated || !authToken) return;
     
     try {
-      let url = `${backendUrl}/api/documents`;
+      const params = new URLSearchParams();
       
       // Grup filtresi ekle
       if (selectedGroup && selectedGroup !== 'all') {
-        url += `?group_id=${selectedGroup}`;
+        params.append('group_id', selectedGroup);
+      }
+      if (documentFilter.trim()) {
+        params.append('filename_prefix', documentFilter.trim());
+      }
+      if (cursor) {
+        params.append('cursor', cursor);
       }
       
-      const response = await fetch(url, {
+      const response = await fetch(`${backendUrl}/api/documents?${params.toString()}`, {
         headers: {
           'Authorization': `Bearer ${authToken}`,
           'Content-Type': 'application/json'
@@ -747,12 +758,9 @@ function App() {
       const data = await response.json();
       
       if (response.ok) {
-        setDocuments(data.documents || []);
-        
-        // İstatistikleri de saklayabiliriz
-        if (data.statistics) {
-          console.log('Document statistics:', data.statistics);
-        }
+        setDocuments(prev => cursor ? [...prev, ...(data.documents || [])] : (data.documents || []));
+        setDocumentsCursor(data.next_cursor || null);
+        setDocumentStats(data.statistics || null);
       } else {
         console.error('API Error:', data);
       }
@@ -988,9 +996,13 @@ function App() {
     }
   };
 
+  // Desteklenen formatlar backend'deki extractor kayıt defterinden gelir
+  const supportedFormats = systemStatus?.supported_formats || ['.doc', '.docx', '.pdf'];
+  const isSupportedFile = (fileName) => supportedFormats.includes('.' + fileName.toLowerCase().split('.').pop());
+
   const handleFileSelect = (event) => {
     const file = event.target.files[0];
-    if (file && (file.name.endsWith('.docx') || file.name.endsWith('.doc'))) {
+    if (file && isSupportedFile(file.name)) {
       // Dosya boyutu kontrolü (10MB)
       const maxSize = 10 * 1024 * 1024; // 10MB
       if (file.size > maxSize) {
@@ -1002,11 +1014,36 @@ function App() {
       setSelectedFile(file);
       setUploadProgress('');
     } else {
-      showError('Dosya Formatı Hatası', 'Lütfen sadece .doc veya .docx formatındaki dosyaları seçin.');
+      showError('Dosya Formatı Hatası', `Lütfen sadece ${supportedFormats.join(', ')} formatındaki dosyaları seçin.`);
       event.target.value = '';
     }
   };
 
+  const ingestionStageLabels = {
+    extract: 'Metin çıkarılıyor',
+    chunk: 'Parçalara ayrılıyor',
+    embed: 'Vektörleştiriliyor',
+    index: 'İndeksleniyor',
+    done: 'Tamamlandı'
+  };
+
+  // Poll an ingestion job until it completes or is dead-lettered; returns the last job state
+  const waitForIngestionJob = async (jobId, onUpdate, timeoutMs = 10 * 60 * 1000) => {
+    const deadline = Date.now() + timeoutMs;
+    let job = null;
+    while (Date.now() < deadline) {
+      const response = await fetch(`${backendUrl}/api/jobs/${jobId}`, {
+        headers: { 'Authorization': `Bearer ${authToken}` }
+      });
+      if (!response.ok) return job;
+      job = await response.json();
+      if (onUpdate) onUpdate(job);
+      if (job.status === 'completed' || job.status === 'dead_letter') return job;
+      await new Promise(resolve => setTimeout(resolve, 1500));
+    }
+    return job;
+  };
+
   const handleFileUpload = async () => {
     if (!selectedFile) {
       showWarning('Dosya Seçimi', 'Lütfen bir dosya seçin.');
@@ -1035,22 +1072,29 @@ function App() {
       const data = await response.json();
 
       if (response.ok) {
-        setUploadProgress(`✅ ${data.message}`);
-        if (data.file_size) {
-          setUploadProgress(prev => prev + ` (${data.file_size}, ${data.chunk_count} parça)`);
-        }
+        setUploadProgress(`⏳ ${data.message}`);
         setSelectedFile(null);
         document.getElementById('fileInput').value = '';
         
-        // Success notification
-        showSuccess('Doküman Yüklendi', `${data.message} (${data.file_size}, ${data.chunk_count} parça)`);
+        // Processing continues in the ingestion queue; follow the job until it finishes
+        const job = await waitForIngestionJob(data.job_id, (current) => {
+          setUploadProgress(`⏳ ${ingestionStageLabels[current.stage] || 'İşleniyor'}...${current.chunk_count ? ` (${current.chunk_count} parça)` : ''}`);
+        });
+        
+        if (job && job.status === 'completed') {
+          setUploadProgress(`✅ Doküman işlendi (${job.chunk_count} parça)`);
+          showSuccess('Doküman Yüklendi', `'${job.filename}' başarıyla işlendi (${job.chunk_count} parça)`);
+        } else if (job && job.status === 'dead_letter') {
+          setUploadProgress(`❌ Hata: ${job.error}`);
+          showError('İşleme Hatası', job.error || 'Doküman işlenirken bir hata oluştu');
+        } else {
+          setUploadProgress('⏳ Doküman işlem kuyruğunda, tamamlandığında listede görünecek.');
+        }
         
         // Dokümanları ve sistem durumunu güncelle
-        setTimeout(() => {
-          fetchDocuments();
-          fetchSystemStatus();
-          fetchGroups();
-        }, 2000);
+        fetchDocuments();
+        fetchSystemStatus();
+        fetchGroups();
       } else {
         setUploadProgress(`❌ Hata: ${data.detail}`);
         showError('Yükleme Hatası', data.detail || 'Doküman yüklenirken bir hata oluştu');
@@ -1078,9 +1122,10 @@ function App() {
 
     setChatHistory(prev => [...prev, userMessage]);
     setIsLoading(true);
+    let aiMessageAdded = false;
 
     try {
-      const response = await fetch(`${backendUrl}/api/ask-question`, {
+      const response = await fetch(`${backendUrl}/api/ask-question/stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -1091,21 +1136,62 @@ function App() {
         }),
       });
 
-      const data = await response.json();
+      if (!response.ok) {
+        const data = await response.json();
+        throw new Error(data.detail || 'Bilinmeyen hata');
+      }
 
-      if (response.ok) {
-        // AI'ın cevabını chat geçmişine ekle
-        const aiMessage = {
-          type: 'ai',
-          content: data.answer,
-          contextFound: data.context_found,
-          chunksCount: data.context_chunks_count,
-          timestamp: new Date().toLocaleTimeString('tr-TR')
-        };
+      // AI'ın cevabı geldikçe son mesajı güncelle (server-sent events)
+      const aiMessage = {
+        type: 'ai',
+        content: '',
+        timestamp: new Date().toLocaleTimeString('tr-TR')
+      };
+      setChatHistory(prev => [...prev, aiMessage]);
+      aiMessageAdded = true;
+
+      const updateAiMessage = (fields) => {
+        setChatHistory(prev => {
+          const next = [...prev];
+          next[next.length - 1] = { ...next[next.length - 1], ...fields };
+          return next;
+        });
+      };
 
-        setChatHistory(prev => [...prev, aiMessage]);
-      } else {
-        throw new Error(data.detail || 'Bilinmeyen hata');
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let answer = '';
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+
+        for (const rawEvent of events) {
+          const lines = rawEvent.split('\n');
+          const eventLine = lines.find(line => line.startsWith('event: '));
+          const dataLine = lines.find(line => line.startsWith('data: '));
+          if (!eventLine || !dataLine) continue;
+
+          const eventName = eventLine.slice(7);
+          const data = JSON.parse(dataLine.slice(6));
+
+          if (eventName === 'sources') {
+            updateAiMessage({ contextFound: data.sources.length > 0, chunksCount: data.sources.length });
+          } else if (eventName === 'token') {
+            answer += data.text;
+            updateAiMessage({ content: answer });
+            setIsLoading(false);
+          } else if (eventName === 'done') {
+            updateAiMessage({ content: data.answer });
+          } else if (eventName === 'error') {
+            throw new Error(data.detail || 'Bilinmeyen hata');
+          }
+        }
       }
     } catch (error) {
       // Hata mesajını chat geçmişine ekle
@@ -1115,7 +1201,12 @@ function App() {
         timestamp: new Date().toLocaleTimeString('tr-TR')
       };
 
-      setChatHistory(prev => [...prev, errorMessage]);
+      setChatHistory(prev => {
+        // Henüz içerik gelmemiş boş AI mesajı hata mesajıyla değiştirilir
+        const last = prev[prev.length - 1];
+        const kept = aiMessageAdded && last && last.type === 'ai' && !last.content ? prev.slice(0, -1) : prev;
+        return [...kept, errorMessage];
+      });
     } finally {
       setIsLoading(false);
       setQuestion('');
@@ -1181,7 +1272,11 @@ function App() {
   // Orijinal dokümanı indir
   const downloadOriginalDocument = async (documentId, filename) => {
     try {
-      const response = await fetch(`${backendUrl}/api/documents/${documentId}/download-original`);
+      const response = await fetch(`${backendUrl}/api/documents/${documentId}/download-original`, {
+        headers: {
+          'Authorization': `Bearer ${authToken}`
+        }
+      });
       
       if (response.ok) {
         const blob = await response.blob();
@@ -1622,10 +1717,8 @@ function App() {
     const files = Array.from(event.target.files);
     
     // File format validation
-    const invalidFiles = files.filter(file => {
-      const extension = file.name.toLowerCase().split('.').pop();
-      return !['doc', 'docx'].includes(extension);
-    });
+    const isZipFile = (file) => file.name.toLowerCase().endsWith('.zip');
+    const invalidFiles = files.filter(file => !isSupportedFile(file.name) && !isZipFile(file));
     
     if (invalidFiles.length > 0) {
       showError('Dosya Formatı Hatası', `Bu dosyalar desteklenmiyor: ${invalidFiles.map(f => f.name).join(', ')}`);
@@ -1638,8 +1731,8 @@ function App() {
       return;
     }
     
-    // File size validation (10MB per file)
-    const oversizedFiles = files.filter(file => file.size > 10 * 1024 * 1024);
+    // File size validation (10MB per file; ZIP archives are checked per entry on the server)
+    const oversizedFiles = files.filter(file => !isZipFile(file) && file.size > 10 * 1024 * 1024);
     if (oversizedFiles.length > 0) {
       showError('Dosya Boyutu Hatası', `Bu dosyalar çok büyük (>10MB): ${oversizedFiles.map(f => f.name).join(', ')}`);
       return;
@@ -1648,15 +1741,6 @@ function App() {
     setSelectedFiles(files);
   };
 
-  const convertFileToBase64 = (file) => {
-    return new Promise((resolve, reject) => {
-      const reader = new FileReader();
-      reader.readAsDataURL(file);
-      reader.onload = () => resolve(reader.result.split(',')[1]); // Remove data:... prefix
-      reader.onerror = error => reject(error);
-    });
-  };
-
   const handleBulkUpload = async () => {
     if (selectedFiles.length === 0) {
       showWarning('Dosya Seçimi', 'Lütfen yüklenecek dosyaları seçin.');
@@ -1668,56 +1752,69 @@ function App() {
     setBulkUploadResults([]);
 
     try {
-      // Convert all files to base64
-      const filesData = [];
-      for (let i = 0; i < selectedFiles.length; i++) {
-        const file = selectedFiles[i];
-        setBulkUploadProgress(Math.round((i / selectedFiles.length) * 30)); // 30% for file processing
-        
-        try {
-          const base64Content = await convertFileToBase64(file);
-          filesData.push({
-            filename: file.name,
-            content: base64Content,
-            group_id: selectedGroup && selectedGroup !== 'all' && selectedGroup !== 'ungrouped' ? selectedGroup : null
-          });
-        } catch (error) {
-          console.error(`Error processing file ${file.name}:`, error);
-        }
+      // Files are sent as binary multipart parts; ZIP archives are expanded on the server
+      const groupId = selectedGroup && selectedGroup !== 'all' && selectedGroup !== 'ungrouped' ? selectedGroup : null;
+      const formData = new FormData();
+      if (groupId) {
+        formData.append('group_id', groupId);
       }
+      selectedFiles.forEach(file => formData.append('files', file, file.name));
 
-      setBulkUploadProgress(40); // File processing complete
-
-      // Send bulk upload request
-      const response = await fetch(`${backendUrl}/api/bulk-upload-documents`, {
+      const response = await fetch(`${backendUrl}/api/bulk-upload-files`, {
         method: 'POST',
         headers: {
-          'Authorization': `Bearer ${authToken}`,
-          'Content-Type': 'application/json'
+          'Authorization': `Bearer ${authToken}`
         },
-        body: JSON.stringify({
-          files: filesData,
-          group_id: selectedGroup && selectedGroup !== 'all' && selectedGroup !== 'ungrouped' ? selectedGroup : null
-        })
+        body: formData
       });
 
-      setBulkUploadProgress(70); // Upload request sent
+      if (!response.ok) {
+        const data = await response.json();
+        showError('Toplu Yükleme Hatası', data.detail || 'Toplu yükleme sırasında hata oluştu');
+        setBulkUploadProgress(0);
+        return;
+      }
 
-      const data = await response.json();
+      // The server streams one NDJSON status line per file, then a summary line
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      const results = [];
+      let buffer = '';
+      let summary = null;
+
+      const handleLine = (line) => {
+        if (!line.trim()) return;
+        const item = JSON.parse(line);
+        if (item.total_files !== undefined) {
+          summary = item;
+          return;
+        }
+        results.push(item);
+        setBulkUploadResults([...results]);
+        setBulkUploadProgress(Math.min(95, Math.round((results.length / selectedFiles.length) * 90)));
+      };
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.forEach(handleLine);
+      }
+      handleLine(buffer);
+
+      setBulkUploadProgress(100);
+
+      if (summary) {
+        const successCount = summary.successful_uploads;
+        const failedCount = summary.failed_uploads;
+        const totalCount = summary.total_files;
 
-      if (response.ok) {
-        setBulkUploadResults(data.results);
-        setBulkUploadProgress(100);
-        
-        // Show summary
-        const successCount = data.successful_uploads;
-        const failedCount = data.failed_uploads;
-        const totalCount = data.total_files;
-        
         if (failedCount === 0) {
           showSuccess(
             'Toplu Yükleme Tamamlandı', 
-            `${successCount} dosya başarıyla yüklendi! (${data.processing_time.toFixed(1)}s)`
+            `${successCount} dosya yüklendi ve işlem kuyruğuna alındı. (${summary.processing_time.toFixed(1)}s)`
           );
         } else {
           showWarning(
@@ -1725,18 +1822,14 @@ function App() {
             `${successCount}/${totalCount} dosya başarıyla yüklendi. ${failedCount} dosyada hata oluştu.`
           );
         }
-        
-        // Refresh documents and system status
-        setTimeout(() => {
-          fetchDocuments();
-          fetchSystemStatus();
-          fetchGroups();
-        }, 2000);
-        
-      } else {
-        showError('Toplu Yükleme Hatası', data.detail || 'Toplu yükleme sırasında hata oluştu');
-        setBulkUploadProgress(0);
       }
+      
+      // Refresh documents and system status
+      setTimeout(() => {
+        fetchDocuments();
+        fetchSystemStatus();
+        fetchGroups();
+      }, 2000);
     } catch (error) {
       console.error('Bulk upload error:', error);
       showError('Bağlantı Hatası', 'Sunucuya bağlanılamadı. Lütfen tekrar deneyin.');
@@ -3071,7 +3164,7 @@ function App() {
                     </div>
                     <div>
                       <p className="text-lg font-medium text-gray-900">Word Dokümanı Yükleyin</p>
-                      <p className="text-gray-600">.doc ve .docx formatları desteklenir (Maksimum 10MB)</p>
+                      <p className="text-gray-600">{supportedFormats.join(', ')} formatları desteklenir (Maksimum 10MB)</p>
                     </div>
                   </div>
                   
@@ -3079,7 +3172,7 @@ function App() {
                     <input
                       id="fileInput"
                       type="file"
-                      accept=".doc,.docx"
+                      accept={supportedFormats.join(',')}
                       onChange={handleFileSelect}
                       className="hidden"
                     />
@@ -3147,17 +3240,17 @@ function App() {
               {/* Grup Filtreleri */}
               <div className="flex flex-wrap gap-2 mb-4">
                 <button
-                  onClick={() => {setSelectedGroup('all'); fetchDocuments();}}
+                  onClick={() => setSelectedGroup('all')}
                   className={`px-3 py-1 rounded-full text-sm ${
                     selectedGroup === 'all'
                       ? 'bg-blue-500 text-white'
                       : 'bg-gray-100 text-gray-700 hover:bg-gray-200'
                   }`}
                 >
-                  📋 Tümü ({documents.length})
+                  📋 Tümü ({documentStats ? documentStats.total_count : documents.length})
                 </button>
                 <button
-                  onClick={() => {setSelectedGroup('ungrouped'); fetchDocuments();}}
+                  onClick={() => setSelectedGroup('ungrouped')}
                   className={`px-3 py-1 rounded-full text-sm ${
                     selectedGroup === 'ungrouped'
                       ? 'bg-gray-500 text-white'
@@ -3169,7 +3262,7 @@ function App() {
                 {groups.map((group) => (
                   <button
                     key={group.id}
-                    onClick={() => {setSelectedGroup(group.id); fetchDocuments();}}
+                    onClick={() => setSelectedGroup(group.id)}
                     className={`px-3 py-1 rounded-full text-sm flex items-center space-x-1 ${
                       selectedGroup === group.id
                         ? 'text-white'
@@ -3200,12 +3293,21 @@ function App() {
             <div className="bg-white rounded-xl shadow-lg p-6">
               <div className="flex justify-between items-center mb-6">
                 <h2 className="text-xl font-semibold text-gray-900">📁 Yüklenmiş Dokümanlar</h2>
-                <button
-                  onClick={fetchDocuments}
-                  className="px-4 py-2 bg-gray-100 text-gray-700 rounded-lg hover:bg-gray-200 transition-colors"
-                >
-                  🔄 Yenile
-                </button>
+                <div className="flex items-center space-x-2">
+                  <input
+                    type="text"
+                    value={documentFilter}
+                    onChange={(e) => setDocumentFilter(e.target.value)}
+                    placeholder="Dosya adı ile başlayan..."
+                    className="px-3 py-2 border border-gray-300 rounded-lg text-sm focus:outline-none focus:ring-2 focus:ring-blue-500"
+                  />
+                  <button
+                    onClick={() => fetchDocuments()}
+                    className="px-4 py-2 bg-gray-100 text-gray-700 rounded-lg hover:bg-gray-200 transition-colors"
+                  >
+                    🔄 Yenile
+                  </button>
+                </div>
               </div>
 
               {documents.length === 0 ? (
@@ -3347,6 +3449,17 @@ function App() {
                   ))}
                 </div>
               )}
+
+              {documentsCursor && (
+                <div className="text-center mt-6">
+                  <button
+                    onClick={() => fetchDocuments(documentsCursor)}
+                    className="px-4 py-2 bg-gray-100 text-gray-700 rounded-lg hover:bg-gray-200 transition-colors"
+                  >
+                    Daha Fazla Göster ({documents.length} / {documentStats ? documentStats.total_count : '?'})
+                  </button>
+                </div>
+              )}
             </div>
           </div>
         )}
@@ -3944,13 +4057,13 @@ function App() {
                     id="bulkFileInput"
                     type="file"
                     multiple
-                    accept=".doc,.docx"
+                    accept={[...supportedFormats, '.zip'].join(',')}
                     onChange={handleBulkFileSelect}
                     className="hidden"
                   />
                 </div>
                 <p className="text-xs text-gray-500">
-                  .doc ve .docx dosyaları desteklenir. Maksimum 20 dosya, her biri 10MB'dan küçük olmalı.
+                  {supportedFormats.join(', ')} dosyaları veya bunları içeren .zip arşivleri desteklenir. Maksimum 20 dosya, her doküman 10MB'dan küçük olmalı.
                 </p>
               </div>
             </div>
@@ -4023,13 +4136,13 @@ function App() {
                   <div 
                     key={index} 
                     className={`flex justify-between items-center p-2 rounded text-sm ${
-                      result.status === 'success' ? 'bg-green-50 text-green-700' : 'bg-red-50 text-red-700'
+                      result.status === 'success' ? 'bg-green-50 text-green-700' : result.status === 'queued' ? 'bg-blue-50 text-blue-700' : 'bg-red-50 text-red-700'
                     }`}
                   >
                     <span className="truncate flex-1 mr-2">{result.filename}</span>
                     <div className="flex items-center space-x-2">
                       <span className="text-xs">
-                        {result.status === 'success' ? '✅' : '❌'}
+                        {result.status === 'success' ? '✅' : result.status === 'queued' ? '⏳' : '❌'}
                       </span>
                       <span className="text-xs">
                         {result.message}
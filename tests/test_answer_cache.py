@@ -0,0 +1,110 @@
+"""
+AnswerCache lookups, answer-count bound, TTL and document invalidation.
+
+Pure in-memory tests: no MongoDB, embedding model or FAISS index is needed.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "kpa_test_answer_cache")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+import server  # noqa: E402
+
+IZIN = {"id": "doc-izin", "filename": "izin.docx"}
+MASRAF = {"id": "doc-masraf", "filename": "masraf.docx"}
+IZIN_CONTEXT = server.AnswerCache.context_key([{"document_id": "doc-izin", "chunk_index": 0}])
+MASRAF_CONTEXT = server.AnswerCache.context_key([{"document_id": "doc-masraf", "chunk_index": 3}])
+# A near-duplicate chunk stored once and owned by both documents
+SHARED_CONTEXT = server.AnswerCache.context_key([
+    {"document_id": "doc-izin", "chunk_index": 1, "document_ids": ["doc-izin", "doc-masraf"]}
+])
+
+
+def new_cache(max_entries: int = 10, ttl_seconds: int = 60) -> server.AnswerCache:
+    return server.AnswerCache(max_entries, ttl_seconds, 0.9)
+
+
+def test_hit_needs_same_context_and_similar_question():
+    cache = new_cache()
+    cache.put([1.0, 0.0], IZIN_CONTEXT, "İK sisteminden talep edilir.", [IZIN], cache.version)
+
+    hit = cache.get([0.99, 0.05], IZIN_CONTEXT)
+    assert hit["answer"] == "İK sisteminden talep edilir."
+    assert hit["source_documents"] == [IZIN]
+    assert cache.get([0.0, 1.0], IZIN_CONTEXT) is None
+    assert cache.get([1.0, 0.0], MASRAF_CONTEXT) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_context_key_changes_when_a_chunk_gains_an_owner():
+    single = server.AnswerCache.context_key([{"document_id": "doc-izin", "chunk_index": 1}])
+    assert single != SHARED_CONTEXT
+
+
+def test_bounded_by_answers_across_contexts():
+    cache = new_cache(max_entries=3)
+    cache.put([1.0, 0.0], IZIN_CONTEXT, "a1", [IZIN], cache.version)
+    cache.put([0.0, 1.0], IZIN_CONTEXT, "a2", [IZIN], cache.version)
+    cache.put([1.0, 0.0], MASRAF_CONTEXT, "m1", [MASRAF], cache.version)
+    cache.put([0.0, 1.0], MASRAF_CONTEXT, "m2", [MASRAF], cache.version)
+
+    assert cache.size == 3
+    # The oldest answer of the least recently used context goes first
+    assert cache.get([1.0, 0.0], IZIN_CONTEXT) is None
+    assert cache.get([0.0, 1.0], IZIN_CONTEXT)["answer"] == "a2"
+    assert cache.get([0.0, 1.0], MASRAF_CONTEXT)["answer"] == "m2"
+
+
+def test_expired_answers_are_not_returned(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+    cache = new_cache(ttl_seconds=60)
+    cache.put([1.0, 0.0], IZIN_CONTEXT, "eski", [IZIN], cache.version)
+
+    now[0] += 61
+    assert cache.get([1.0, 0.0], IZIN_CONTEXT) is None
+    cache.put([1.0, 0.0], IZIN_CONTEXT, "yeni", [IZIN], cache.version)
+    assert cache.size == 1
+    assert cache.get([1.0, 0.0], IZIN_CONTEXT)["answer"] == "yeni"
+
+
+def test_invalidate_documents_evicts_answers_citing_them():
+    cache = new_cache()
+    cache.put([1.0, 0.0], IZIN_CONTEXT, "izin", [IZIN], cache.version)
+    cache.put([1.0, 0.0], MASRAF_CONTEXT, "masraf", [MASRAF], cache.version)
+    cache.put([1.0, 0.0], SHARED_CONTEXT, "ortak", [IZIN], cache.version)
+
+    # The shared chunk ties the third answer to doc-masraf even though it only cites doc-izin
+    assert cache.invalidate_documents(["doc-masraf"]) == 2
+    assert cache.get([1.0, 0.0], MASRAF_CONTEXT) is None
+    assert cache.get([1.0, 0.0], SHARED_CONTEXT) is None
+    assert cache.get([1.0, 0.0], IZIN_CONTEXT)["answer"] == "izin"
+    assert cache.size == 1
+    assert "doc-masraf" not in cache.keys_by_document
+
+
+def test_answer_built_before_an_invalidation_is_not_stored():
+    cache = new_cache()
+    version = cache.version  # read before retrieval
+    cache.invalidate_documents(["doc-izin"])
+
+    cache.put([1.0, 0.0], IZIN_CONTEXT, "bayat", [IZIN], version)
+    cache.put([1.0, 0.0], MASRAF_CONTEXT, "masraf", [MASRAF], version)
+    assert cache.get([1.0, 0.0], IZIN_CONTEXT) is None
+    assert cache.get([1.0, 0.0], MASRAF_CONTEXT)["answer"] == "masraf"
+
+    version = cache.version
+    cache.clear()
+    cache.put([1.0, 0.0], MASRAF_CONTEXT, "masraf", [MASRAF], version)
+    assert cache.size == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = new_cache(max_entries=0)
+    cache.put([1.0, 0.0], IZIN_CONTEXT, "izin", [IZIN], cache.version)
+    assert cache.get([1.0, 0.0], IZIN_CONTEXT) is None
+    assert cache.size == 0
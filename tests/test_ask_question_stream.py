@@ -0,0 +1,114 @@
+"""
+Streaming Q&A endpoint (/api/ask-question/stream) with the offline LLM stub.
+
+Retrieval is replaced with a fixed context so no embedding model or FAISS index is needed. Chat sessions
+are written to a scratch database on the MongoDB at MONGO_URL, which is dropped afterwards; the test is
+skipped when no server is reachable.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+
+os.environ["LLM_PROVIDER"] = "stub"
+os.environ["LLM_STUB_TOKEN_DELAY_MS"] = "0"
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+# Never the application database: the test drops it when done
+os.environ["DB_NAME"] = os.environ.get("TEST_DB_NAME", "kpa_test_ask_question_stream")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+import server  # noqa: E402
+
+QUESTION = "Yıllık izin nasıl talep edilir?"
+SESSION_ID = "stream-test-session"
+SOURCE_DOCUMENTS = [{"id": "doc-izin", "filename": "izin_proseduru.docx", "group_name": "İnsan Kaynakları"}]
+CONTEXT_TEXT = "Yıllık izin talepleri en az iki hafta önceden yöneticiye iletilir ve İK sisteminden onaylanır."
+observed = {}
+
+
+def mongo_available() -> bool:
+    try:
+        MongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=1000).admin.command("ping")
+        return True
+    except Exception:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not mongo_available(), reason="MongoDB not reachable at MONGO_URL")
+
+
+async def fixed_answer_context(question: str) -> dict:
+    # Runs inside the response body, where ingestion must still be yielding to the request
+    observed["ingestion_yielding"] = not server.ingestion_admission._idle.is_set()
+    return {
+        "query_embedding": [1.0, 0.0, 0.0],
+        "context_key": (("doc-izin", 0, ("doc-izin",)),),
+        "cache_version": server.answer_cache.version,
+        "cached_answer": None,
+        "source_documents": SOURCE_DOCUMENTS,
+        "context_text": CONTEXT_TEXT
+    }
+
+
+def parse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_sends_sources_tokens_done_and_saves_session(monkeypatch):
+    monkeypatch.setattr(server, "prepare_answer_context", fixed_answer_context)
+    monkeypatch.setattr(server, "answer_cache", server.AnswerCache(0, 60, 0.9))
+
+    async def ask():
+        # A client per event loop; the one created when server was imported is not used here
+        client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+        monkeypatch.setattr(server, "db", client[os.environ["DB_NAME"]])
+        try:
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                response = await http.post("/api/ask-question/stream", json={"question": QUESTION, "session_id": SESSION_ID})
+            session = await server.db.chat_sessions.find_one({"session_id": SESSION_ID})
+            return response, session
+        finally:
+            await client.drop_database(os.environ["DB_NAME"])
+            client.close()
+
+    response, session = asyncio.run(ask())
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "sources"
+    assert names[-1] == "done"
+    assert len(names) > 3 and set(names[1:-1]) == {"token"}
+
+    sources = events[0][1]
+    assert sources["session_id"] == SESSION_ID
+    assert [doc["filename"] for doc in sources["sources"]] == ["izin_proseduru.docx"]
+
+    done = events[-1][1]
+    streamed = "".join(data["text"] for name, data in events if name == "token")
+    assert streamed == done["answer"]
+    assert done["answer"].startswith("**Test yanıtı:**")
+    assert "izin_proseduru.docx" in done["answer"]
+    assert done["sources"] == ["izin_proseduru.docx"]
+    assert done["cached"] is False
+
+    assert observed["ingestion_yielding"] is True
+    assert server.ingestion_admission._idle.is_set()
+
+    assert session is not None
+    assert session["question"] == QUESTION
+    assert session["answer"] == done["answer"]
+    assert session["source_documents"] == ["izin_proseduru.docx"]
@@ -0,0 +1,106 @@
+"""
+Keyset cursors for the document listing: encoding round trips and the (sort_by, id) filter.
+
+The filter is evaluated against in-memory documents, so paging is checked without MongoDB.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "kpa_test_document_cursors")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+import server  # noqa: E402
+
+START = datetime(2024, 3, 1, 9, 30, 15, 123000)
+# Every third document shares an upload date and every other one a filename, so ties are broken by id
+DOCUMENTS = [
+    {
+        "id": f"doc-{i:02d}",
+        "filename": f"prosedur-{i // 2:02d}.docx",
+        "upload_date": START + timedelta(minutes=i // 3),
+    }
+    for i in range(20)
+]
+
+
+def compare(value, operator: str, bound) -> bool:
+    return value < bound if operator == "$lt" else value > bound
+
+
+def matches(document: dict, keyset_filter: dict) -> bool:
+    """Evaluate the {"$or": [{field: {op: v}}, {field: v, "id": {op: id}}]} shape built by document_keyset_filter"""
+    for clause in keyset_filter["$or"]:
+        if "id" not in clause:
+            (field, condition), = clause.items()
+            (operator, bound), = condition.items()
+            if compare(document[field], operator, bound):
+                return True
+        else:
+            field = next(key for key in clause if key != "id")
+            (operator, bound), = clause["id"].items()
+            if document[field] == clause[field] and compare(document["id"], operator, bound):
+                return True
+    return False
+
+
+def walk_pages(sort_by: str, direction: int, page_size: int) -> list:
+    """Page through DOCUMENTS the way list_documents does"""
+    ordered = sorted(DOCUMENTS, key=lambda doc: (doc[sort_by], doc["id"]), reverse=direction < 0)
+    pages = []
+    cursor = None
+    while True:
+        remaining = [doc for doc in ordered if matches(doc, server.document_keyset_filter(sort_by, direction, cursor))] if cursor else ordered
+        page = remaining[:page_size + 1]
+        pages.append([doc["id"] for doc in page[:page_size]])
+        if len(page) <= page_size:
+            return pages
+        cursor = server.encode_document_cursor(page[page_size - 1], sort_by)
+
+
+@pytest.mark.parametrize("sort_by", sorted(server.DOCUMENT_SORT_FIELDS))
+def test_cursor_round_trip(sort_by):
+    document = DOCUMENTS[7]
+    cursor = server.encode_document_cursor(document, sort_by)
+
+    assert cursor.isascii() and "/" not in cursor and "+" not in cursor
+    assert server.decode_document_cursor(cursor, sort_by) == (document[sort_by], document["id"])
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", "WzFd", server.encode_document_cursor(DOCUMENTS[0], "filename")])
+def test_invalid_cursor_is_rejected(cursor):
+    # The last one is a filename cursor read as an upload_date cursor
+    with pytest.raises(HTTPException) as error:
+        server.decode_document_cursor(cursor, "upload_date")
+    assert error.value.status_code == 400
+    assert error.value.detail == "Geçersiz sayfa imleci"
+
+
+@pytest.mark.parametrize("direction", [1, -1])
+@pytest.mark.parametrize("sort_by", sorted(server.DOCUMENT_SORT_FIELDS))
+@pytest.mark.parametrize("page_size", [1, 3, 7, 20])
+def test_pages_cover_every_document_once_in_order(sort_by, direction, page_size):
+    pages = walk_pages(sort_by, direction, page_size)
+    expected = [doc["id"] for doc in sorted(DOCUMENTS, key=lambda doc: (doc[sort_by], doc["id"]), reverse=direction < 0)]
+
+    assert [document_id for page in pages for document_id in page] == expected
+    assert all(len(page) == page_size for page in pages[:-1])
+    assert pages[-1]
+
+
+def test_keyset_filter_direction():
+    cursor = server.encode_document_cursor(DOCUMENTS[4], "upload_date")
+
+    descending = server.document_keyset_filter("upload_date", -1, cursor)
+    assert descending == {"$or": [
+        {"upload_date": {"$lt": DOCUMENTS[4]["upload_date"]}},
+        {"upload_date": DOCUMENTS[4]["upload_date"], "id": {"$lt": "doc-04"}},
+    ]}
+    ascending = server.document_keyset_filter("upload_date", 1, cursor)
+    assert ascending["$or"][0] == {"upload_date": {"$gt": DOCUMENTS[4]["upload_date"]}}
@@ -0,0 +1,114 @@
+"""
+Structure-aware chunking: leaf chunk offsets, section boundaries and token budgets.
+
+Runs without MongoDB or the embedding model; token counts fall back to the word/punctuation estimate.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "kpa_test_hierarchical_chunking")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+import server  # noqa: E402
+
+MAX_TOKENS = 24
+OVERLAP_TOKENS = 12
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    monkeypatch.setattr(server, "sentence_model", None)
+    monkeypatch.setattr(server, "chunk_tokenizer", None)
+    monkeypatch.setattr(server, "CHUNK_MAX_TOKENS", MAX_TOKENS)
+    monkeypatch.setattr(server, "CHUNK_OVERLAP_TOKENS", OVERLAP_TOKENS)
+
+
+def paragraph(label: str, sentences: int) -> str:
+    return " ".join(f"{label} prosedürünün {i}. adımı onay için yöneticiye iletilir." for i in range(1, sentences + 1))
+
+
+def heading(text: str, level: int, number: str) -> dict:
+    return {"text": text, "level": level, "number": number}
+
+
+def body(text: str) -> dict:
+    return {"text": text, "level": None, "number": None}
+
+
+BLOCKS = [
+    body("Bu doküman izin süreçlerini tanımlar."),
+    heading("1. Yıllık İzin", 1, "1"),
+    body(paragraph("Yıllık izin", 6)),
+    heading("1.1 Başvuru", 2, "1.1"),
+    body(paragraph("Başvuru", 4)),
+    heading("2. Mazeret İzni", 1, "2"),
+    heading("2.1 Evlilik", 2, "2.1"),
+    body(paragraph("Evlilik izni", 3)),
+]
+
+
+def test_leaf_offsets_address_the_document_text():
+    prepared = server.build_hierarchical_chunks(BLOCKS)
+
+    assert prepared["chunks"]
+    assert prepared["text"] == "\n".join(block["text"] for block in BLOCKS)
+    for chunk, metadata in zip(prepared["chunks"], prepared["chunk_metadata"]):
+        assert prepared["text"][metadata["start"]:metadata["end"]] == chunk
+        assert server.count_tokens(chunk) <= MAX_TOKENS
+
+
+def test_leaves_stay_inside_their_section():
+    prepared = server.build_hierarchical_chunks(BLOCKS)
+    sections = prepared["sections"]
+
+    for metadata in prepared["chunk_metadata"]:
+        index = metadata["section_index"]
+        if index is None:
+            # Preamble before the first heading
+            assert metadata["end"] <= sections[0]["start"]
+            continue
+        section = sections[index]
+        assert metadata["section_title"] == section["title"]
+        assert section["start"] <= metadata["start"] and metadata["end"] <= section["body_end"]
+
+
+def test_section_tree_and_heading_only_sections():
+    prepared = server.build_hierarchical_chunks(BLOCKS)
+    sections = prepared["sections"]
+
+    assert [section["title"] for section in sections] == ["1. Yıllık İzin", "1.1 Başvuru", "2. Mazeret İzni", "2.1 Evlilik"]
+    assert [section["parent"] for section in sections] == [None, 0, None, 2]
+    assert sections[0]["end"] == sections[2]["start"] - 1
+    assert sections[3]["end"] == len(prepared["text"])
+    assert server.get_section_path(sections, 3) == "2. Mazeret İzni > 2.1 Evlilik"
+    # "2. Mazeret İzni" has no body of its own, so it is only a parent node
+    assert 2 not in {metadata["section_index"] for metadata in prepared["chunk_metadata"]}
+
+
+def test_consecutive_chunks_overlap_by_whole_sentences():
+    text = paragraph("Yıllık izin", 8)
+    spans = server.chunk_text_spans(text)
+    sentences = server.split_sentence_spans(text)
+    sentence_starts = {start for start, _ in sentences}
+    sentence_ends = {end for _, end in sentences}
+
+    assert len(spans) > 1
+    for (start, end), (next_start, next_end) in zip(spans, spans[1:]):
+        assert start in sentence_starts and end in sentence_ends
+        assert start < next_start < end < next_end
+        assert server.count_tokens(text[next_start:end]) <= OVERLAP_TOKENS
+
+
+def test_abbreviations_and_section_numbers_do_not_end_sentences():
+    text = "Başvurular Dr. Ayşe Yılmaz vb. yetkililere iletilir. Ayrıntılar için bkz. Madde 4.2. Onay İK tarafından verilir."
+    sentences = [text[start:end] for start, end in server.split_sentence_spans(text)]
+
+    assert sentences == [
+        "Başvurular Dr. Ayşe Yılmaz vb. yetkililere iletilir.",
+        "Ayrıntılar için bkz. Madde 4.2. Onay İK tarafından verilir.",
+    ]
@@ -0,0 +1,100 @@
+"""
+Content-Range validation for resumable uploads (PUT /api/uploads/{upload_id}).
+
+The session lookup is replaced with an in-memory session and the part file lives in a temporary directory,
+so the rejected ranges are checked without MongoDB.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "kpa_test_resumable_upload_ranges")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+import server  # noqa: E402
+
+UPLOAD_ID = "upload-ranges"
+SIZE = 100
+EDITOR = {"id": "editor-1", "role": "editor"}
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes 0-49/100", (0, 49, 100)),
+    ("  bytes 50-99/100 ", (50, 99, 100)),
+    ("bytes 99-99/100", (99, 99, 100)),
+    ("bytes 50-49/100", None),
+    ("bytes 0-100/100", None),
+    ("bytes 0-49/*", None),
+    ("bytes */100", None),
+    ("bytes=0-49/100", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_content_range(header, expected):
+    assert server.parse_content_range(header) == expected
+
+
+@pytest.fixture
+def upload_session(monkeypatch, tmp_path):
+    session = {
+        "id": UPLOAD_ID,
+        "filename": "izin.docx",
+        "size": SIZE,
+        "status": "active",
+        "created_by": EDITOR["id"],
+        "expires_at": datetime.utcnow() + timedelta(hours=1),
+    }
+
+    async def get_upload_session(upload_id, current_user):
+        return session
+
+    monkeypatch.setattr(server, "RESUMABLE_UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(server, "get_upload_session", get_upload_session)
+    server.app.dependency_overrides[server.require_editor_or_admin] = lambda: EDITOR
+    yield tmp_path / f"{UPLOAD_ID}.part"
+    server.app.dependency_overrides.pop(server.require_editor_or_admin, None)
+
+
+def put_range(content_range: str, body: bytes) -> httpx.Response:
+    async def send():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await http.put(f"/api/uploads/{UPLOAD_ID}", content=body, headers={"Content-Range": content_range})
+
+    return asyncio.run(send())
+
+
+@pytest.mark.parametrize("content_range", ["bytes 0-49/200", "bytes 0-100/100", "bytes 0-49"])
+def test_invalid_or_mismatched_range_is_rejected(upload_session, content_range):
+    response = put_range(content_range, b"x" * 50)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Geçersiz Content-Range başlığı"
+    assert not upload_session.exists()
+
+
+def test_range_not_at_current_offset_returns_409_with_offset(upload_session):
+    upload_session.write_bytes(b"x" * 40)
+
+    for content_range in ("bytes 0-49/100", "bytes 50-99/100"):
+        response = put_range(content_range, b"y" * 50)
+        assert response.status_code == 409
+        assert response.headers["Upload-Offset"] == "40"
+        assert response.json()["detail"] == "Beklenen başlangıç konumu 40"
+
+    # Nothing was appended by the rejected requests
+    assert upload_session.read_bytes() == b"x" * 40
+
+
+def test_first_range_must_start_at_zero(upload_session):
+    response = put_range("bytes 10-59/100", b"y" * 50)
+
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "0"